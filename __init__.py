@@ -7,11 +7,16 @@ __all__ = [
     'game',
     'player',
     'enemy',
-    'bullet',
-    'enemy_bullet',
+    'flow_field',
+    'projectiles',
+    'memory_report',
     'level',
+    'spatial_hash',
+    'tile_grid',
     'wall',
+    'wall_layer',
     'utils',
+    'input_source',
     'settings',
 ]
 
@@ -0,0 +1,346 @@
+"""
+bench.py: Reproducible performance benchmarks for the game simulation.
+
+Each scenario builds its state from a fixed seed, runs a fixed number of
+operations (game ticks, Tetris moves, Hall of Fame writes) with the display
+off, and reports operations per second plus the peak Python memory of a
+separate traced run. Results are compared against a stored baseline JSON:
+
+    python -m training_game.bench                   # run and compare
+    python -m training_game.bench -k enemies        # only matching scenarios
+    python -m training_game.bench --save-baseline   # record a new baseline
+
+The baseline is machine-specific; record it on the machine you compare on.
+"""
+
+import os
+
+# The game and tetris modules open pygame at import; keep them off-screen
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pygame
+from training_game import settings
+
+BASELINE_PATH = Path(__file__).resolve().parent / "bench_baseline.json"
+REPEATS = 3  # Timed runs per scenario; the best is reported
+REGRESSION_THRESHOLD = 0.10  # Slower than baseline by more than this fraction is flagged
+
+# name -> (setup function, operations per run, unit)
+SCENARIOS = {}
+
+
+def scenario(name, ops, unit='ticks'):
+    """
+    Register a benchmark. The decorated function builds fresh state and
+    returns a callable that performs one operation. If that callable has a
+    `close` attribute, it is called once the run is over, to release files
+    or connections the state holds.
+    """
+    def register(setup):
+        SCENARIOS[name] = (setup, ops, unit)
+        return setup
+    return register
+
+
+def _game(level=0, keys=None):
+    from training_game.game_clean import Game
+    from training_game.input_source import ScriptedInput, KeyState, NO_KEYS
+    if keys is None:
+        keys = lambda: NO_KEYS
+    else:
+        keys = ScriptedInput([KeyState(k) for k in keys], loop=True)
+    game = Game(headless=True, input_source=keys)
+    game.start_level(level)
+    game.player.lives = 10 ** 9  # Scenarios measure load, not game over
+    return game
+
+
+def _tick(game):
+    def step():
+        game.step(1)
+        game.render()
+    return step
+
+
+def _hunt_keys():
+    # Patrol and shoot in all four directions
+    k = pygame
+    pattern = []
+    for move in (k.K_LEFT, k.K_UP, k.K_RIGHT, k.K_DOWN):
+        pattern.extend([{move, k.K_SPACE}] * 40)
+    return pattern
+
+
+def _level_scenario(index):
+    def setup():
+        return _tick(_game(index, _hunt_keys()))
+    return setup
+
+
+for _index, _name in enumerate(settings.LEVELS):
+    scenario(f'level_{_name}', ops=1500)(_level_scenario(_index))
+
+
+def _enemies_scenario(count=None):
+    # count=None fills every tile a tank fits on
+    def setup():
+        from training_game.level import get_level
+        from training_game.enemy import ENEMY_SIZE
+        from training_game.spawn_scheduler import SpawnScheduler
+        game = _game(0)
+        walls = game.walls
+        tile = walls.tile_size
+        free = get_level(0).free_space()
+        size = -(-ENEMY_SIZE // tile)
+        # Random tiles a tank fits on, never two tanks on one tile: stacked
+        # tanks only collide with each other and do not measure a real fleet
+        tiles = [(c, r) for r in range(walls.rows) for c in range(walls.cols) if free.fits(c, r, size)]
+        rng = random.Random(settings.RANDOM_SEED)
+        picks = rng.sample(tiles, len(tiles) if count is None else min(count, len(tiles)))
+        game.spawner = SpawnScheduler([], 0)  # Fleet is filled directly below
+        game.enemies.clear()
+        for col, row in picks:
+            game.enemies.spawn(col * tile, row * tile)
+        return _tick(game)
+    return setup
+
+
+for _count, _ops in ((10, 1500), (100, 400)):
+    scenario(f'enemies_{_count}', ops=_ops)(_enemies_scenario(_count))
+# The screen holds one tank on each of about 230 free tiles of level 1
+scenario('enemies_full', ops=100)(_enemies_scenario())
+
+
+@scenario('bullet_storm', ops=600)
+def _bullet_storm():
+    from training_game.projectiles import OWNER_PLAYER, OWNER_ENEMY
+    game = _game(0)
+    rng = random.Random(settings.RANDOM_SEED)
+    directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    tick = _tick(game)
+
+    def step():
+        for _ in range(20):
+            game.projectiles.spawn(rng.randrange(40, settings.SCREEN_WIDTH - 40),
+                                   rng.randrange(40, settings.SCREEN_HEIGHT - 40),
+                                   rng.choice(directions), rng.choice((OWNER_PLAYER, OWNER_ENEMY)))
+        tick()
+    return step
+
+
+@scenario('wall_churn', ops=600)
+def _wall_churn():
+    from training_game.projectiles import OWNER_PLAYER
+    game = _game(len(settings.LEVELS) - 1)  # The level with the most destructible walls
+    tile = game.walls.tile_size
+    tick = _tick(game)
+    columns = range(1, game.walls.cols - 1)
+    state = {'col': 0}
+
+    def step():
+        # A line of bullets sweeping up through the walls, restarting the level when cleared
+        if game.state != 'RUN':
+            game.start_level(len(settings.LEVELS) - 1)
+            game.player.lives = 10 ** 9
+        col = columns[state['col'] % len(columns)]
+        state['col'] += 1
+        game.projectiles.spawn(col * tile + tile // 2, settings.SCREEN_HEIGHT - tile - 10, (0, -1), OWNER_PLAYER)
+        tick()
+    return step
+
+
+@scenario('net_snapshots', ops=1500, unit='ticks')
+def _net_snapshots():
+    from training_game import net_protocol as proto
+    game = _game(0, _hunt_keys())
+    game.add_player().lives = 10 ** 9
+    tick = _tick(game)
+    state = {'frame': None}
+
+    def step():
+        # What the server does per tick for a client that acknowledged the previous snapshot
+        tick()
+        frame = proto.capture_frame(game)
+        proto.encode_delta(frame, state['frame'])
+        state['frame'] = frame
+    return step
+
+
+@scenario('tetris_valid_space', ops=20000, unit='calls')
+def _tetris_valid_space():
+    import training_game.tetris as tetris
+    rng = random.Random(settings.RANDOM_SEED)
+    locked = {(x, y): tetris.COLORS[0] for y in range(tetris.ROWS - 6, tetris.ROWS)
+              for x in range(tetris.COLUMNS) if rng.random() < 0.7}
+    grid = tetris.create_grid(locked)
+    piece = tetris.Piece(tetris.COLUMNS // 2 - 2, 0, tetris.SHAPES[0])
+    positions = [(rng.randrange(-1, tetris.COLUMNS), rng.randrange(0, tetris.ROWS)) for _ in range(64)]
+    state = {'i': 0}
+
+    def step():
+        piece.x, piece.y = positions[state['i'] % len(positions)]
+        state['i'] += 1
+        tetris.valid_space(piece, grid)
+    return step
+
+
+@scenario('tetris_clear_rows', ops=5000, unit='calls')
+def _tetris_clear_rows():
+    import training_game.tetris as tetris
+    rng = random.Random(settings.RANDOM_SEED)
+    base = {(x, y): tetris.COLORS[0] for y in range(tetris.ROWS - 8, tetris.ROWS)
+            for x in range(tetris.COLUMNS) if y % 2 == 0 or rng.random() < 0.6}
+
+    def step():
+        locked = dict(base)
+        tetris.clear_rows(tetris.create_grid(locked), locked)
+    return step
+
+
+@scenario('hall_of_fame_json', ops=300, unit='writes')
+def _hall_of_fame_json():
+    from training_game import hall_of_fame
+    directory = tempfile.TemporaryDirectory()
+    path = Path(directory.name) / "hall_of_fame.json"
+    backend = hall_of_fame.JsonBackend(path)
+    state = {'i': 0}
+
+    def step():
+        state['i'] += 1
+        backend.add_many([hall_of_fame.make_entry(f"P{state['i'] % 7}", state['i'] * 37 % 1000)])
+        hall_of_fame.invalidate(path)  # Force a real re-read and parse
+        backend.top(10)
+    step.close = directory.cleanup
+    return step
+
+
+@scenario('hall_of_fame_sqlite', ops=300, unit='writes')
+def _hall_of_fame_sqlite():
+    from training_game import hall_of_fame
+    from training_game.hall_of_fame_sqlite import SqliteBackend
+    directory = tempfile.TemporaryDirectory()
+    backend = SqliteBackend(Path(directory.name) / "hall_of_fame.sqlite3")
+    state = {'i': 0}
+
+    def step():
+        state['i'] += 1
+        backend.add_many([hall_of_fame.make_entry(f"P{state['i'] % 7}", state['i'] * 37 % 1000)])
+        backend.top(10)
+
+    def close():
+        # The database and its WAL files go with the directory once closed
+        backend.close()
+        directory.cleanup()
+    step.close = close
+    return step
+
+
+def _close(step):
+    close = getattr(step, 'close', None)
+    if close is not None:
+        close()
+
+
+def run_scenario(name, repeats=REPEATS):
+    """
+    Run one scenario: `repeats` timed runs on fresh state, then one traced
+    run for memory.
+    :return: Dict with 'ops_per_sec' (best run), 'unit', 'ops' and 'peak_kib'.
+    """
+    setup, ops, unit = SCENARIOS[name]
+    best = 0.0
+    for _ in range(repeats):
+        random.seed(settings.RANDOM_SEED)
+        step = setup()
+        try:
+            start = time.perf_counter()
+            for _ in range(ops):
+                step()
+            elapsed = time.perf_counter() - start
+        finally:
+            _close(step)
+        best = max(best, ops / elapsed if elapsed > 0 else float('inf'))
+
+    # Memory is measured in a separate run: tracing slows execution down
+    random.seed(settings.RANDOM_SEED)
+    tracemalloc.start()
+    step = setup()
+    try:
+        for _ in range(max(1, ops // 10)):
+            step()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        _close(step)
+    return {'ops_per_sec': round(best, 1), 'unit': unit, 'ops': ops, 'peak_kib': round(peak / 1024, 1)}
+
+
+def compare(results, baseline):
+    """
+    Return {name: change} where change is the relative speed change against
+    the baseline (+0.05 = 5% faster), for scenarios present in both.
+    """
+    changes = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and base.get('ops_per_sec'):
+            changes[name] = result['ops_per_sec'] / base['ops_per_sec'] - 1.0
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Iron Blitz benchmarks")
+    parser.add_argument('-k', dest='pattern', default='', help="only run scenarios whose name contains this")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="relative slowdown reported as a regression (default 0.10)")
+    parser.add_argument('--json', type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8')).get('results', {})
+
+    results = {}
+    regressions = []
+    print(f"{'scenario':<22}{'ops/s':>12}  {'unit':<7}{'peak KiB':>10}{'vs baseline':>13}")
+    for name in SCENARIOS:
+        if args.pattern not in name:
+            continue
+        result = results[name] = run_scenario(name, args.repeats)
+        change = compare({name: result}, baseline).get(name)
+        note = '' if change is None else f"{change:+.1%}"
+        if change is not None and change < -args.threshold:
+            regressions.append(name)
+            note += ' !'
+        print(f"{name:<22}{result['ops_per_sec']:>12.1f}  {result['unit']:<7}{result['peak_kib']:>10.1f}{note:>13}")
+
+    report = {'python': sys.version.split()[0], 'pygame': pygame.version.ver, 'results': results}
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    if args.save_baseline:
+        if args.pattern and baseline:
+            # Keep the scenarios that were not re-run
+            report['results'] = {**baseline, **results}
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding='utf-8')
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"Regressions (> {args.threshold:.0%} slower): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+client.py: Defines the GameClient class, which plays on a GameServer, and ClientView, which draws what it receives.
+
+The client never simulates: it sends its held keys every tick and shows
+the newest snapshot. Snapshots arrive over UDP when the handshake gets an
+answer within NET_UDP_TIMEOUT seconds, otherwise over the TCP connection.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import pygame
+from training_game import logger
+from training_game import net_protocol as proto
+from training_game.enemy import ENEMY_SIZE, ENEMY_COLOR
+from training_game.hud import Hud
+from training_game.input_source import NO_KEYS
+from training_game.projectiles import BULLET_SIZE, BULLET_COLORS
+from training_game.replay import encode_keys
+from training_game.settings import (
+    NET_PORT,
+    NET_SNAPSHOT_HISTORY,
+    NET_UDP_TIMEOUT,
+    PLAYER_COLORS,
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+)
+from training_game.tile_grid import TileGrid
+from training_game.utils import render_text
+from training_game.wall_layer import WallLayer
+
+PLAYER_SIZE = 40
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, addr):
+        self.client.on_datagram(data)
+
+
+class GameClient:
+    """
+    Connection to a GameServer: sends input, decodes snapshots and keeps
+    traffic and latency figures.
+    """
+    def __init__(self, host='127.0.0.1', port=NET_PORT, input_source=None, udp=True):
+        """
+        :param host: Server address.
+        :param port: Server TCP port.
+        :param input_source: Callable returning the current key state, in
+            the form of pygame.key.get_pressed(). Defaults to no keys held.
+        :param udp: Try UDP first; False uses TCP only.
+        """
+        self.host = host
+        self.port = port
+        self.input_source = input_source or (lambda: NO_KEYS)
+        self.udp = udp
+        self.slot = None
+        self.token = None
+        self.sim_rate = 0
+        self.snapshot_interval = 0
+        self.quantum = 1
+        self.grid_shape = None  # (cols, rows, tile size) of the level grid
+        self.transport = None   # 'udp' or 'tcp' once connected
+        # Newest decoded snapshot
+        self.state = None
+        self.connected = False
+        self._reader = None
+        self._writer = None
+        self._datagrams = None
+        self._udp_confirmed = None
+        self._reader_task = None
+        self._frames = OrderedDict()  # tick -> frame, baselines the server may delta against
+        self._sequence = 0
+        self._started = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+        self.first_tick = None
+        self.undecodable = 0
+        self.rtts = []
+
+    async def connect(self):
+        """
+        Join the game and settle on a transport.
+        :raises ConnectionError: If the server refuses the connection.
+        """
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._send_tcp(proto.HELLO.pack(proto.MSG_HELLO, proto.PROTOCOL_VERSION,
+                                        proto.HELLO_WANTS_UDP if self.udp else 0))
+        data = await proto.read_message(self._reader, proto.MAX_SNAPSHOT)
+        if proto.message_type(data) == proto.MSG_REJECT:
+            raise ConnectionError(f"Server refused: {bytes(data[1:]).decode('utf-8', 'replace')}")
+        if proto.message_type(data) != proto.MSG_WELCOME or len(data) < proto.WELCOME.size:
+            raise ConnectionError("Unexpected reply from server")
+        (_, _, self.slot, self.token, udp_port, self.sim_rate, self.snapshot_interval,
+         self.quantum, cols, rows, tile) = proto.WELCOME.unpack_from(data)
+        self.grid_shape = (cols, rows, tile)
+        self.connected = True
+        self._started = time.perf_counter()
+        self._reader_task = asyncio.create_task(self._read_tcp())
+
+        self.transport = 'tcp'
+        if udp_port and await self._udp_handshake(udp_port):
+            self.transport = 'udp'
+        elif udp_port:
+            logger.warning('No UDP reply from %s:%s, falling back to TCP', self.host, udp_port)
+            self._send_tcp(bytes((proto.MSG_USE_TCP,)))
+        logger.info('Joined as player %s over %s', self.slot + 1, self.transport)
+
+    async def _udp_handshake(self, udp_port):
+        loop = asyncio.get_running_loop()
+        try:
+            self._datagrams, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), remote_addr=(self.host, udp_port))
+        except OSError:
+            return False
+        self._udp_confirmed = loop.create_future()
+        hello = proto.UDP_HELLO.pack(proto.MSG_UDP_HELLO, self.token)
+        deadline = loop.time() + NET_UDP_TIMEOUT
+        # The hello itself can be lost: repeat it until answered
+        while loop.time() < deadline:
+            self._datagrams.sendto(hello)
+            self.bytes_sent += len(hello)
+            try:
+                await asyncio.wait_for(asyncio.shield(self._udp_confirmed), min(0.1, NET_UDP_TIMEOUT))
+                return True
+            except asyncio.TimeoutError:
+                pass
+        self._datagrams.close()
+        self._datagrams = None
+        return False
+
+    def on_datagram(self, data):
+        """
+        Handle one UDP datagram from the server.
+        """
+        self.bytes_received += len(data)
+        kind = proto.message_type(data)
+        if kind == proto.MSG_SNAPSHOT:
+            self._on_snapshot(data)
+        elif kind == proto.MSG_UDP_HELLO and self._udp_confirmed is not None and not self._udp_confirmed.done():
+            self._udp_confirmed.set_result(True)
+
+    async def _read_tcp(self):
+        try:
+            while True:
+                data = await proto.read_message(self._reader, proto.MAX_SNAPSHOT)
+                self.bytes_received += len(data) + proto.FRAMING.size
+                if proto.message_type(data) == proto.MSG_SNAPSHOT:
+                    self._on_snapshot(data)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.connected = False
+
+    def _on_snapshot(self, data):
+        if len(data) < proto.SNAPSHOT.size:
+            return
+        _, tick, baseline, echo = proto.SNAPSHOT.unpack_from(data)
+        # Datagrams can arrive late or out of order; only newer state counts
+        if self.state is not None and tick <= self.state.tick:
+            return
+        if baseline == proto.NO_BASELINE:
+            base = None
+        elif baseline in self._frames:
+            base = self._frames[baseline]
+        else:
+            self.undecodable += 1
+            return
+        try:
+            frame = proto.decode_delta(data, proto.SNAPSHOT.size, base)
+        except ValueError as e:
+            logger.warning('Dropped snapshot %s: %s', tick, e)
+            self.undecodable += 1
+            return
+        self._frames[tick] = frame
+        while len(self._frames) > NET_SNAPSHOT_HISTORY:
+            self._frames.popitem(last=False)
+        self.state = proto.NetState(tick, frame, self.quantum)
+        self.snapshots += 1
+        if self.first_tick is None:
+            self.first_tick = tick
+        if echo:
+            self.rtts.append(time.perf_counter() - echo)
+
+    def send_input(self):
+        """
+        Send the held keys, with the newest snapshot tick as acknowledgement.
+        """
+        self._sequence += 1
+        ack = self.state.tick if self.state is not None else proto.NO_BASELINE
+        message = proto.INPUT.pack(proto.MSG_INPUT, self.token, self._sequence, ack,
+                                   encode_keys(self.input_source()), time.perf_counter())
+        if self.transport == 'udp':
+            self._datagrams.sendto(message)
+            self.bytes_sent += len(message)
+        else:
+            self._send_tcp(message)
+
+    def _send_tcp(self, message):
+        self.bytes_sent += proto.write_message(self._writer, message)
+
+    async def run(self, ticks=None, view=None):
+        """
+        Send input once per simulation tick until disconnected or `ticks` have passed.
+        :param view: ClientView to draw each tick's newest state with, or None.
+        """
+        loop = asyncio.get_running_loop()
+        tick_time = 1.0 / self.sim_rate
+        next_tick = loop.time()
+        done = 0
+        while self.connected and (ticks is None or done < ticks):
+            if view is not None and not view.draw(self.state):
+                break
+            self.send_input()
+            done += 1
+            next_tick = max(next_tick + tick_time, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._datagrams is not None:
+            self._datagrams.close()
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.connected = False
+
+    def metrics(self):
+        """
+        Return traffic per server tick, snapshot loss and round-trip times.
+        """
+        elapsed = time.perf_counter() - self._started
+        ticks = max(1, round(elapsed * self.sim_rate))
+        expected = 0
+        if self.state is not None and self.snapshot_interval:
+            expected = (self.state.tick - self.first_tick) // self.snapshot_interval + 1
+        rtts = sorted(self.rtts)
+        return {
+            'slot': self.slot,
+            'transport': self.transport,
+            'down_bytes_per_tick': self.bytes_received / ticks,
+            'up_bytes_per_tick': self.bytes_sent / ticks,
+            'snapshots': self.snapshots,
+            'snapshots_lost': max(0, expected - self.snapshots),
+            'undecodable': self.undecodable,
+            'rtt_ms_median': rtts[len(rtts) // 2] * 1000 if rtts else None,
+            'rtt_ms_max': rtts[-1] * 1000 if rtts else None,
+        }
+
+
+class ClientView:
+    """
+    Draws NetStates in a window: walls from a TileGrid kept in step with the
+    snapshots (so the WallLayer cache works as in the local game), then
+    tanks, bullets and the HUD.
+    """
+    def __init__(self, client, screen=None):
+        """
+        :param client: Connected GameClient (for the grid shape and slot).
+        :param screen: Surface to draw on; None opens a window.
+        """
+        self.window = screen is None
+        if self.window:
+            pygame.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption(f"Iron Blitz - player {client.slot + 1}")
+        self.screen = screen
+        self.client = client
+        cols, rows, tile = client.grid_shape
+        self.walls = TileGrid(cols, rows, tile)
+        self.wall_layer = WallLayer(self.walls)
+        self.hud = Hud()
+
+    def _sync_walls(self, state):
+        walls = self.walls
+        if walls.kinds == state.kinds and walls.health == state.health:
+            return
+        for index, (kind, health) in enumerate(zip(state.kinds, state.health)):
+            if walls.kinds[index] != kind or walls.health[index] != health:
+                walls.set_cell(index, kind, health)
+
+    def draw(self, state):
+        """
+        Draw a state and push it to the display.
+        :return: False once the window was closed.
+        """
+        if self.window:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+        screen = self.screen
+        if state is None:
+            screen.fill((0, 0, 0))
+            render_text(screen, 'Waiting for the server...', (SCREEN_WIDTH // 2 - 140, SCREEN_HEIGHT // 2), font_size=28)
+        else:
+            self._sync_walls(state)
+            self.wall_layer.take_dirty()
+            screen.blit(self.wall_layer.surface, (0, 0))
+            draw = pygame.draw.rect
+            for slot, (x, y, lives, _) in enumerate(state.players):
+                if lives > 0:
+                    draw(screen, PLAYER_COLORS[slot % len(PLAYER_COLORS)], (x, y, PLAYER_SIZE, PLAYER_SIZE))
+            for x, y in state.enemies:
+                draw(screen, ENEMY_COLOR, (x, y, ENEMY_SIZE, ENEMY_SIZE))
+            for x, y, owner in state.bullets:
+                draw(screen, BULLET_COLORS.get(owner, (255, 255, 255)), (x, y, BULLET_SIZE, BULLET_SIZE))
+            lives = state.players[self.client.slot][2] if self.client.slot < len(state.players) else 0
+            self.hud.render(screen, state.score, lives)
+            if state.state == 'VICTORY':
+                render_text(screen, f"Victory! Stage {state.level + 1} Complete", (SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT // 2), font_size=36, color=(0, 255, 0))
+            elif state.state == 'CAMPAIGN_COMPLETE':
+                render_text(screen, f"Campaign Complete! Final Score: {state.score}", (SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2), font_size=36, color=(255, 215, 0))
+        if self.window:
+            pygame.display.flip()
+        return True
+
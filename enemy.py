@@ -1,90 +1,257 @@
 """
-enemy.py: Defines the Enemy class with simple random movement and anti-stuck logic.
+enemy.py: Defines the EnemyFleet, which stores and updates every enemy tank as parallel arrays.
+
+Tanks hunt the player along a shared flow field, fall back to random
+wandering when stuck, and shoot downwards on a random cooldown.
 """
 
+import logging
+from array import array
+
 import pygame
 import random
 import training_game.settings as settings
-from training_game.enemy_bullet import EnemyBullet
+from training_game.projectiles import OWNER_ENEMY
 from training_game import logger
-random.seed(settings.RANDOM_SEED)
-
-
-class Enemy:
-    """Represents an enemy tank with simple random movement and shooting."""
-
-    def __init__(self, x, y, speed=None):
-        self.rect = pygame.Rect(x, y, 40, 40)  # Enemy size is 40x40
-        self.direction = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-        self.stuck_counter = 0
-        self.bullets = []
-        self.shoot_cooldown = random.randint(60, 120)  # Random cooldown in frames
-        # per-enemy movement speed
-        self.speed = speed if speed is not None else settings.ENEMY_BASE_SPEED
-
-    def update(self, walls):
-        """Update movement, handle collisions, shooting, and update bullets.
-
-        :param walls: List of Wall objects for collision checks.
-        """
-        # Move the enemy
-        self.rect.x += int(self.direction[0] * self.speed)
-        self.rect.y += int(self.direction[1] * self.speed)
-
-        # Check for collisions with walls
-        for wall in walls:
-            if self.rect.colliderect(wall.rect):
-                # undo movement
-                self.rect.x -= int(self.direction[0] * self.speed)
-                self.rect.y -= int(self.direction[1] * self.speed)
-                self.stuck_counter += 1
-                break
-        else:
-            self.stuck_counter = 0
 
-        # Change direction if stuck for too long
-        if self.stuck_counter > 30:
-            self.direction = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-            self.stuck_counter = 0
+ENEMY_SIZE = 40  # Enemies are 40x40
+ENEMY_COLOR = (255, 0, 0)  # Red enemy
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+COOLDOWNS = range(60, 121)  # Random cooldown in frames between shots
+ROLL_BATCH = 256  # Random rolls drawn per refill
 
-        # Clamp to screen bounds
-        self.rect.x = max(0, min(settings.SCREEN_WIDTH - self.rect.width, self.rect.x))
-        self.rect.y = max(0, min(settings.SCREEN_HEIGHT - self.rect.height, self.rect.y))
 
-        # Handle shooting
-        if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+class EnemyFleet:
+    """
+    Holds all enemy tanks as parallel arrays (position, direction, speed,
+    stuck counter, cooldown) and advances the whole fleet with one Python
+    loop per tick, one iteration per tank. This is a batched loop, not
+    vector math: the move, clamp and cooldown arithmetic is still done a
+    tank at a time. What is batched is the random rolls. Direction and
+    cooldown rolls are drawn ROLL_BATCH at a time from the fleet's own RNG
+    and used as needed, so a game with the same seed and input plays out
+    the same way. A tank is a slot index into the arrays.
+    """
+    def __init__(self, projectiles, rng=None):
+        """
+        Initialize an empty fleet.
+        :param projectiles: Shared ProjectileSystem that fired bullets are added to.
+        :param rng: random.Random to draw rolls from (defaults to one seeded with RANDOM_SEED).
+        """
+        self.projectiles = projectiles
+        self.rng = rng if rng is not None else random.Random(settings.RANDOM_SEED)
+        self.x = array('i')
+        self.y = array('i')
+        self.px = array('i')  # Position at the start of the current tick
+        self.py = array('i')
+        self.dir_x = array('b')
+        self.dir_y = array('b')
+        self.speed = array('d')
+        self.stuck = array('i')
+        self.wander = array('i')  # Ticks of random wandering left before steering resumes
+        self.cooldown = array('i')
+        self.last_dx = array('i')  # Movement applied this tick, so other tanks can block it
+        self.last_dy = array('i')
+        self.alive = bytearray()
+        self.count = 0
+        self._direction_rolls = []
+        self._cooldown_rolls = []
+
+    def _arrays(self):
+        return (self.x, self.y, self.px, self.py, self.dir_x, self.dir_y, self.speed, self.stuck,
+                self.wander, self.cooldown, self.last_dx, self.last_dy, self.alive)
+
+    def _roll_direction(self):
+        if not self._direction_rolls:
+            self._direction_rolls = self.rng.choices(DIRECTIONS, k=ROLL_BATCH)
+        return self._direction_rolls.pop()
+
+    def _roll_cooldown(self):
+        if not self._cooldown_rolls:
+            self._cooldown_rolls = self.rng.choices(COOLDOWNS, k=ROLL_BATCH)
+        return self._cooldown_rolls.pop()
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, speed=None):
+        """
+        Add a tank.
+        :param x: Initial x-coordinate.
+        :param y: Initial y-coordinate.
+        :param speed: Movement speed in pixels per tick (defaults to ENEMY_BASE_SPEED).
+        :return: Slot index of the new tank.
+        """
+        dx, dy = self._roll_direction()
+        values = (x, y, x, y, dx, dy, speed if speed is not None else settings.ENEMY_BASE_SPEED,
+                  0, 0, self._roll_cooldown(), 0, 0, 1)
+        index = self.count
+        if index < len(self.alive):
+            # Reuse a slot freed by compact()
+            for arr, value in zip(self._arrays(), values):
+                arr[index] = value
         else:
-            # simple downwards shot
-            bullet = EnemyBullet(self.rect.centerx, self.rect.centery, (0, 1))
-            self.bullets.append(bullet)
-            logger.info("Enemy at %s fired a bullet.", self.rect.topleft)
-            self.shoot_cooldown = random.randint(60, 120)
-
-        # Update bullets and collect walls to remove
-        walls_to_remove = []
-        for bullet in self.bullets[:]:
-            result = bullet.update(walls)
-            # result may be a bool or (bool, wall)
-            should_remove = result[0] if isinstance(result, tuple) else result
-            wall_to_remove = result[1] if isinstance(result, tuple) and len(result) > 1 else None
-
-            if wall_to_remove and wall_to_remove not in walls_to_remove:
-                walls_to_remove.append(wall_to_remove)
-
-            if should_remove or bullet.is_off_screen():
-                logger.debug("Bullet at %s removed.", bullet.rect.topleft)
-                try:
-                    self.bullets.remove(bullet)
-                except ValueError:
-                    pass
-
-        # Remove destroyed walls
-        for wall in walls_to_remove:
-            if wall in walls:
-                walls.remove(wall)
-
-    def render(self, surface):
-        pygame.draw.rect(surface, (255, 0, 0), self.rect)  # Red enemy
-        for bullet in self.bullets:
-            bullet.render(surface)
\ No newline at end of file
+            for arr, value in zip(self._arrays(), values):
+                arr.append(value)
+        self.count = index + 1
+        return index
+
+    def rect(self, index):
+        """
+        Return the pygame.Rect of a tank.
+        """
+        return pygame.Rect(self.x[index], self.y[index], ENEMY_SIZE, ENEMY_SIZE)
+
+    def overlaps(self, rect):
+        """
+        Return True if any live tank overlaps rect.
+        """
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        xs, ys, alive = self.x, self.y, self.alive
+        size = ENEMY_SIZE
+        for i in range(self.count):
+            if alive[i] and xs[i] < right and xs[i] + size > left and ys[i] < bottom and ys[i] + size > top:
+                return True
+        return False
+
+    def kill(self, index):
+        """
+        Mark a tank as destroyed. Its slot is reclaimed by the next compact().
+        """
+        self.alive[index] = 0
+
+    def block(self, index):
+        """
+        Undo a tank's movement this tick after it ran into another tank.
+        """
+        self.x[index] -= self.last_dx[index]
+        self.y[index] -= self.last_dy[index]
+        self.last_dx[index] = 0
+        self.last_dy[index] = 0
+        self.stuck[index] += 1
+
+    def update(self, walls, flow_field=None):
+        """
+        Advance every tank, one loop iteration per slot: steer, move, undo on
+        wall collision, re-roll direction when stuck, clamp to the screen and
+        shoot.
+        :param walls: TileGrid of the level walls.
+        :param flow_field: Shared FlowField toward the player; without it tanks wander.
+        """
+        xs, ys, pxs, pys = self.x, self.y, self.px, self.py
+        dir_x, dir_y, speeds = self.dir_x, self.dir_y, self.speed
+        stuck, wander, cooldown = self.stuck, self.wander, self.cooldown
+        last_dx, last_dy, alive = self.last_dx, self.last_dy, self.alive
+        collide = walls.collide
+        tile = walls.tile_size
+        size = ENEMY_SIZE
+        half = size // 2
+        max_x = settings.SCREEN_WIDTH - size
+        max_y = settings.SCREEN_HEIGHT - size
+        spawn_bullet = self.projectiles.spawn
+        log_shots = logger.isEnabledFor(logging.INFO)
+        for i in range(self.count):
+            if not alive[i]:
+                continue
+            x = xs[i]
+            y = ys[i]
+            pxs[i] = x
+            pys[i] = y
+
+            # Steer along the flow field from the tile under the tank's centre.
+            # Before turning onto a new axis, line up with the tile row/column
+            # (without overshooting) so the tank fits through one-tile gaps.
+            limit = None
+            if wander[i] > 0:
+                wander[i] -= 1
+            elif flow_field is not None:
+                col = (x + half) // tile
+                row = (y + half) // tile
+                step = flow_field.direction_at(col, row)
+                if step is not None:
+                    tile_x = col * tile
+                    tile_y = row * tile
+                    if step[0] != 0 and y != tile_y:
+                        dir_x[i], dir_y[i] = 0, (1 if tile_y > y else -1)
+                        limit = abs(tile_y - y)
+                    elif step[1] != 0 and x != tile_x:
+                        dir_x[i], dir_y[i] = (1 if tile_x > x else -1), 0
+                        limit = abs(tile_x - x)
+                    else:
+                        dir_x[i], dir_y[i] = step
+
+            # Move, undoing the move on wall collision
+            dx = int(dir_x[i] * speeds[i])
+            dy = int(dir_y[i] * speeds[i])
+            if limit is not None:
+                dx = max(-limit, min(limit, dx))
+                dy = max(-limit, min(limit, dy))
+            if collide((x + dx, y + dy, size, size)) is not None:
+                last_dx[i] = 0
+                last_dy[i] = 0
+                stuck[i] += 1
+            else:
+                x += dx
+                y += dy
+                last_dx[i] = dx
+                last_dy[i] = dy
+                stuck[i] = 0
+
+            # Change direction if stuck for too long
+            if stuck[i] > 30:
+                dir_x[i], dir_y[i] = self._roll_direction()
+                stuck[i] = 0
+                wander[i] = settings.ENEMY_WANDER_TICKS
+
+            # Clamp to screen bounds
+            xs[i] = max(0, min(max_x, x))
+            ys[i] = max(0, min(max_y, y))
+
+            # Handle shooting
+            if cooldown[i] > 0:
+                cooldown[i] -= 1
+            else:
+                # simple downwards shot
+                spawn_bullet(xs[i] + half, ys[i] + half, (0, 1), OWNER_ENEMY)
+                if log_shots:
+                    logger.info("Enemy at %s fired a bullet.", (xs[i], ys[i]))
+                cooldown[i] = self._roll_cooldown()
+
+    def compact(self):
+        """
+        Drop destroyed tanks by moving live slots down, in one loop over the
+        slots. The freed slots at the end stay allocated for reuse.
+        """
+        arrays = self._arrays()
+        alive = self.alive
+        write = 0
+        for read in range(self.count):
+            if alive[read]:
+                if write != read:
+                    for arr in arrays:
+                        arr[write] = arr[read]
+                write += 1
+        self.count = write
+
+    def clear(self):
+        """
+        Remove all tanks, keeping the slots allocated.
+        """
+        self.count = 0
+
+    def render(self, surface, alpha=1.0):
+        """
+        Draw every tank between its previous and current position.
+        :param surface: The surface to draw on.
+        :param alpha: Interpolation factor, 0.0 = previous tick, 1.0 = current.
+        :return: List of the screen areas that were drawn.
+        """
+        xs, ys, pxs, pys, alive = self.x, self.y, self.px, self.py, self.alive
+        size = ENEMY_SIZE
+        draw = pygame.draw.rect
+        if alpha >= 1.0:
+            return [draw(surface, ENEMY_COLOR, (xs[i], ys[i], size, size))
+                    for i in range(self.count) if alive[i]]
+        return [draw(surface, ENEMY_COLOR,
+                     (round(pxs[i] + (xs[i] - pxs[i]) * alpha), round(pys[i] + (ys[i] - pys[i]) * alpha), size, size))
+                for i in range(self.count) if alive[i]]
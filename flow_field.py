@@ -0,0 +1,159 @@
+"""
+flow_field.py: Defines the FlowField class, a shared distance-to-player map used to steer enemies.
+"""
+
+import heapq
+from array import array
+
+from training_game.tile_grid import EMPTY
+
+UNREACHABLE = 1 << 30
+
+
+class FlowField:
+    """
+    Breadth-first distance (in tiles) from every open tile to the target tile,
+    computed over a TileGrid and shared by all enemies. Each tank only reads
+    its tile's neighbours, so steering N tanks costs no pathfinding per tank.
+
+    The field is updated incrementally: opening a tile (a wall destroyed) or
+    moving the target only touches tiles whose distance actually changes.
+    """
+    def __init__(self, walls):
+        """
+        Create an empty field and subscribe to wall changes.
+        :param walls: TileGrid of the level walls.
+        """
+        self.walls = walls
+        self.cols = walls.cols
+        self.rows = walls.rows
+        self.dist = array('i', [UNREACHABLE]) * (self.cols * self.rows)
+        self.target = None
+        walls.listeners.append(self.on_cell_changed)
+
+    def detach(self):
+        """
+        Stop listening to the grid (called when the level is replaced).
+        """
+        if self.on_cell_changed in self.walls.listeners:
+            self.walls.listeners.remove(self.on_cell_changed)
+
+    def _neighbours(self, index):
+        cols = self.cols
+        col = index % cols
+        if col > 0:
+            yield index - 1
+        if col < cols - 1:
+            yield index + 1
+        if index >= cols:
+            yield index - cols
+        if index + cols < len(self.dist):
+            yield index + cols
+
+    def _open(self, index):
+        return self.walls.kinds[index] == EMPTY
+
+    def set_target(self, col, row):
+        """
+        Point the field at a new target tile. The first call builds the field;
+        later calls repair it incrementally.
+        """
+        col = max(0, min(self.cols - 1, col))
+        row = max(0, min(self.rows - 1, row))
+        index = row * self.cols + col
+        old = self.target
+        if index == old:
+            return
+        self.target = index
+        if old is None:
+            self.dist[index] = 0
+            self._lower([index])
+            return
+        # Add the new source first, then withdraw support from the old one
+        if self.dist[index] != 0:
+            self.dist[index] = 0
+            self._lower([index])
+        self._raise([old])
+
+    def on_cell_changed(self, index):
+        """
+        TileGrid listener: when a wall is destroyed its tile becomes open and
+        distances can only shrink around it.
+        """
+        if not self._open(index) or self.target is None:
+            return
+        dist = self.dist
+        best = min((dist[n] for n in self._neighbours(index) if self._open(n)), default=UNREACHABLE)
+        if best < UNREACHABLE and best + 1 < dist[index]:
+            dist[index] = best + 1
+            self._lower([index])
+
+    def _lower(self, seeds):
+        """
+        Propagate decreased distances outward from seed tiles.
+        """
+        dist = self.dist
+        heap = [(dist[i], i) for i in seeds]
+        heapq.heapify(heap)
+        while heap:
+            d, index = heapq.heappop(heap)
+            if d != dist[index]:
+                continue
+            for n in self._neighbours(index):
+                if d + 1 < dist[n] and self._open(n):
+                    dist[n] = d + 1
+                    heapq.heappush(heap, (d + 1, n))
+
+    def _raise(self, seeds):
+        """
+        Repair distances after the seed tiles lost their support (e.g. stopped
+        being the target). Tiles still supported by a neighbour one step
+        closer keep their value; the rest are reset and re-seeded from the
+        boundary of the affected region.
+        """
+        dist = self.dist
+        target = self.target
+        heap = [(dist[i], i) for i in seeds]
+        heapq.heapify(heap)
+        affected = set()
+        while heap:
+            d, index = heapq.heappop(heap)
+            if index in affected or index == target or d != dist[index]:
+                continue
+            supported = any(dist[n] == d - 1 and n not in affected and self._open(n)
+                            for n in self._neighbours(index))
+            if supported:
+                continue
+            affected.add(index)
+            for n in self._neighbours(index):
+                if dist[n] == d + 1 and n not in affected:
+                    heapq.heappush(heap, (d + 1, n))
+
+        for index in affected:
+            dist[index] = UNREACHABLE
+        seeds = []
+        for index in affected:
+            best = min((dist[n] for n in self._neighbours(index) if n not in affected and self._open(n)),
+                       default=UNREACHABLE)
+            if best < UNREACHABLE:
+                dist[index] = best + 1
+                seeds.append(index)
+        self._lower(seeds)
+
+    def direction_at(self, col, row):
+        """
+        Return the step (dx, dy) toward the target from a tile, or None when
+        the tile is the target or cannot reach it.
+        """
+        col = max(0, min(self.cols - 1, col))
+        row = max(0, min(self.rows - 1, row))
+        index = row * self.cols + col
+        dist = self.dist
+        best = dist[index]
+        step = None
+        cols = self.cols
+        for n in self._neighbours(index):
+            if dist[n] < best and self._open(n):
+                best = dist[n]
+                step = ((n % cols) - col, (n // cols) - row)
+        return step
@@ -0,0 +1,141 @@
+"""
+free_space.py: Defines the FreeSpace class, a precomputed index of open tiles used to place spawns.
+"""
+
+from array import array
+from collections import deque
+
+from training_game.tile_grid import EMPTY
+
+NO_REGION = -1
+
+
+class FreeSpace:
+    """
+    Per-tile clearance and connectivity of a level, computed once per
+    compiled level so that spawn placement is a lookup instead of a search
+    that tests candidate rects against the walls.
+
+    `clearance[i]` is the side, in tiles, of the largest open square whose
+    top-left tile is i (0 on walls), so a tank of n x n tiles fits at tile i
+    when clearance[i] >= n. `region[i]` numbers the 4-connected open area
+    containing tile i, or is NO_REGION on walls; two tiles can reach each
+    other only if they share a region.
+    """
+    def __init__(self, cols, rows, kinds):
+        """
+        Build the index.
+        :param cols: Number of tile columns.
+        :param rows: Number of tile rows.
+        :param kinds: Tile kinds, row-major (bytes or bytearray of EMPTY, SOLID, DESTRUCTIBLE).
+        """
+        self.cols = cols
+        self.rows = rows
+        self.clearance = self._clearance(cols, rows, kinds)
+        self.region = self._regions(cols, rows, kinds)
+
+    @staticmethod
+    def _clearance(cols, rows, kinds):
+        # Largest open square growing right and down, filled from the bottom-right corner
+        clearance = array('H', bytes(2 * cols * rows))
+        for row in range(rows - 1, -1, -1):
+            base = row * cols
+            for col in range(cols - 1, -1, -1):
+                index = base + col
+                if kinds[index] != EMPTY:
+                    continue
+                if row == rows - 1 or col == cols - 1:
+                    clearance[index] = 1
+                else:
+                    clearance[index] = 1 + min(clearance[index + 1], clearance[index + cols],
+                                               clearance[index + cols + 1])
+        return clearance
+
+    @staticmethod
+    def _regions(cols, rows, kinds):
+        region = array('i', [NO_REGION]) * (cols * rows)
+        label = 0
+        for start in range(cols * rows):
+            if kinds[start] != EMPTY or region[start] != NO_REGION:
+                continue
+            region[start] = label
+            queue = deque((start,))
+            while queue:
+                index = queue.popleft()
+                col = index % cols
+                for n, ok in ((index - 1, col > 0), (index + 1, col < cols - 1),
+                              (index - cols, index >= cols), (index + cols, index + cols < cols * rows)):
+                    if ok and kinds[n] == EMPTY and region[n] == NO_REGION:
+                        region[n] = label
+                        queue.append(n)
+            label += 1
+        return region
+
+    def fits(self, col, row, size=1):
+        """
+        Return True if a square of size x size tiles fits with its top-left at (col, row).
+        """
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.clearance[row * self.cols + col] >= size
+        return False
+
+    def nearest(self, col, row, size=1):
+        """
+        Return the tile nearest to (col, row) where a size x size square fits,
+        or None if it fits nowhere. Ties go to the lowest tile index.
+        """
+        if self.fits(col, row, size):
+            return col, row
+        cols = self.cols
+        best = None
+        best_dist = None
+        for index, clear in enumerate(self.clearance):
+            if clear < size:
+                continue
+            dc = index % cols - col
+            dr = index // cols - row
+            dist = dc * dc + dr * dr
+            if best_dist is None or dist < best_dist:
+                best = index
+                best_dist = dist
+        return None if best is None else (best % cols, best // cols)
+
+    def spread(self, count, origin, size=1, candidates=None):
+        """
+        Pick `count` tiles reachable from `origin` and spread out by
+        farthest-point sampling: each pick is the tile farthest from the
+        origin and from every earlier pick.
+        :param count: Number of tiles to pick.
+        :param origin: (col, row) tile the picks must be reachable from (e.g. the player spawn).
+        :param size: Side in tiles of the square that must fit at each pick.
+        :param candidates: Optional (col, row) tiles to choose from instead of
+            every fitting tile; unreachable or blocked ones are skipped.
+        :return: List of (col, row). Tiles repeat only when there are fewer
+            candidates than `count`; the list is empty if none exist.
+        """
+        cols = self.cols
+        region = self.region[origin[1] * cols + origin[0]]
+        if region == NO_REGION:
+            return []
+        if candidates is None:
+            pool = [i for i, clear in enumerate(self.clearance)
+                    if clear >= size and self.region[i] == region]
+        else:
+            pool = [row * cols + col for col, row in candidates
+                    if self.fits(col, row, size) and self.region[row * cols + col] == region]
+        if not pool:
+            return []
+
+        oc, orow = origin
+        nearest = [(i % cols - oc) ** 2 + (i // cols - orow) ** 2 for i in pool]
+        picks = []
+        for _ in range(count):
+            best = max(range(len(pool)), key=nearest.__getitem__)
+            pick = pool[best]
+            pc, pr = pick % cols, pick // cols
+            picks.append((pc, pr))
+            for k, i in enumerate(pool):
+                d = (i % cols - pc) ** 2 + (i // cols - pr) ** 2
+                if d < nearest[k]:
+                    nearest[k] = d
+        return picks
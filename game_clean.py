@@ -4,103 +4,238 @@ This module contains the actual Game class. `game.py` is a tiny shim that
 imports Game from here so we can safely recover and keep history.
 """
 
+import os
+import random
+import time
+from pathlib import Path
+
 import pygame
 from training_game.settings import (
     SCREEN_WIDTH,
     SCREEN_HEIGHT,
     FPS,
-    COLOR_BLACK,
+    SIM_RATE,
+    MAX_CATCHUP_TICKS,
     LEVEL_TRANSITION_TIME,
     LEVELS,
+    MAX_DIRTY_RECTS,
+    MAX_ALIVE_ENEMIES,
+    WAVE_INTERVAL,
+    SPAWNS_PER_TICK,
+    SPAWN_POINTS,
+    PROFILE_OVERLAY_POS,
+    RANDOM_SEED,
+    CHECKPOINT_PATH,
+    MAX_PLAYERS,
+    PLAYER_COLORS,
 )
 from training_game.player import Player
-from training_game.enemy import Enemy
-from training_game.level import load_level
+from training_game.enemy import EnemyFleet, ENEMY_SIZE
+from training_game.level import load_level, get_level, SPAWN_PLAYER, SPAWN_ENEMY
+from training_game.spatial_hash import SpatialHash
+from training_game.projectiles import ProjectileSystem, OWNER_PLAYER
+from training_game.wall_layer import WallLayer
+from training_game.flow_field import FlowField
+from training_game.spawn_scheduler import SpawnScheduler
+from training_game.input_source import NO_KEYS
 from training_game.utils import render_text
 from training_game import logger
-from training_game.hall_of_fame import add_entry, get_top
+from training_game.score_writer import ScoreWriter
+from training_game.leaderboard import Leaderboard
+from training_game.hud import Hud
+from training_game.profiler import FrameProfiler
+from training_game import snapshot
+from training_game.state_hash import StateHash
+
+DEFAULT_CHECKPOINT_PATH = Path(CHECKPOINT_PATH or Path(__file__).resolve().parent / "checkpoint.ibs")
 
 
 class Game:
-    def __init__(self) -> None:
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Iron Blitz (MVP)")
+    def __init__(self, headless: bool = False, input_source=None, sim_rate: int = SIM_RATE,
+                 profile_export=None, seed: int = RANDOM_SEED, checkpoint_path=None) -> None:
+        """
+        :param headless: Run without a window. The screen is an off-screen
+            Surface, nothing is pushed to a display, and the game is driven
+            through step() instead of run().
+        :param input_source: Callable returning the current key state, in
+            the form of pygame.key.get_pressed(). Defaults to the keyboard,
+            or to no keys held when headless.
+        :param sim_rate: Fixed simulation ticks per second used by run().
+        :param profile_export: Path (.csv or .json) to write frame timing
+            stats to when run() exits; None to skip.
+        :param seed: Seed of the game's RNG. The same seed, start level and
+            per-tick input always produce the same game (see replay.py).
+        :param checkpoint_path: File a snapshot is written to each time the
+            game advances to the next level, for resuming after a crash;
+            None to skip.
+        """
+        self.headless = headless
+        self.sim_rate = sim_rate
+        if headless:
+            # No display: only fonts are needed to render into the off-screen surface
+            pygame.font.init()
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Iron Blitz (MVP)")
         self.clock = pygame.time.Clock()
+        if input_source is None:
+            input_source = (lambda: NO_KEYS) if headless else pygame.key.get_pressed
+        self.input_source = input_source
+        # Gets every tick's input and key press when set (see replay.InputRecorder)
+        self.recorder = None
+        # Off for replays, so replaying a session does not add its score again
+        self.save_scores = True
+        self.seed = seed
+        # All game randomness comes from here, never from the random module's global state
+        self.rng = random.Random(seed)
 
         self.running = True
         self.state = "RUN"
+        # Simulation ticks run so far (one per update() call)
+        self.tick = 0
+        # Fraction of a tick elapsed since the last update, used to interpolate rendering
+        self.alpha = 1.0
+        # Per-phase frame timings; F3 shows them on screen
+        self.profiler = FrameProfiler()
+        self.profile_export = profile_export
+        self.checkpoint_path = checkpoint_path
+        # 64-bit fingerprint of the state after each tick; see enable_state_hash()
+        self.hasher = None
+        # Set once restore() replaced the state, so it no longer follows from seed and input alone
+        self.restored = False
+        self.state_hash = None
+        self.show_profile = False
+        self.flip_time = 0.0
 
         self.current_level_index = 0
         self.level_transition_timer = 0.0
 
         self.walls = []
+        self.wall_layer = None
+        # Distance-to-player field shared by all enemies
+        self.flow_field = None
+        # Screen areas drawn last frame, restored from the wall layer next frame
+        self.drawn_rects = []
+        self.full_redraw = True
+        # Score and lives, re-rendered only when they change
+        self.hud = Hud()
+        # Player tanks; players[0] is self.player, a co-op partner is added with add_player()
+        self.players = []
         self.player = None
-        self.enemies = []
+        # All bullets in flight, player and enemy alike
+        self.projectiles = ProjectileSystem()
+        # All enemy tanks, updated as one batch; destroyed slots are reused on respawn
+        self.enemies = EnemyFleet(self.projectiles, self.rng)
+        # Releases the current level's enemies in waves
+        self.spawner = None
+        # Broadphase for tanks and bullets, rebuilt every frame
+        self.spatial_hash = SpatialHash()
 
         self.score = 0
         self.start_level(self.current_level_index)
         # Name entry state for Hall of Fame
         self.name_buffer = ""
+        # Pre-rendered top scores, rebuilt only when the entries change
+        self.leaderboard = Leaderboard()
+        # Scores are saved off the game thread; the callback only sets flags
+        self.score_writer = ScoreWriter(on_saved=self._on_scores_saved)
+        self.save_status = ''
+        self.scores_changed = False
 
     def start_level(self, index: int) -> None:
         walls, enemy_count, enemy_speed = load_level(index)
         self.walls = walls
+        if self.wall_layer is not None:
+            self.wall_layer.detach()
+            self.flow_field.detach()
+        self.wall_layer = WallLayer(walls)
+        self.flow_field = FlowField(walls)
+        if self.hasher is not None:
+            self.hasher.attach(walls)
+        self.full_redraw = True
 
-        preferred_x = SCREEN_WIDTH // 2
-        preferred_y = SCREEN_HEIGHT - 100
-        player_w, player_h = 40, 40
-
-        def collides(x: int, y: int) -> bool:
-            r = pygame.Rect(x, y, player_w, player_h)
-            return any(r.colliderect(w.rect) for w in self.walls)
-
-        sx, sy = preferred_x, preferred_y
-        if collides(sx, sy):
-            found = False
-            step = 40
-            for dy in range(0, SCREEN_HEIGHT, step):
-                if found:
-                    break
-                for dx in range(0, SCREEN_WIDTH, step):
-                    for ox, oy in ((0, -dy), (dx, -dy), (-dx, -dy)):
-                        nx = preferred_x + ox
-                        ny = preferred_y + oy
-                        nx = max(0, min(SCREEN_WIDTH - player_w, nx))
-                        ny = max(0, min(SCREEN_HEIGHT - player_h, ny))
-                        if not collides(nx, ny):
-                            sx, sy = nx, ny
-                            found = True
-                            break
-                    if found:
-                        break
+        # Spawns are looked up in the level's precomputed free-space index:
+        # the player goes to the level's 'P' tile (or the bottom centre) or
+        # the nearest tile it fits on. Enemy spawn points are the level's 'E'
+        # tiles reachable from there, or else tiles spread out over the
+        # reachable area, and the scheduler releases enemies at them in waves.
+        level = get_level(index)
+        free = level.free_space()
+        tile = walls.tile_size
+        tank_tiles = -(-ENEMY_SIZE // tile)
+        player_spawns = level.spawn_points(SPAWN_PLAYER)
+        if player_spawns:
+            preferred = player_spawns[0]
+        else:
+            preferred = ((SCREEN_WIDTH // 2) // tile, (SCREEN_HEIGHT - 100) // tile)
+        spawn_tile = free.nearest(preferred[0], preferred[1], tank_tiles) or preferred
+        sx, sy = spawn_tile[0] * tile, spawn_tile[1] * tile
 
+        self.projectiles.clear()
         if self.player is None:
-            self.player = Player(sx, sy)
+            self.player = Player(sx, sy, self.projectiles, PLAYER_COLORS[0])
+            self.players.append(self.player)
         else:
-            self.player.rect.x = sx
-            self.player.rect.y = sy
-            self.player.bullets.clear()
+            self.player.place(sx, sy)
+        for slot in range(1, len(self.players)):
+            self.players[slot].place(*self._player_spawn(index, slot))
 
         self.player.score = getattr(self.player, 'score', 0)
 
-        self.enemies = []
-        base_x = 100
-        spacing = 60
-        for i in range(enemy_count):
-            ex = base_x + i * spacing
-            ey = 100
-            rect = pygame.Rect(ex, ey, 40, 40)
-            attempts = 0
-            while attempts < 10 and any(rect.colliderect(w.rect) for w in self.walls):
-                ey += 40
-                rect.y = ey
-                attempts += 1
-            self.enemies.append(Enemy(ex, ey, speed=enemy_speed))
+        self.enemies.clear()
+        enemy_points = level.spawn_points(SPAWN_ENEMY)
+        enemy_tiles = free.spread(len(enemy_points) or SPAWN_POINTS, spawn_tile, tank_tiles,
+                                  candidates=enemy_points or None)
+        self.spawner = SpawnScheduler(
+            sorted(set((col * tile, row * tile) for col, row in enemy_tiles)),
+            enemy_count,
+            waves=level.waves,
+            wave_interval=round((level.wave_interval or WAVE_INTERVAL) * self.sim_rate),
+            max_alive=level.max_alive or MAX_ALIVE_ENEMIES,
+            per_tick=SPAWNS_PER_TICK,
+            speed=enemy_speed,
+        )
 
         self.player.score = self.score
         self.state = 'RUN'
 
+    def _player_spawn(self, index: int, slot: int):
+        """Return the pixel position player `slot` starts level `index` at.
+
+        Players take the level's 'P' tiles in order; without one, player one
+        goes to the bottom centre and partners line up to its right.
+        """
+        level = get_level(index)
+        free = level.free_space()
+        tile = self.walls.tile_size
+        tank_tiles = -(-ENEMY_SIZE // tile)
+        player_spawns = level.spawn_points(SPAWN_PLAYER)
+        if slot < len(player_spawns):
+            preferred = player_spawns[slot]
+        else:
+            base = player_spawns[0] if player_spawns else ((SCREEN_WIDTH // 2) // tile, (SCREEN_HEIGHT - 100) // tile)
+            preferred = (base[0] + slot * (tank_tiles + 1), base[1])
+        col, row = free.nearest(preferred[0], preferred[1], tank_tiles) or preferred
+        return col * tile, row * tile
+
+    def add_player(self) -> Player:
+        """Add a co-op tank at the next player spawn of the current level.
+
+        Partners share the team score (kept on self.player) and the game is
+        over only when every tank is out of lives.
+        :raises ValueError: If MAX_PLAYERS tanks are already in the game.
+        """
+        slot = len(self.players)
+        if slot >= MAX_PLAYERS:
+            raise ValueError(f"At most {MAX_PLAYERS} players")
+        x, y = self._player_spawn(min(self.current_level_index, len(LEVELS) - 1), slot)
+        player = Player(x, y, self.projectiles, PLAYER_COLORS[slot % len(PLAYER_COLORS)])
+        self.players.append(player)
+        self.full_redraw = True
+        return player
+
     def _advance_level(self) -> None:
         self.current_level_index += 1
         if self.current_level_index >= len(LEVELS):
@@ -110,53 +245,149 @@ class Game:
         else:
             self.score = self.player.score
             self.start_level(self.current_level_index)
+            # Saved here rather than in start_level(), which also runs for
+            # restarts, restore() and __init__ (before --resume loads the file)
+            if self.checkpoint_path:
+                self.save_checkpoint()
+
+    def snapshot(self) -> bytes:
+        """Return the complete simulation state as bytes (see snapshot.py).
+
+        Restoring it with restore() and feeding the same input gives the same
+        game, so snapshots serve as save states, rollback points, or the start
+        of a throwaway lookahead in a second headless Game.
+        """
+        return snapshot.capture(self)
+
+    def restore(self, data) -> None:
+        """Return to a state from snapshot(), possibly taken in another Game."""
+        snapshot.restore(self, data)
+        self.restored = True
+        self.alpha = 1.0
+        if self.hasher is not None:
+            self.state_hash = self.hasher.digest(self)
+
+    def enable_state_hash(self) -> int:
+        """Start keeping state_hash, updated at the end of every tick.
+
+        Runs that agree on the hash every tick played out the same way, so
+        comparing hashes between builds or machines pinpoints the first
+        tick where they diverge.
+        :return: The hash of the current state.
+        """
+        if self.hasher is None:
+            self.hasher = StateHash(self.walls)
+        self.state_hash = self.hasher.digest(self)
+        return self.state_hash
+
+    def save_checkpoint(self, path=None) -> None:
+        """Write a snapshot to disk atomically (default: checkpoint_path)."""
+        p = Path(path or self.checkpoint_path or DEFAULT_CHECKPOINT_PATH)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_bytes(self.snapshot())
+        os.replace(tmp, p)
+        logger.info('Checkpoint saved to %s at level %s', p, self.current_level_index + 1)
+
+    def load_checkpoint(self, path=None) -> bool:
+        """Restore the checkpoint file if there is a valid one.
+
+        :return: True if a checkpoint was restored.
+        """
+        p = Path(path or self.checkpoint_path or DEFAULT_CHECKPOINT_PATH)
+        try:
+            self.restore(p.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning('No checkpoint restored from %s: %s', p, e)
+            return False
+        logger.info('Resumed from checkpoint %s at level %s', p, self.current_level_index + 1)
+        return True
 
     def handle_events(self) -> None:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
-                # If entering name after game over, capture text keys first
-                if self.state == 'ENTER_NAME':
-                    if event.key == pygame.K_RETURN:
-                        name = self.name_buffer.strip() or 'Player'
-                        add_entry(name, self.player.score)
-                        logger.info('Saved high score for %s: %s', name, self.player.score)
-                        self.name_buffer = ""
-                        # After saving, show high scores screen briefly
-                        self.state = 'SHOW_HIGHSCORES'
-                    elif event.key == pygame.K_BACKSPACE:
-                        self.name_buffer = self.name_buffer[:-1]
-                    elif event.key == pygame.K_ESCAPE:
-                        # Cancel name entry and restart current level
-                        self.name_buffer = ""
-                        self.start_level(self.current_level_index)
-                        self.state = 'RUN'
-                    elif event.key == pygame.K_r:
-                        # Restart without saving
-                        self.name_buffer = ""
-                        self.start_level(self.current_level_index)
-                        self.state = 'RUN'
-                    else:
-                        # Only accept printable characters
-                        ch = event.unicode
-                        if ch and len(self.name_buffer) < 20 and ch.isprintable():
-                            self.name_buffer += ch
-                else:
-                    if event.key == pygame.K_p:
-                        self.state = 'PAUSE' if self.state == 'RUN' else 'RUN'
-                    elif event.key == pygame.K_r:
-                        # Restart current level
-                        self.start_level(self.current_level_index)
-                    elif event.key == pygame.K_h:
-                        # Show Hall of Fame anytime with H
-                        self.state = 'SHOW_HIGHSCORES'
-
-        keys = pygame.key.get_pressed()
+                self.handle_key(event.key, event.unicode)
+
+    def handle_key(self, key: int, unicode: str = '') -> None:
+        """Handle one key press (pause, restart, name entry, ...).
+
+        Key presses land between ticks; a recorder notes the tick they came
+        before, so a replay can apply them at the same point.
+        :param key: pygame key constant.
+        :param unicode: Text the key produced, used for name entry.
+        """
+        if self.recorder is not None:
+            self.recorder.record_key(self.tick, key, unicode)
+        # If entering name after game over, capture text keys first
+        if self.state == 'ENTER_NAME':
+            if key == pygame.K_RETURN:
+                name = self.name_buffer.strip() or 'Player'
+                if self.save_scores:
+                    # Written on the score writer thread; see _on_scores_saved
+                    self.score_writer.submit(name, self.player.score)
+                    self.save_status = 'Saving...'
+                    logger.info('Queued high score for %s: %s', name, self.player.score)
+                self.name_buffer = ""
+                # After saving, show high scores screen briefly
+                self.show_highscores()
+            elif key == pygame.K_BACKSPACE:
+                self.name_buffer = self.name_buffer[:-1]
+            elif key == pygame.K_ESCAPE:
+                # Cancel name entry and restart current level
+                self.name_buffer = ""
+                self.start_level(self.current_level_index)
+                self.state = 'RUN'
+            elif key == pygame.K_r:
+                # Restart without saving
+                self.name_buffer = ""
+                self.start_level(self.current_level_index)
+                self.state = 'RUN'
+            else:
+                # Only accept printable characters
+                ch = unicode
+                if ch and len(self.name_buffer) < 20 and ch.isprintable():
+                    self.name_buffer += ch
+        else:
+            if key == pygame.K_p:
+                self.state = 'PAUSE' if self.state == 'RUN' else 'RUN'
+            elif key == pygame.K_r:
+                # Restart current level
+                self.start_level(self.current_level_index)
+            elif key == pygame.K_F3:
+                # Toggle the frame timing overlay
+                self.show_profile = not self.show_profile
+                self.full_redraw = True
+            elif key == pygame.K_h:
+                # Show Hall of Fame anytime with H
+                self.save_status = ''
+                self.show_highscores()
+
+    def _on_scores_saved(self, entries) -> None:
+        # Runs on the score writer thread: hand over to the game loop
+        self.save_status = 'Saved'
+        self.scores_changed = True
+
+    def show_highscores(self) -> None:
+        """Switch to the Hall of Fame screen, refreshing the leaderboard once."""
+        self.leaderboard.refresh()
+        self.state = 'SHOW_HIGHSCORES'
+
+    def apply_input(self, keys, slot: int = 0) -> None:
+        """Apply held-key input for one tick.
+
+        :param keys: Key state indexable by pygame key constants.
+        :param slot: Player the input belongs to. Only player one's input
+            moves the game between screens.
+        """
         if self.state == 'RUN':
-            self.player.handle_input(keys, self.walls)
-            if keys[pygame.K_SPACE]:
-                self.player.shoot()
+            player = self.players[slot]
+            if player.lives > 0:
+                player.handle_input(keys, self.walls)
+                if keys[pygame.K_SPACE]:
+                    player.shoot()
+        elif slot:
+            return
         elif self.state == 'VICTORY':
             if keys[pygame.K_n] or keys[pygame.K_RETURN]:
                 self._advance_level()
@@ -166,59 +397,154 @@ class Game:
                 self.start_level(0)
                 self.state = 'RUN'
 
+    def read_input(self):
+        """Read this tick's key state from the input source, recording it if a recorder is attached."""
+        keys = self.input_source()
+        if self.recorder is not None:
+            self.recorder.record_input(keys)
+        return keys
+
+    def step(self, n: int = 1) -> int:
+        """Run n simulation ticks as fast as possible, without events or rendering.
+
+        Input for each tick comes from the input source.
+        :return: Number of ticks actually run (fewer if the game stopped).
+        """
+        done = 0
+        while done < n and self.running:
+            self.apply_input(self.read_input())
+            self.update()
+            done += 1
+        return done
+
     def update(self) -> None:
+        self.tick += 1
         if self.state == 'RUN':
-            self.player.update(self.walls)
-            for e in list(self.enemies):
-                e.update(self.walls)
-
-            for b in list(self.player.bullets):
-                for e in list(self.enemies):
-                    if b.rect.colliderect(e.rect):
-                        if b in self.player.bullets:
-                            self.player.bullets.remove(b)
-                        if e in self.enemies:
-                            self.enemies.remove(e)
-                            self.player.score += 100
-                        break
-
-            for e in list(self.enemies):
-                for b in list(e.bullets):
-                    if b.rect.colliderect(self.player.rect):
-                        self.player.lives -= 1
-                        try:
-                            e.bullets.remove(b)
-                        except ValueError:
-                            pass
-                        break
-
-            if self.player.lives <= 0:
+            clock = time.perf_counter
+            start = clock()
+            players = [p for p in self.players if p.lives > 0] or self.players
+            for player in players:
+                player.update()
+            self.spawner.update(self.enemies, tuple(p.rect for p in players))
+            # Enemies hunt the first tank still in the game
+            target = players[0].rect
+            self.flow_field.set_target(*self.walls.tile_at(target.centerx, target.centery))
+            self.enemies.update(self.walls, self.flow_field)
+            moved = clock()
+            self.projectiles.update(self.walls)
+            shot = clock()
+            self._resolve_collisions()
+            done = clock()
+            profiler = self.profiler
+            profiler.add('movement', moved - start)
+            profiler.add('projectiles', shot - moved)
+            profiler.add('collisions', done - shot)
+
+            if all(p.lives <= 0 for p in self.players):
                 # Prompt for name and add to hall of fame
                 self.state = 'ENTER_NAME'
 
-            if not self.enemies:
+            if self.spawner.exhausted and not self.enemies:
                 self.state = 'VICTORY'
                 self.level_transition_timer = 0.0
 
         elif self.state == 'VICTORY':
-            self.level_transition_timer += 1.0 / FPS
+            self.level_transition_timer += 1.0 / self.sim_rate
             if self.level_transition_timer >= LEVEL_TRANSITION_TIME:
                 self._advance_level()
         elif self.state == 'SHOW_HIGHSCORES':
-            # nothing to update, just display
-            pass
+            # Pick up scores saved since the screen opened
+            if self.scores_changed:
+                self.scores_changed = False
+                self.leaderboard.refresh()
+        if self.hasher is not None:
+            self.state_hash = self.hasher.digest(self)
+
+    def _resolve_collisions(self) -> None:
+        """Resolve tank and bullet collisions through the spatial hash."""
+        grid = self.spatial_hash
+        grid.clear()
+        players = [p for p in self.players if p.lives > 0]
+        for player in players:
+            grid.insert(player, player.rect, 'player')
+        fleet = self.enemies
+        for i in range(fleet.count):
+            grid.insert(i, fleet.rect(i), 'enemy')
+        # Bullets are inserted with the rect covering their whole path this tick
+        proj = self.projectiles
+        owners, alive = proj.owner, proj.alive
+        player_bullets = []
+        for i in range(proj.count):
+            if not alive[i]:
+                continue
+            if owners[i] == OWNER_PLAYER:
+                player_bullets.append(i)
+                grid.insert(i, proj.swept_rect(i), 'player_bullet')
+            else:
+                grid.insert(i, proj.swept_rect(i), 'enemy_bullet')
+
+        # Tank vs tank: an enemy that drove into another tank this frame backs off
+        for i in range(fleet.count):
+            dx, dy = fleet.last_dx[i], fleet.last_dy[i]
+            if dx == 0 and dy == 0:
+                continue
+            rect = fleet.rect(i)
+            before = rect.move(-dx, -dy)
+            others = [fleet.rect(j) for j in grid.query(rect, 'enemy') if j != i]
+            others.extend(p.rect for p in grid.query(rect, 'player'))
+            if any(not before.colliderect(other) for other in others):
+                fleet.block(i)
+
+        # Bullet vs bullet: opposing shots cancel each other out
+        for i in player_bullets:
+            for other in grid.query(proj.swept_rect(i), 'enemy_bullet'):
+                if alive[other] and proj.hit_time_between(i, other) is not None:
+                    proj.kill(i)
+                    proj.kill(other)
+                    break
+
+        # Player bullets vs enemies: the first tank along the bullet's path is hit
+        for i in player_bullets:
+            if not alive[i]:
+                continue
+            hit, hit_t = None, None
+            for e in grid.query(proj.swept_rect(i), 'enemy'):
+                t = proj.hit_time(i, fleet.rect(e))
+                if t is not None and fleet.alive[e] and (hit_t is None or t < hit_t):
+                    hit, hit_t = e, t
+            if hit is not None:
+                proj.kill(i)
+                fleet.kill(hit)
+                self.player.score += 100
+
+        # Enemy bullets vs players
+        for player in players:
+            for i in grid.query(player.rect, 'enemy_bullet'):
+                if alive[i] and proj.hit_time(i, player.rect) is not None:
+                    proj.kill(i)
+                    player.lives -= 1
+
+        # Bullets that reached a wall without hitting a tank first
+        proj.apply_wall_hits(self.walls)
+        proj.compact()
+        fleet.compact()
 
     def render(self) -> None:
-        self.screen.fill(COLOR_BLACK)
-        if self.player:
-            self.player.render(self.screen)
-        for e in list(self.enemies):
-            e.render(self.screen)
-        for w in list(self.walls):
-            w.render(self.screen)
+        if self.state in ('RUN', 'PAUSE'):
+            self._render_dirty()
+            return
 
-        render_text(self.screen, f"Score: {self.player.score}", (10, 10))
-        render_text(self.screen, f"Lives: {self.player.lives}", (10, 40))
+        # Overlay screens: redraw everything and flip
+        self.screen.blit(self.wall_layer.surface, (0, 0))
+        self.wall_layer.take_dirty()
+        for player in self.players:
+            if player.lives > 0 or player is self.player:
+                player.render(self.screen, self.alpha)
+        self.enemies.render(self.screen, self.alpha)
+        self.projectiles.render(self.screen, self.alpha)
+
+        self.hud.render(self.screen, self.player.score, self.player.lives)
+        self.full_redraw = True
 
         if self.state == 'GAME_OVER':
             render_text(self.screen, 'GAME OVER', (SCREEN_WIDTH // 2 - 80, SCREEN_HEIGHT // 2), font_size=48, color=(255, 0, 0))
@@ -227,25 +553,111 @@ class Game:
             render_text(self.screen, 'Enter your name and press Enter:', (SCREEN_WIDTH // 2 - 180, SCREEN_HEIGHT // 2), font_size=24)
             render_text(self.screen, self.name_buffer or '_', (SCREEN_WIDTH // 2 - 180, SCREEN_HEIGHT // 2 + 40), font_size=28)
         elif self.state == 'SHOW_HIGHSCORES':
-            render_text(self.screen, 'Hall of Fame - Top Scores', (SCREEN_WIDTH // 2 - 200, 40), font_size=36, color=(255, 215, 0))
-            top = get_top(10)
-            y = 100
-            for i, e in enumerate(top, start=1):
-                render_text(self.screen, f"{i}. {e.name} - {e.score}", (SCREEN_WIDTH // 2 - 160, y), font_size=24)
-                y += 30
+            self.leaderboard.render(self.screen, (SCREEN_WIDTH // 2 - 200, 40))
+            if self.save_status:
+                render_text(self.screen, self.save_status, (SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT - 60), font_size=24)
         elif self.state == 'VICTORY':
             render_text(self.screen, f"Victory! Stage {self.current_level_index + 1} Complete", (SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT // 2), font_size=36, color=(0, 255, 0))
             render_text(self.screen, 'Press N or Enter to continue', (SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT // 2 + 50), font_size=24)
         elif self.state == 'CAMPAIGN_COMPLETE':
             render_text(self.screen, f"Campaign Complete! Final Score: {self.player.score}", (SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2), font_size=36, color=(255, 215, 0))
+        if self.show_profile:
+            self.screen.blit(self.profiler.overlay(), PROFILE_OVERLAY_POS)
+
+        self._present()
+
+    def _present(self, rects=None) -> None:
+        """Push the frame to the display (all of it, or only rects) and time it."""
+        if self.headless:
+            return
+        start = time.perf_counter()
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.flip_time = time.perf_counter() - start
+
+    def _render_dirty(self) -> None:
+        """Redraw only what changed since the last frame.
+
+        Walls come from the cached wall layer. Areas drawn last frame and
+        tiles whose wall changed are restored from that layer, entities and
+        HUD are drawn on top, and only those areas are pushed to the display.
+        """
+        screen = self.screen
+        background = self.wall_layer.surface
+        if self.full_redraw:
+            screen.blit(background, (0, 0))
+            self.wall_layer.take_dirty()
+            dirty = None
+        else:
+            dirty = self.wall_layer.take_dirty()
+            dirty.extend(self.drawn_rects)
+            for r in dirty:
+                screen.blit(background, r, r)
 
-        pygame.display.flip()
+        alpha = self.alpha
+        drawn = [p.render(screen, alpha) for p in self.players if p.lives > 0 or p is self.player]
+        drawn.extend(self.enemies.render(screen, alpha))
+        drawn.extend(self.projectiles.render(screen, alpha))
+        drawn.append(self.hud.render(screen, self.player.score, self.player.lives))
+        if self.show_profile:
+            drawn.append(screen.blit(self.profiler.overlay(), PROFILE_OVERLAY_POS))
+        self.drawn_rects = drawn
+
+        if self.headless:
+            self.full_redraw = False
+        elif dirty is None or len(dirty) + len(drawn) > MAX_DIRTY_RECTS:
+            self._present()
+            self.full_redraw = False
+        else:
+            dirty.extend(drawn)
+            self._present(dirty)
 
     def run(self) -> None:
+        """Run the game with a fixed-timestep simulation.
+
+        Real time is accumulated every frame and spent in whole ticks of
+        1 / sim_rate seconds, at most MAX_CATCHUP_TICKS per frame; time beyond
+        that is dropped so a slow machine does not spiral. Rendering happens
+        once per frame and interpolates between the last two ticks.
+        """
+        if self.headless:
+            raise RuntimeError("Game.run() needs a display; use step() in headless mode")
+        tick_time = 1.0 / self.sim_rate
+        accumulator = 0.0
+        previous = time.perf_counter()
+        profiler = self.profiler
+        clock = time.perf_counter
         while self.running:
+            now = clock()
+            accumulator += now - previous
+            previous = now
+
             self.handle_events()
-            self.update()
+            profiler.add('events', clock() - now)
+            ticks = 0
+            while accumulator >= tick_time and ticks < MAX_CATCHUP_TICKS:
+                self.apply_input(self.read_input())
+                self.update()
+                accumulator -= tick_time
+                ticks += 1
+            if accumulator >= tick_time:
+                accumulator = accumulator % tick_time
+
+            self.alpha = accumulator / tick_time
+            self.flip_time = 0.0
+            start = clock()
             self.render()
+            end = clock()
+            profiler.add('render', end - start - self.flip_time)
+            profiler.add('flip', self.flip_time)
+            profiler.add('frame', end - now)
             self.clock.tick(FPS)
 
+        # Make sure queued high scores reach the disk before exiting
+        self.score_writer.close()
+        if self.profile_export:
+            self.profiler.export(self.profile_export)
+            logger.info('Frame timings written to %s', self.profile_export)
         pygame.quit()
@@ -2,18 +2,31 @@
 
 Keeps a list of top N entries with fields: name, score, date.
 Provides load, save, add_entry, and get_top functions.
+
+Storage is pluggable: add_entry and get_top go through a backend object
+(JsonBackend by default, or SqliteBackend from hall_of_fame_sqlite for full
+score history), selected by settings.HALL_OF_FAME_BACKEND or set_backend().
+
+Loaded entries are cached in memory per file and reused until the file's
+mtime or size changes (another process wrote it) or this process saves it.
 """
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from training_game import settings
 
 DEFAULT_PATH = Path(__file__).resolve().parent / "hall_of_fame.json"
 MAX_ENTRIES = 10
 
+# Resolved file path -> (mtime_ns, size, entries sorted by score)
+_cache: Dict[str, Tuple[int, int, List[Entry]]] = {}
+
 
 @dataclass
 class Entry:
@@ -27,9 +40,22 @@ def _ensure_file(path: Path) -> None:
         path.write_text("[]", encoding="utf-8")
 
 
+def invalidate(path: Path | str | None = None) -> None:
+    """Drop the cached entries for one file, or for every file."""
+    if path is None:
+        _cache.clear()
+    else:
+        _cache.pop(str(Path(path).resolve()), None)
+
+
 def load(path: Path | str = DEFAULT_PATH) -> List[Entry]:
     p = Path(path)
     _ensure_file(p)
+    key = str(p.resolve())
+    stat = p.stat()
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return list(cached[2])
     try:
         data = json.loads(p.read_text(encoding="utf-8"))
     except Exception:
@@ -41,24 +67,90 @@ def load(path: Path | str = DEFAULT_PATH) -> List[Entry]:
         except Exception:
             continue
     entries.sort(key=lambda e: e.score, reverse=True)
-    return entries[:MAX_ENTRIES]
+    entries = entries[:MAX_ENTRIES]
+    _cache[key] = (stat.st_mtime_ns, stat.st_size, entries)
+    return list(entries)
 
 
 def save(entries: List[Entry], path: Path | str = DEFAULT_PATH) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    data = [asdict(e) for e in entries[:MAX_ENTRIES]]
-    p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    entries = sorted(entries, key=lambda e: e.score, reverse=True)[:MAX_ENTRIES]
+    data = [asdict(e) for e in entries]
+    # Write a temp file and rename it over the old one, so a crash mid-write
+    # never leaves a truncated file behind
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, p)
+    stat = p.stat()
+    _cache[str(p.resolve())] = (stat.st_mtime_ns, stat.st_size, entries)
 
 
-def add_entry(name: str, score: int, path: Path | str = DEFAULT_PATH) -> None:
-    entries = load(path)
-    entry = Entry(name=name or "Player", score=int(score), date=datetime.utcnow().isoformat())
-    entries.append(entry)
-    entries.sort(key=lambda e: e.score, reverse=True)
-    save(entries, path)
+def make_entry(name: str, score: int) -> Entry:
+    return Entry(name=name or "Player", score=int(score), date=datetime.utcnow().isoformat())
+
+
+class JsonBackend:
+    """Default backend: the top MAX_ENTRIES scores in a JSON file."""
+
+    def __init__(self, path: Path | str = DEFAULT_PATH) -> None:
+        self.path = Path(path)
+
+    def add_many(self, entries: Iterable[Entry]) -> None:
+        """Add several entries with a single rewrite of the file."""
+        save(load(self.path) + list(entries), self.path)
+
+    def top(self, n: int = 10) -> List[Entry]:
+        return load(self.path)[:n]
+
+    def best_per_player(self, n: int = 10) -> List[Entry]:
+        """Each player's best kept score, highest first."""
+        seen = set()
+        best = []
+        for e in load(self.path):
+            if e.name not in seen:
+                seen.add(e.name)
+                best.append(e)
+        return best[:n]
+
+    def close(self) -> None:
+        pass
+
+
+_backend = None
+
+
+def open_backend(kind: str = "json", path: Path | str | None = None):
+    """Create a backend by name ('json' or 'sqlite'), at its default path unless given."""
+    if kind == "json":
+        return JsonBackend(path or DEFAULT_PATH)
+    if kind == "sqlite":
+        from training_game.hall_of_fame_sqlite import SqliteBackend, DEFAULT_DB_PATH
+        return SqliteBackend(path or DEFAULT_DB_PATH)
+    raise ValueError(f"Unknown Hall of Fame backend: {kind!r}")
+
+
+def get_backend():
+    """Return the process-wide backend, opening the configured one on first use."""
+    global _backend
+    if _backend is None:
+        _backend = open_backend(settings.HALL_OF_FAME_BACKEND, settings.HALL_OF_FAME_PATH)
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Replace the process-wide backend (closing the previous one)."""
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
+
+
+def add_entry(name: str, score: int, path: Optional[Path | str] = None) -> None:
+    backend = JsonBackend(path) if path is not None else get_backend()
+    backend.add_many([make_entry(name, score)])
 
 
-def get_top(n: int = 10, path: Path | str = DEFAULT_PATH) -> List[Entry]:
-    entries = load(path)
-    return entries[:n]
+def get_top(n: int = 10, path: Optional[Path | str] = None) -> List[Entry]:
+    backend = JsonBackend(path) if path is not None else get_backend()
+    return backend.top(n)
@@ -0,0 +1,105 @@
+"""SQLite storage backend for the Hall of Fame.
+
+Keeps every submitted score (not just the top N) in an indexed table, so
+top-K and per-player-best queries stay cheap over a full history. The
+database runs in WAL mode with a busy timeout, so several game processes
+on one machine can read and write it at the same time.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List
+
+from training_game.hall_of_fame import Entry
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent / "hall_of_fame.sqlite3"
+BUSY_TIMEOUT = 5.0  # Seconds to wait for another process's write lock
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id    INTEGER PRIMARY KEY,
+    name  TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    date  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (name, score DESC);
+"""
+
+
+class SqliteBackend:
+    """Full score history in an SQLite database."""
+
+    def __init__(self, path: Path | str = DEFAULT_DB_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; writes open their own IMMEDIATE transaction. The
+        # connection may be used from a writer thread, guarded by _lock.
+        self._conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT,
+                                     isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Last top() result, valid while no connection has committed since
+        self._top_cache = None
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _data_version(self) -> int:
+        # Changes whenever another connection commits to the database
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def add_many(self, entries: Iterable[Entry]) -> None:
+        """Insert several entries in one transaction."""
+        rows = [(e.name, int(e.score), e.date) for e in entries]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT INTO scores (name, score, date) VALUES (?, ?, ?)", rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._top_cache = None
+
+    def top(self, n: int = 10) -> List[Entry]:
+        """The n highest scores of all time; ties go to the earlier submission."""
+        with self._lock:
+            version = self._data_version()
+            cached = self._top_cache
+            if cached is not None and cached[0] == version and cached[1] >= n:
+                return cached[2][:n]
+            rows = self._conn.execute(
+                "SELECT name, score, date FROM scores ORDER BY score DESC, id LIMIT ?", (n,)).fetchall()
+            entries = [Entry(name, score, date) for name, score, date in rows]
+            self._top_cache = (version, n, entries)
+            return list(entries)
+
+    def best_per_player(self, n: int = 10) -> List[Entry]:
+        """Each player's best score (with its date), highest first."""
+        with self._lock:
+            # SQLite takes the bare date column from the row holding MAX(score)
+            rows = self._conn.execute(
+                "SELECT name, MAX(score) AS best, date FROM scores GROUP BY name "
+                "ORDER BY best DESC, name LIMIT ?", (n,)).fetchall()
+        return [Entry(name, score, date) for name, score, date in rows]
+
+    def player_best(self, name: str) -> Entry | None:
+        """A single player's best score, or None if they have no scores."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, score, date FROM scores WHERE name = ? ORDER BY score DESC LIMIT 1",
+                (name,)).fetchone()
+        return Entry(*row) if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
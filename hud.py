@@ -0,0 +1,49 @@
+"""
+hud.py: Defines the Hud class, the score and lives display drawn over the game.
+"""
+
+import pygame
+from training_game.utils import TEXT_CACHE
+
+LINE_HEIGHT = 30
+FONT_SIZE = 24
+COLOR = (255, 255, 255)
+
+
+class Hud:
+    """
+    Score and lives lines composed into one surface. The surface is rebuilt
+    only when the score or lives change; every other frame is a single blit.
+    """
+    def __init__(self, position=(10, 10)):
+        """
+        :param position: Top-left (x, y) of the first line on screen.
+        """
+        self.position = position
+        self.surface = None
+        self.values = None
+        self.rebuilds = 0
+
+    def _build(self, score, lives):
+        lines = [TEXT_CACHE.get(f"Score: {score}", FONT_SIZE, COLOR),
+                 TEXT_CACHE.get(f"Lives: {lives}", FONT_SIZE, COLOR)]
+        width = max(line.get_width() for line in lines)
+        height = LINE_HEIGHT * (len(lines) - 1) + lines[-1].get_height()
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        for i, line in enumerate(lines):
+            surface.blit(line, (0, i * LINE_HEIGHT))
+        self.surface = surface
+        self.values = (score, lives)
+        self.rebuilds += 1
+
+    def render(self, surface, score, lives):
+        """
+        Draw the HUD, rebuilding it first if the values changed.
+        :param surface: The surface to draw on.
+        :param score: Player score.
+        :param lives: Player lives left.
+        :return: The screen area covered.
+        """
+        if self.values != (score, lives):
+            self._build(score, lives)
+        return surface.blit(self.surface, self.position)
@@ -0,0 +1,55 @@
+"""
+input_source.py: Key-state sources that can stand in for pygame.key.get_pressed().
+"""
+
+
+class KeyState:
+    """
+    Immutable set of pressed keys with the same indexing interface as the
+    object returned by pygame.key.get_pressed(): keys[pygame.K_SPACE] and
+    any(keys) both work.
+    """
+    __slots__ = ('pressed',)
+
+    def __init__(self, pressed=()):
+        """
+        :param pressed: Iterable of pygame key constants that are held down.
+        """
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+    def __iter__(self):
+        return (True for _ in self.pressed)
+
+    def __repr__(self):
+        return f"KeyState({sorted(self.pressed)})"
+
+
+NO_KEYS = KeyState()
+
+
+class ScriptedInput:
+    """
+    Input source that plays back a fixed sequence of key states, one per tick.
+    Once the script runs out it keeps returning NO_KEYS, or starts over if
+    loop is set.
+    """
+    def __init__(self, frames, loop=False):
+        """
+        :param frames: Sequence of KeyState (or iterables of key constants).
+        :param loop: Restart from the first frame after the last one.
+        """
+        self.frames = [f if isinstance(f, KeyState) else KeyState(f) for f in frames]
+        self.loop = loop
+        self.position = 0
+
+    def __call__(self):
+        if self.position >= len(self.frames):
+            if not self.loop or not self.frames:
+                return NO_KEYS
+            self.position = 0
+        frame = self.frames[self.position]
+        self.position += 1
+        return frame
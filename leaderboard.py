@@ -0,0 +1,61 @@
+"""
+leaderboard.py: Defines the Leaderboard class, a pre-rendered Hall of Fame screen.
+"""
+
+import pygame
+from training_game import hall_of_fame
+from training_game.utils import render_text
+
+TITLE = 'Hall of Fame - Top Scores'
+TITLE_COLOR = (255, 215, 0)
+WIDTH = 400
+LINE_HEIGHT = 30
+ENTRIES_TOP = 60  # Offset of the first entry below the title
+ENTRIES_LEFT = 40
+
+
+class Leaderboard:
+    """
+    The top-scores list rendered once into a Surface. The surface is rebuilt
+    only when refresh() finds that the entries changed, so showing the
+    leaderboard costs a single blit per frame.
+    """
+    def __init__(self, count=10, backend=None):
+        """
+        :param count: Number of entries shown.
+        :param backend: Hall of Fame backend to read (defaults to hall_of_fame.get_backend()).
+        """
+        self.count = count
+        self.backend = backend
+        self.entries = None
+        self.surface = None
+
+    def refresh(self):
+        """
+        Re-read the (cached) top entries and rebuild the surface if they changed.
+        :return: True if the surface was rebuilt.
+        """
+        backend = self.backend or hall_of_fame.get_backend()
+        entries = backend.top(self.count)
+        if self.surface is not None and entries == self.entries:
+            return False
+        self.entries = entries
+        surface = pygame.Surface((WIDTH, ENTRIES_TOP + LINE_HEIGHT * self.count), pygame.SRCALPHA)
+        render_text(surface, TITLE, (0, 0), font_size=36, color=TITLE_COLOR)
+        y = ENTRIES_TOP
+        for i, e in enumerate(entries, start=1):
+            render_text(surface, f"{i}. {e.name} - {e.score}", (ENTRIES_LEFT, y), font_size=24)
+            y += LINE_HEIGHT
+        self.surface = surface
+        return True
+
+    def render(self, surface, position):
+        """
+        Blit the leaderboard, building it first if refresh() was never called.
+        :param surface: The surface to draw on.
+        :param position: Top-left (x, y) of the title.
+        :return: The screen area covered.
+        """
+        if self.surface is None:
+            self.refresh()
+        return surface.blit(self.surface, position)
@@ -1,132 +1,272 @@
 """
-level.py: Defines the map layout and generates walls.
+level.py: Loads level files, compiles them into a compact binary form and builds the walls.
+
+Levels live in the `levels/` directory as text files (see levels/level1.txt).
+Each file is compiled once into a CompiledLevel (tile array plus spawn
+points, with a free-space index built on demand), which is kept in memory and in `levels/__levelcache__/` and
+recompiled only when the source file's mtime or size changes. Loading a
+level clones a prototype TileGrid built from the compiled data.
 """
 
+import os
+import struct
+from pathlib import Path
+
 import pygame
+from training_game.tile_grid import TileGrid, EMPTY, SOLID, DESTRUCTIBLE
 from training_game.wall import Wall
+from training_game.free_space import FreeSpace
 from training_game.settings import TILE_SIZE, LEVELS, ENEMY_BASE_SPEED
 
+LEVELS_DIR = Path(__file__).resolve().parent / "levels"
+CACHE_DIR_NAME = "__levelcache__"
+
+# Health of a destructible wall when the level starts
+WALL_HEALTH = 3
+
+# Tile characters in level files
+_TILE_CHARS = {'0': EMPTY, '1': SOLID, '2': DESTRUCTIBLE, 'P': EMPTY, 'E': EMPTY}
+
+# Spawn point kinds
+SPAWN_PLAYER = 0
+SPAWN_ENEMY = 1
+_SPAWN_CHARS = {'P': SPAWN_PLAYER, 'E': SPAWN_ENEMY}
+
+# Binary layout: magic, format version, source mtime_ns, source size,
+# cols, rows, enemy count, speed multiplier, wave count, max alive enemies,
+# wave interval, spawn count; then cols * rows
+# tile bytes and one (kind, col, row) record per spawn point.
+_MAGIC = b"IBLV"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHqqHHHdHHdH")
+_SPAWN = struct.Struct("<BHH")
+
+
+class CompiledLevel:
+    """
+    Compact, immutable form of a level: a tile array plus spawn points and
+    parameters. Holds the prototype TileGrid that level loads clone.
+    """
+    __slots__ = ('name', 'cols', 'rows', 'tiles', 'spawns', 'enemy_count', 'speed', 'waves', 'max_alive', 'wave_interval',
+                 '_prototype', '_free_space')
+
+    def __init__(self, name, cols, rows, tiles, spawns, enemy_count, speed,
+                 waves=1, max_alive=0, wave_interval=0.0):
+        """
+        :param name: Level name (file stem).
+        :param cols: Number of tile columns.
+        :param rows: Number of tile rows.
+        :param tiles: bytes of cols * rows tile kinds (EMPTY, SOLID, DESTRUCTIBLE).
+        :param spawns: Tuple of (kind, col, row) spawn points.
+        :param enemy_count: Number of enemies in the level.
+        :param speed: Enemy speed multiplier relative to ENEMY_BASE_SPEED.
+        :param waves: Number of waves the enemies are released in.
+        :param max_alive: Most enemies alive at once (0 = MAX_ALIVE_ENEMIES).
+        :param wave_interval: Seconds between waves (0 = WAVE_INTERVAL).
+        """
+        self.name = name
+        self.cols = cols
+        self.rows = rows
+        self.tiles = tiles
+        self.spawns = spawns
+        self.enemy_count = enemy_count
+        self.speed = speed
+        self.waves = waves
+        self.max_alive = max_alive
+        self.wave_interval = wave_interval
+        self._prototype = None
+        self._free_space = None
+
+    def spawn_points(self, kind):
+        """
+        Return the (col, row) spawn points of the given kind.
+        """
+        return [(col, row) for k, col, row in self.spawns if k == kind]
+
+    def prototype(self):
+        """
+        Return the TileGrid built from this level, creating it on first use.
+        Callers must clone it before modifying walls.
+        """
+        if self._prototype is None:
+            grid = TileGrid(self.cols, self.rows)
+            tiles = self.tiles
+            for index, kind in enumerate(tiles):
+                if kind == EMPTY:
+                    continue
+                col, row = index % self.cols, index // self.cols
+                rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                if kind == SOLID:
+                    grid.add(Wall(rect, destructible=False))
+                else:
+                    grid.add(Wall(rect, destructible=True, health=WALL_HEALTH))
+            self._prototype = grid
+        return self._prototype
+
+    def free_space(self):
+        """
+        Return the FreeSpace index (clearance and connectivity) of the
+        level's starting layout, creating it on first use.
+        """
+        if self._free_space is None:
+            self._free_space = FreeSpace(self.cols, self.rows, self.tiles)
+        return self._free_space
+
+    def to_bytes(self, mtime_ns=0, size=0):
+        """
+        Serialize to the binary cache format.
+        :param mtime_ns: Source file mtime, stored for cache invalidation.
+        :param size: Source file size, stored for cache invalidation.
+        """
+        parts = [_HEADER.pack(_MAGIC, _VERSION, mtime_ns, size, self.cols, self.rows,
+                              self.enemy_count, self.speed, self.waves, self.max_alive,
+                              self.wave_interval, len(self.spawns)),
+                 self.tiles]
+        parts.extend(_SPAWN.pack(*spawn) for spawn in self.spawns)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, name, data):
+        """
+        Deserialize from the binary cache format.
+        :return: Tuple (CompiledLevel, mtime_ns, size).
+        :raises ValueError: If the data is not a valid compiled level.
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Compiled level is truncated")
+        (magic, version, mtime_ns, size, cols, rows, enemy_count, speed,
+         waves, max_alive, wave_interval, spawn_count) = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a compiled level of this version")
+        offset = _HEADER.size
+        tiles = bytes(data[offset:offset + cols * rows])
+        offset += cols * rows
+        if len(tiles) != cols * rows or len(data) != offset + spawn_count * _SPAWN.size:
+            raise ValueError("Compiled level is truncated")
+        spawns = tuple(_SPAWN.unpack_from(data, offset + i * _SPAWN.size) for i in range(spawn_count))
+        level = cls(name, cols, rows, tiles, spawns, enemy_count, speed, waves, max_alive, wave_interval)
+        return level, mtime_ns, size
+
+
+def parse_level(text, name="level"):
+    """
+    Compile the text of a level file.
+
+    The file holds `key: value` header lines (`enemies`, `speed`, `waves`,
+    `max_alive`, `wave_interval`), then a
+    `map:` line followed by one line per tile row. Lines starting with '#'
+    are comments.
+    :raises ValueError: If the file is malformed.
+    """
+    params = {'enemies': 3, 'speed': 1.0, 'waves': 1, 'max_alive': 0, 'wave_interval': 0.0}
+    rows = []
+    in_map = False
+    for line_no, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        if in_map:
+            rows.append((line_no, line))
+        elif line == 'map:':
+            in_map = True
+        elif ':' in line:
+            key, value = (part.strip() for part in line.split(':', 1))
+            if key not in params:
+                raise ValueError(f"{name}:{line_no}: unknown key {key!r}")
+            try:
+                params[key] = type(params[key])(value)
+            except ValueError:
+                raise ValueError(f"{name}:{line_no}: bad value for {key!r}: {value!r}") from None
+        else:
+            raise ValueError(f"{name}:{line_no}: expected 'key: value' or 'map:'")
 
-# LEVEL SYSTEM: define simple level layouts and parameters
-def _layout_from_ascii(ascii_map):
-    walls = []
-    for row_index, row in enumerate(ascii_map):
+    if not rows:
+        raise ValueError(f"{name}: level has no map")
+    cols = len(rows[0][1])
+    tiles = bytearray()
+    spawns = []
+    for row_index, (line_no, row) in enumerate(rows):
+        if len(row) != cols:
+            raise ValueError(f"{name}:{line_no}: row has {len(row)} tiles, expected {cols}")
         for col_index, ch in enumerate(row):
-            x = col_index * TILE_SIZE
-            y = row_index * TILE_SIZE
-            if ch == '1':
-                walls.append(Wall(pygame.Rect(x, y, TILE_SIZE, TILE_SIZE), destructible=False))
-            elif ch == '2':
-                walls.append(Wall(pygame.Rect(x, y, TILE_SIZE, TILE_SIZE), destructible=True, health=3))
-    return walls
+            if ch not in _TILE_CHARS:
+                raise ValueError(f"{name}:{line_no}: unknown tile {ch!r}")
+            tiles.append(_TILE_CHARS[ch])
+            if ch in _SPAWN_CHARS:
+                spawns.append((_SPAWN_CHARS[ch], col_index, row_index))
+    if params['waves'] < 1:
+        raise ValueError(f"{name}: 'waves' must be at least 1")
+    return CompiledLevel(name, cols, len(rows), bytes(tiles), tuple(spawns), params['enemies'], params['speed'],
+                         params['waves'], params['max_alive'], params['wave_interval'])
 
 
-def load_level(index):
-    """Return (walls, enemy_count, enemy_speed) for the requested level index.
-    If index is out of range, raises IndexError.
+# source path -> (mtime_ns, size, CompiledLevel)
+_COMPILED = {}
+
+
+def _cache_path(path):
+    return path.parent / CACHE_DIR_NAME / (path.stem + ".bin")
+
+
+def compile_level_file(path):
     """
-    # Simple predefined ASCII maps (rows x cols consistent with TILE_SIZE)
-    # '1' = indestructible wall, '2' = destructible wall, '0' = empty
-    ascii_levels = [
-        [
-            "11111111111111111111",
-            "10000000000000000001",
-            "10002000020000002001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "11111111111111111111",
-        ],
-        [
-            "11111111111111111111",
-            "10000000200000000001",
-            "10001110001110001101",
-            "10100000000000000101",
-            "10000000200002000001",
-            "10001110001110001101",
-            "10100000000000000101",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "11111111111111111111",
-        ],
-        [
-            "11111111111111111111",
-            "10022002200220022001",
-            "10220022002200220021",
-            "10022002200220022001",
-            "10220022002200220021",
-            "10022002200220022001",
-            "10220022002200220021",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "10000000000000000001",
-            "11111111111111111111",
-        ],
-    ]
-
-    if index < 0 or index >= len(ascii_levels):
-        raise IndexError("Level index out of range")
+    Return the CompiledLevel for a level file, using the in-memory and
+    on-disk caches when they match the file's mtime and size.
+    :param path: Path to the level text file.
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = str(path)
+    cached = _COMPILED.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    compiled = None
+    cache_path = _cache_path(path)
+    try:
+        compiled, mtime_ns, size = CompiledLevel.from_bytes(path.stem, cache_path.read_bytes())
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            compiled = None
+    except (OSError, ValueError, struct.error):
+        compiled = None
 
-    walls = _layout_from_ascii(ascii_levels[index])
+    if compiled is None:
+        compiled = parse_level(path.read_text(encoding="utf-8"), path.stem)
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_bytes(compiled.to_bytes(stat.st_mtime_ns, stat.st_size))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Read-only install: keep the in-memory copy only
 
-    # enemy counts per level (level 1 -> 3 enemies, +1 per level)
-    enemy_count = 3 + index
-    # increase enemy speed by 10% per level (index 0 is base)
-    enemy_speed = ENEMY_BASE_SPEED * (1 + 0.1 * index)
+    _COMPILED[key] = (stat.st_mtime_ns, stat.st_size, compiled)
+    return compiled
 
-    return walls, enemy_count, enemy_speed
+
+def get_level(index, levels_dir=LEVELS_DIR):
+    """
+    Return the CompiledLevel for a campaign level index.
+    :raises IndexError: If index is out of range.
+    """
+    if index < 0 or index >= len(LEVELS):
+        raise IndexError("Level index out of range")
+    return compile_level_file(Path(levels_dir) / (LEVELS[index] + ".txt"))
+
+
+def load_level(index):
+    """Return (walls, enemy_count, enemy_speed) for the requested level index.
+    `walls` is a TileGrid indexed by tile coordinates, cloned from the
+    cached prototype of the compiled level.
+    If index is out of range, raises IndexError.
+    """
+    level = get_level(index)
+    return level.prototype().clone(), level.enemy_count, ENEMY_BASE_SPEED * level.speed
 
 
 def build_map():
     """
-    Creates a simple map layout using Wall objects.
+    Creates the sandbox map layout (levels/sandbox.txt).
     Returns a list of Wall objects.
     """
-    walls = []
-
-    # Example layout (1 = indestructible wall, 2 = destructible wall, 0 = empty space)
-    layout = [
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 2, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 2, 0, 0, 1],
-        [1, 0, 2, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 2, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-    ]
-
-    for row_index, row in enumerate(layout):
-        for col_index, cell in enumerate(row):
-            x = col_index * TILE_SIZE
-            y = row_index * TILE_SIZE
-            if cell == 1:
-                walls.append(Wall(pygame.Rect(x, y, TILE_SIZE, TILE_SIZE), destructible=False))
-            elif cell == 2:
-                walls.append(Wall(pygame.Rect(x, y, TILE_SIZE, TILE_SIZE), destructible=True, health=3))
-
-    return walls
\ No newline at end of file
+    return list(compile_level_file(LEVELS_DIR / "sandbox.txt").prototype().clone())
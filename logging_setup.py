@@ -0,0 +1,148 @@
+"""
+logging_setup.py: Routes the package logger through a queue to a background thread.
+
+The game thread only filters a record and puts it on a queue; formatting
+for output and all I/O happen on the QueueListener's thread. Per call-site
+rate limiting and sampling keep a chatty hot path (a shot or wall hit
+logged every tick) from flooding the queue.
+"""
+
+import logging
+import logging.handlers
+import queue
+import time
+
+from training_game import logger
+from training_game import settings
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+
+def _category(record):
+    # A call site: the logger and the unformatted message template
+    return record.name, record.msg
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per category: each call site may log `burst` records at
+    once and `rate` records per second after that. Dropped records are
+    counted in `suppressed`.
+    """
+    def __init__(self, rate=settings.LOG_RATE_LIMIT, burst=settings.LOG_RATE_BURST, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.suppressed = 0
+        self._buckets = {}  # category -> [tokens, last refill time]
+
+    def filter(self, record):
+        now = self.clock()
+        key = _category(record)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        self.suppressed += 1
+        return False
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in `every` records per category for levels below `max_level`
+    (by default only DEBUG is sampled). Uses a counter rather than the
+    random module so sampling never disturbs the game's seeded RNG.
+    """
+    def __init__(self, every=settings.LOG_SAMPLE_EVERY, max_level=logging.DEBUG):
+        super().__init__()
+        self.every = every
+        self.max_level = max_level
+        self.sampled_out = 0
+        self._counts = {}
+
+    def filter(self, record):
+        if self.every <= 1 or record.levelno > self.max_level:
+            return True
+        key = _category(record)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % self.every == 0:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record as is. The stock handler formats
+    the message on the logging thread; here that is left to the listener.
+    The game only logs immutable values (ints, tuples, strings), so the
+    arguments cannot change before the listener formats them.
+    """
+    def prepare(self, record):
+        return record
+
+
+_listener = None
+_queue_handler = None
+
+
+def setup_logging(level=logging.WARNING, log_file=None, rate_limit=True, sample=True):
+    """
+    Send the package logger's records through a QueueHandler to a
+    QueueListener thread that writes them to log_file, or to stderr if no
+    file is given.
+    Calling it again replaces the previous setup.
+    :param level: Level of the package logger.
+    :param log_file: Optional path of a file to append records to instead of stderr.
+    :param rate_limit: Apply RateLimitFilter per call site.
+    :param sample: Apply SamplingFilter to DEBUG records.
+    :return: The QueueHandler installed on the package logger.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    if log_file:
+        handlers = [logging.FileHandler(log_file, encoding='utf-8')]
+    else:
+        handlers = [logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    if sample:
+        _queue_handler.addFilter(SamplingFilter())
+    if rate_limit:
+        _queue_handler.addFilter(RateLimitFilter())
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    logger.addHandler(_queue_handler)
+    logger.setLevel(level)
+    # Records stop at the package logger instead of also reaching root handlers
+    logger.propagate = False
+    return _queue_handler
+
+
+def stop_logging():
+    """
+    Flush queued records, stop the listener thread and detach the queue
+    handler. Safe to call when logging was never set up.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
+        logger.propagate = True
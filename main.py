@@ -6,8 +6,12 @@ main.py: Entry point for the game. Initializes and starts the game.
 # running the file directly (python training_game\main.py).
 import sys
 from pathlib import Path
+import argparse
+import asyncio
 import logging
 import os
+import time
+from array import array
 
 # Try to import the package normally. If that fails (for example when the
 # script is executed directly as `python training_game\main.py`), add the
@@ -20,11 +24,220 @@ except ModuleNotFoundError:
     if str(project_root) not in sys.path:
         sys.path.insert(0, str(project_root))
     from training_game.game import Game
+from training_game import hall_of_fame
+from training_game.game_clean import DEFAULT_CHECKPOINT_PATH
+from training_game.logging_setup import setup_logging, stop_logging
+from training_game.replay import ReplayFile, InputRecorder, benchmark, first_difference
+from training_game.settings import NET_PORT
+
+
+def run_headless(ticks, level, record=None):
+    """Simulate `ticks` ticks without a window and report the tick rate."""
+    game = Game(headless=True)
+    game.current_level_index = level
+    game.start_level(level)
+    recorder = InputRecorder(game) if record else None
+    start = time.perf_counter()
+    done = game.step(ticks)
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else float('inf')
+    print(f"{done} ticks in {elapsed:.3f}s ({rate:.0f} ticks/s), state={game.state}, score={game.player.score}")
+    if recorder:
+        recorder.replay().save(record)
+
+
+def check_replay_hashes(path, hash_out=None, hash_check=None):
+    """Hash the state after every tick of a recording, save the hashes and/or
+    compare them with hashes saved earlier (by another build or machine)."""
+    with ReplayFile(path) as replay:
+        hashes = replay.hashes()
+    if hash_out:
+        Path(hash_out).write_bytes(hashes.tobytes())
+        print(f"{len(hashes)} tick hashes written to {hash_out}")
+    if hash_check:
+        expected = array('Q')
+        expected.frombytes(Path(hash_check).read_bytes())
+        tick = first_difference(hashes, expected)
+        if tick is not None:
+            print(f"State diverges at tick {tick + 1}: {hashes[tick]:016x} != {expected[tick]:016x}")
+            return 1
+        if len(hashes) != len(expected):
+            print(f"Hashes agree over {min(len(hashes), len(expected))} ticks, but lengths differ")
+            return 1
+        print(f"All {len(hashes)} tick hashes match")
+    return 0
+
+
+def run_replay(path, seek=None, ticks=3600):
+    """Play a recorded session headless as fast as possible and report the tick rate.
+
+    With `seek`, jump to that tick instead and time each of the next `ticks`
+    ticks, reporting the slowest one.
+    """
+    with ReplayFile(path) as replay:
+        if seek is None:
+            done, elapsed, game = benchmark(replay)
+            rate = done / elapsed if elapsed > 0 else float('inf')
+            print(f"{done} ticks in {elapsed:.3f}s ({rate:.0f} ticks/s), state={game.state}, score={game.player.score}")
+            return
+        start = time.perf_counter()
+        game = replay.seek(seek)
+        elapsed = time.perf_counter() - start
+        print(f"Seek to tick {seek}: {elapsed * 1000:.1f} ms, state={game.state}, score={game.player.score}")
+        times = replay.tick_times(seek, seek + ticks)
+        if times:
+            slowest = max(range(len(times)), key=times.__getitem__)
+            print(f"{len(times)} ticks timed, slowest: tick {seek + slowest} ({times[slowest] * 1000:.2f} ms)")
+
+
+def _address(text):
+    host, _, port = text.rpartition(':')
+    if not host:
+        return text, NET_PORT
+    return host, int(port)
+
+
+def run_server(address, level, udp=True):
+    """Host a networked co-op game until interrupted."""
+    from training_game.server import GameServer
+    host, port = address
+    server = GameServer(host, port, level=level, udp=udp)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def run_client(address, udp=True, headless=False, ticks=3600):
+    """Join a networked game; headless clients hold no keys for `ticks` ticks and report traffic."""
+    import pygame
+    from training_game.client import GameClient, ClientView
+
+    async def play():
+        client = GameClient(*address, input_source=None if headless else pygame.key.get_pressed, udp=udp)
+        await client.connect()
+        try:
+            if headless:
+                await client.run(ticks)
+            else:
+                await client.run(view=ClientView(client))
+        finally:
+            await client.close()
+        return client.metrics()
+
+    metrics = asyncio.run(play())
+    print(_format_metrics(metrics))
+
+
+def run_net_test(ticks, players=2, udp=True):
+    """Run a server and `players` scripted clients over localhost for `ticks`
+    ticks and report bytes per tick, latency and server CPU per client."""
+    import pygame
+    from training_game.client import GameClient
+    from training_game.input_source import ScriptedInput, KeyState
+    from training_game.server import GameServer
+
+    def patrol(phase):
+        # Patrol and shoot in all four directions, each player starting on a different leg
+        moves = (pygame.K_LEFT, pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN)
+        frames = []
+        for i in range(4):
+            frames.extend([KeyState((moves[(i + phase) % 4], pygame.K_SPACE))] * 40)
+        return ScriptedInput(frames, loop=True)
+
+    async def session():
+        server = GameServer(port=0, udp=udp)
+        await server.start()
+        clients = [GameClient(port=server.port, input_source=patrol(i), udp=udp) for i in range(players)]
+        try:
+            for client in clients:
+                await client.connect()
+            # Player lives do not matter for a traffic measurement
+            for player in server.game.players:
+                player.lives = 1000
+            await asyncio.gather(*(client.run(ticks) for client in clients))
+            return server.metrics(), [client.metrics() for client in clients]
+        finally:
+            for client in clients:
+                await client.close()
+            await server.stop()
+
+    server_metrics, client_metrics = asyncio.run(session())
+    print(f"Server: {server_metrics['ticks']} ticks, simulation {server_metrics['sim_ms_per_tick']:.3f} ms/tick, "
+          f"process CPU (server and clients) {server_metrics['process_cpu_ms_per_tick']:.3f} ms/tick")
+    print(f"  shared cost per client: {server_metrics['shared_ms_per_client_tick']:.3f} ms/tick, "
+          f"frame capture {server_metrics['capture_ms_per_snapshot']:.3f} ms/snapshot")
+    for metrics in server_metrics['clients']:
+        print(f"  player {metrics['slot'] + 1} ({metrics['transport']}): "
+              f"{metrics['down_bytes_per_tick']:.1f} B/tick down, {metrics['up_bytes_per_tick']:.1f} B/tick up, "
+              f"{metrics['bytes_per_snapshot']:.1f} B/snapshot ({metrics['full_snapshots']} full of {metrics['snapshots']}), "
+              f"encode+send {metrics['send_ms_per_tick']:.3f} ms/tick")
+    for metrics in client_metrics:
+        print(_format_metrics(metrics))
+
+
+def _format_metrics(metrics):
+    rtt = metrics['rtt_ms_median']
+    rtt_text = f"RTT median {rtt:.2f} ms, max {metrics['rtt_ms_max']:.2f} ms" if rtt is not None else "no RTT samples"
+    return (f"Client {metrics['slot'] + 1} ({metrics['transport']}): {metrics['snapshots']} snapshots, "
+            f"{metrics['snapshots_lost']} lost, {metrics['undecodable']} undecodable, "
+            f"{metrics['down_bytes_per_tick']:.1f} B/tick down, {metrics['up_bytes_per_tick']:.1f} B/tick up, {rtt_text}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Iron Blitz")
+    parser.add_argument('--headless', action='store_true', help="simulate without a window as fast as possible")
+    parser.add_argument('--ticks', type=int, default=3600, help="ticks to simulate in headless mode")
+    parser.add_argument('--level', type=int, default=0, help="level index to start headless simulation on")
+    parser.add_argument('--profile-out', metavar='PATH', help="write frame timing stats (.csv or .json) on exit")
+    parser.add_argument('--record', metavar='PATH', help="record this session's input to a replay file")
+    parser.add_argument('--replay', metavar='PATH', help="play a recorded session headless at full speed")
+    parser.add_argument('--seek', type=int, metavar='TICK', help="with --replay: jump to this tick and time the next --ticks ticks")
+    parser.add_argument('--hash-out', metavar='PATH', help="with --replay: save the per-tick state hashes")
+    parser.add_argument('--hash-check', metavar='PATH', help="with --replay: compare per-tick state hashes against a saved file")
+    parser.add_argument('--resume', action='store_true', help="continue from the checkpoint saved on reaching the last level")
+    parser.add_argument('--server', nargs='?', const=f'127.0.0.1:{NET_PORT}', metavar='HOST:PORT',
+                        help="host a networked co-op game (default 127.0.0.1:%d)" % NET_PORT)
+    parser.add_argument('--connect', metavar='HOST[:PORT]', help="join a networked co-op game (with --headless: hold no keys for --ticks ticks)")
+    parser.add_argument('--tcp', action='store_true', help="with --server/--connect/--net-test: do not use UDP")
+    parser.add_argument('--net-test', type=int, nargs='?', const=2, metavar='PLAYERS',
+                        help="run a server and scripted clients over localhost for --ticks ticks and report traffic")
+    parser.add_argument('--scores', choices=('json', 'sqlite'), help="Hall of Fame storage (default: settings.HALL_OF_FAME_BACKEND)")
+    args = parser.parse_args()
+
     # Configure logging: default WARNING. Set TRAINING_GAME_DEBUG=1 to enable DEBUG.
+    # Records are written by a background thread (see logging_setup.py);
+    # TRAINING_GAME_LOG_FILE sends them to a file instead of stderr.
     log_level = logging.DEBUG if os.getenv('TRAINING_GAME_DEBUG') in ('1', 'true', 'True') else logging.WARNING
-    logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
-    game = Game()
-    game.run()
\ No newline at end of file
+    setup_logging(log_level, log_file=os.getenv('TRAINING_GAME_LOG_FILE'))
+    if args.scores:
+        hall_of_fame.set_backend(hall_of_fame.open_backend(args.scores))
+    try:
+        if args.net_test:
+            run_net_test(args.ticks, args.net_test, udp=not args.tcp)
+        elif args.server:
+            run_server(_address(args.server), args.level, udp=not args.tcp)
+        elif args.connect:
+            run_client(_address(args.connect), udp=not args.tcp, headless=args.headless, ticks=args.ticks)
+        elif args.replay:
+            try:
+                if args.hash_out or args.hash_check:
+                    sys.exit(check_replay_hashes(args.replay, args.hash_out, args.hash_check))
+                run_replay(args.replay, args.seek, args.ticks)
+            except (OSError, ValueError) as e:
+                print(f"Cannot play {args.replay}: {e}")
+                sys.exit(1)
+        elif args.headless:
+            run_headless(args.ticks, args.level, args.record)
+        else:
+            game = Game(profile_export=args.profile_out, checkpoint_path=DEFAULT_CHECKPOINT_PATH)
+            if args.resume:
+                game.load_checkpoint()
+            recorder = InputRecorder(game) if args.record else None
+            try:
+                game.run()
+            finally:
+                if recorder:
+                    recorder.replay().save(args.record)
+    finally:
+        stop_logging()
\ No newline at end of file
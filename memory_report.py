@@ -0,0 +1,58 @@
+"""
+memory_report.py: Per-entity memory footprint report.
+
+Bullets and enemy tanks live in slot-reusing arrays (ProjectileSystem,
+EnemyFleet), so their cost is reported per slot; walls and players are
+slotted objects and are reported per instance.
+"""
+
+import sys
+
+
+def _object_size(obj):
+    """
+    Return the shallow size of an entity plus the pygame.Rect it owns.
+    """
+    size = sys.getsizeof(obj)
+    rect = getattr(obj, 'rect', None)
+    if rect is not None:
+        size += sys.getsizeof(rect)
+    return size
+
+
+def _item_size(arr):
+    """
+    Return the bytes one slot takes in an array or bytearray column.
+    """
+    return getattr(arr, 'itemsize', 1)
+
+
+def memory_report(game):
+    """
+    Report memory use per entity type for a running game.
+    :param game: Game instance to inspect.
+    :return: Dict mapping entity type to {'count', 'bytes_each', 'bytes_total'}.
+    """
+    report = {}
+
+    def add(name, count, bytes_each):
+        report[name] = {'count': count, 'bytes_each': bytes_each, 'bytes_total': count * bytes_each}
+
+    walls = list(game.walls)
+    add('Wall', len(walls), _object_size(walls[0]) if walls else 0)
+    add('Player', len(game.players), _object_size(game.players[0]) if game.players else 0)
+    add('Enemy', len(game.enemies), sum(_item_size(arr) for arr in game.enemies._arrays()))
+
+    proj = game.projectiles
+    add('Bullet', proj.count, sum(_item_size(arr) for arr in (proj.x, proj.y, proj.px, proj.py, proj.dx, proj.dy, proj.owner, proj.alive)))
+    return report
+
+
+def format_memory_report(report):
+    """
+    Format a memory_report() result as aligned text lines.
+    """
+    lines = [f"{'type':<8} {'count':>7} {'bytes/each':>11} {'total':>10}"]
+    for name, row in report.items():
+        lines.append(f"{name:<8} {row['count']:>7} {row['bytes_each']:>11} {row['bytes_total']:>10}")
+    return "\n".join(lines)
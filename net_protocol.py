@@ -0,0 +1,272 @@
+"""
+net_protocol.py: Wire format of networked co-op: messages, quantized state frames and their delta encoding.
+
+The server (server.py) owns the only simulation. Clients (client.py) send
+their held keys every tick and receive state snapshots. A snapshot is a
+frame of four sections of small integers, positions quantized to
+NET_POSITION_QUANTUM pixels:
+
+- header: game state, level, team score, then x, y, lives and facing per player
+- enemies: x, y per tank
+- bullets: x, y, owner per bullet
+- walls: the kind of every cell, then the health of every cell
+
+A frame is sent as a delta against a frame the client has acknowledged:
+each section is either marked unchanged (walls, most ticks) or sent as
+per-value differences, zigzag varint coded, with runs of unchanged values
+collapsed to two bytes. Tanks and bullets move a few units per tick, so
+most values cost one byte. Without a usable baseline the delta is taken
+against zeros, which is a full frame.
+
+Every message starts with a one-byte type. Over UDP a datagram is one
+message; over TCP each message is prefixed with its length.
+"""
+
+import struct
+from array import array
+
+from training_game.snapshot import STATES
+from training_game.settings import NET_POSITION_QUANTUM
+
+PROTOCOL_VERSION = 2
+
+MSG_HELLO = 1       # client -> server (TCP): version, flags
+MSG_WELCOME = 2     # server -> client (TCP): slot, token and game parameters
+MSG_REJECT = 3      # server -> client (TCP): UTF-8 reason follows
+MSG_UDP_HELLO = 4   # both ways (UDP): token; the server echoes it to confirm the path
+MSG_USE_TCP = 5     # client -> server (TCP): UDP does not get through, stream over TCP
+MSG_INPUT = 6       # client -> server: held keys, newest snapshot received, send time
+MSG_SNAPSHOT = 7    # server -> client: delta-coded frame
+
+HELLO_WANTS_UDP = 1
+
+# type, version, flags
+HELLO = struct.Struct("<BHB")
+# type, version, slot, token, UDP port, sim rate, snapshot interval, position quantum, cols, rows, tile size
+WELCOME = struct.Struct("<BHBQHHHBHHH")
+# type, token
+UDP_HELLO = struct.Struct("<BQ")
+# type, token, sequence, acknowledged snapshot tick, key mask, client send time
+INPUT = struct.Struct("<BQIIHd")
+# type, tick, baseline tick (NO_BASELINE for a full frame), echoed client time
+SNAPSHOT = struct.Struct("<BIId")
+# Length prefix of a message on the TCP stream
+FRAMING = struct.Struct("<I")
+
+NO_BASELINE = 0xFFFFFFFF
+# Largest snapshot sent as a datagram; bigger ones go over TCP
+MAX_DATAGRAM = 60000
+# Largest TCP message a client accepts (snapshots too big for a datagram)
+MAX_SNAPSHOT = 1 << 24
+
+# Pixels added before quantizing so positions slightly off screen stay positive
+_POSITION_OFFSET = 1024
+# Array type of each section
+SECTION_TYPES = ('H', 'H', 'H', 'B')
+HEADER_FIELDS = 5     # state, level, score low and high words, player count
+PLAYER_FIELDS = 4     # x, y, lives, facing
+FACINGS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+_FACING_CODES = {facing: code for code, facing in enumerate(FACINGS)}
+_STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+
+def message_type(data):
+    """
+    Return the type of a message, or None for an empty one.
+    """
+    return data[0] if data else None
+
+
+def write_message(writer, message):
+    """
+    Queue a message on a TCP stream, length-prefixed.
+    :return: Bytes written.
+    """
+    writer.write(FRAMING.pack(len(message)) + message)
+    return len(message) + FRAMING.size
+
+
+async def read_message(reader, limit=MAX_DATAGRAM):
+    """
+    Read one length-prefixed message from a TCP stream.
+    :param limit: Longest message accepted; the peer cannot make us buffer more.
+    :raises asyncio.IncompleteReadError: If the stream ends first.
+    :raises ConnectionError: If the length prefix exceeds the limit.
+    """
+    (length,) = FRAMING.unpack(await reader.readexactly(FRAMING.size))
+    if length > limit:
+        raise ConnectionError(f"Message of {length} bytes exceeds the {limit} byte limit")
+    return await reader.readexactly(length)
+
+
+def capture_frame(game, quantum=NET_POSITION_QUANTUM):
+    """
+    Return the networked state of a game as a tuple of section arrays.
+    """
+    offset = _POSITION_OFFSET
+    score = max(0, game.player.score)
+    header = array('H', (_STATE_CODES[game.state], game.current_level_index,
+                         score & 0xFFFF, (score >> 16) & 0xFFFF, len(game.players)))
+    for player in game.players:
+        rect = player.rect
+        header.extend(((rect.x + offset) // quantum, (rect.y + offset) // quantum,
+                       min(max(0, player.lives), 0xFFFF), _FACING_CODES.get(player.facing, 0)))
+
+    fleet = game.enemies
+    enemies = array('H')
+    for x, y, alive in zip(fleet.x[:fleet.count], fleet.y[:fleet.count], fleet.alive[:fleet.count]):
+        if alive:
+            enemies.append((x + offset) // quantum)
+            enemies.append((y + offset) // quantum)
+
+    proj = game.projectiles
+    count = proj.count
+    bullets = array('H')
+    for x, y, owner, alive in zip(proj.x[:count], proj.y[:count], proj.owner[:count], proj.alive[:count]):
+        if alive:
+            bullets.append((x + offset) // quantum)
+            bullets.append((y + offset) // quantum)
+            bullets.append(owner)
+
+    walls = array('B', bytes(game.walls.kinds))
+    walls.frombytes(bytes(game.walls.health))
+    return header, enemies, bullets, walls
+
+
+def encode_delta(frame, baseline=None):
+    """
+    Return a frame delta-coded against a baseline frame (None: against zeros).
+    """
+    out = bytearray()
+    for section, values in enumerate(frame):
+        base = baseline[section] if baseline is not None else None
+        _encode_section(out, values, base)
+    return bytes(out)
+
+
+def decode_delta(data, offset=0, baseline=None):
+    """
+    Rebuild a frame from encode_delta() output and the same baseline.
+    :raises ValueError: If the data is malformed or does not fit the baseline.
+    """
+    frame = []
+    try:
+        for section, typecode in enumerate(SECTION_TYPES):
+            base = baseline[section] if baseline is not None else None
+            values, offset = _decode_section(data, offset, base, typecode)
+            frame.append(values)
+    except IndexError:
+        raise ValueError("Snapshot is truncated") from None
+    return tuple(frame)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _encode_section(out, values, base):
+    """
+    Append one section: varint(length << 1 | changed), then for a changed
+    section the zigzag varint difference of every value from the base, a
+    run of unchanged values being written as a zero byte and the run length.
+    """
+    count = len(values)
+    if base is not None and values == base:
+        _write_varint(out, count << 1)
+        return
+    _write_varint(out, count << 1 | 1)
+    known = len(base) if base is not None else 0
+    run = 0
+    for i, value in enumerate(values):
+        d = value - base[i] if i < known else value
+        if not d:
+            run += 1
+            continue
+        if run:
+            out.append(0)
+            _write_varint(out, run)
+            run = 0
+        z = d << 1 if d > 0 else (-d << 1) - 1
+        if z < 0x80:
+            out.append(z)
+        elif z < 0x4000:
+            out.append((z & 0x7F) | 0x80)
+            out.append(z >> 7)
+        else:
+            _write_varint(out, z)
+    if run:
+        out.append(0)
+        _write_varint(out, run)
+
+
+def _decode_section(data, offset, base, typecode):
+    head, offset = _read_varint(data, offset)
+    count = head >> 1
+    known = len(base) if base is not None else 0
+    if not head & 1:
+        if known != count:
+            raise ValueError("Unchanged section does not match the baseline")
+        return base, offset
+    values = array(typecode)
+    mask = (1 << (8 * values.itemsize)) - 1
+    while len(values) < count:
+        i = len(values)
+        if data[offset] == 0:
+            run, offset = _read_varint(data, offset + 1)
+            if i + run > count:
+                raise ValueError("Run past the end of a section")
+            if i < known:
+                values.extend(base[i:min(i + run, known)])
+            values.extend([0] * (i + run - max(i, min(i + run, known))))
+            continue
+        z, offset = _read_varint(data, offset)
+        d = -((z + 1) >> 1) if z & 1 else z >> 1
+        values.append(((base[i] if i < known else 0) + d) & mask)
+    return values, offset
+
+
+class NetState:
+    """
+    A decoded frame in pixels, as a client sees the game.
+    """
+    __slots__ = ('tick', 'state', 'level', 'score', 'players', 'enemies', 'bullets', 'kinds', 'health')
+
+    def __init__(self, tick, frame, quantum=NET_POSITION_QUANTUM):
+        """
+        :param tick: Server tick the frame was captured after.
+        :param frame: Section arrays from decode_delta().
+        :param quantum: Pixels per position unit.
+        """
+        header, enemies, bullets, walls = frame
+        offset = _POSITION_OFFSET
+        self.tick = tick
+        self.state = STATES[header[0]] if header[0] < len(STATES) else 'RUN'
+        self.level = header[1]
+        self.score = header[2] | header[3] << 16
+        # (x, y, lives, facing) per player slot
+        self.players = []
+        for i in range(header[4]):
+            x, y, lives, facing = header[HEADER_FIELDS + i * PLAYER_FIELDS:HEADER_FIELDS + (i + 1) * PLAYER_FIELDS]
+            self.players.append((x * quantum - offset, y * quantum - offset, lives, FACINGS[facing % len(FACINGS)]))
+        self.enemies = [(enemies[i] * quantum - offset, enemies[i + 1] * quantum - offset)
+                        for i in range(0, len(enemies) - 1, 2)]
+        self.bullets = [(bullets[i] * quantum - offset, bullets[i + 1] * quantum - offset, bullets[i + 2])
+                        for i in range(0, len(bullets) - 2, 3)]
+        cells = len(walls) // 2
+        self.kinds = walls[:cells]
+        self.health = walls[cells:]
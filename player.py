@@ -2,35 +2,46 @@
 player.py: Defines the Player class for movement, shooting, and collision handling.
 """
 
+import logging
+
 import pygame
 from training_game.settings import PLAYER_SPEED, SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_LIVES
-from training_game.bullet import Bullet
+from training_game.projectiles import OWNER_PLAYER
+from training_game.utils import lerp_rect
 from training_game import logger
 
 class Player:
     """
     Represents the player-controlled tank.
     """
-    def __init__(self, x, y):
+    __slots__ = ('rect', 'prev_pos', 'lives', 'score', 'projectiles', 'shoot_cooldown', 'facing', 'color')
+
+    def __init__(self, x, y, projectiles, color=(0, 255, 0)):
         """
         Initialize the player.
         :param x: Initial x-coordinate of the player.
         :param y: Initial y-coordinate of the player.
+        :param projectiles: ProjectileSystem that fired bullets are added to.
+        :param color: Fill colour of the tank (green for player one).
         """
         self.rect = pygame.Rect(x, y, 40, 40)  # Player size is 40x40
+        # Position at the start of the current tick, for render interpolation
+        self.prev_pos = (x, y)
         self.lives = PLAYER_LIVES
         self.score = 0
-        self.bullets = []
+        self.projectiles = projectiles
         self.shoot_cooldown = 0
         # Facing: one of (0,-1), (0,1), (1,0), (-1,0). Default faces up.
         self.facing = (0, -1)
+        self.color = color
 
     def handle_input(self, keys, walls):
         """
         Handle player input for movement, considering wall collisions.
         :param keys: The keys currently pressed.
-        :param walls: List of wall objects to check for collisions.
+        :param walls: TileGrid of the level walls.
         """
+        self.prev_pos = self.rect.topleft
         dx, dy = 0, 0
         if keys[pygame.K_w] or keys[pygame.K_UP]:
             dy = -PLAYER_SPEED
@@ -45,22 +56,23 @@ class Player:
             dx = PLAYER_SPEED
             self.facing = (1, 0)
 
-        if dx != 0 or dy != 0:
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug and (dx != 0 or dy != 0):
             logger.debug("Player trying to move: dx=%s, dy=%s, walls count=%s", dx, dy, len(walls))
 
         # Check for collisions before moving
         new_rect = self.rect.move(dx, 0)
-        collision_x = any(new_rect.colliderect(wall.rect) for wall in walls)
+        collision_x = walls.collide(new_rect) is not None
         if not collision_x:
             self.rect.x = new_rect.x
-        else:
+        elif debug:
             logger.debug("Player blocked in X direction at %s", self.rect.topleft)
 
         new_rect = self.rect.move(0, dy)
-        collision_y = any(new_rect.colliderect(wall.rect) for wall in walls)
+        collision_y = walls.collide(new_rect) is not None
         if not collision_y:
             self.rect.y = new_rect.y
-        else:
+        elif debug:
             logger.debug("Player blocked in Y direction at %s", self.rect.topleft)
 
     def shoot(self):
@@ -74,44 +86,31 @@ class Player:
             fx, fy = self.facing
             spawn_x = self.rect.centerx + fx * (self.rect.width // 2 + 2)
             spawn_y = self.rect.centery + fy * (self.rect.height // 2 + 2)
-            bullet = Bullet(spawn_x, spawn_y, self.facing)
-            self.bullets.append(bullet)
-            logger.info("Player fired a bullet at %s. Total bullets: %s", self.rect.topleft, len(self.bullets))
+            self.projectiles.spawn(spawn_x, spawn_y, self.facing, OWNER_PLAYER)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Player fired a bullet at %s. Total bullets: %s", self.rect.topleft, self.projectiles.count)
             self.shoot_cooldown = 20  # Cooldown in frames
 
-    def update(self, walls):
+    def update(self):
         """
-        Update the player state.
-        :param walls: List of wall objects to check for bullet collisions.
+        Update the player state. Bullets are advanced by the ProjectileSystem.
         """
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
 
-        # Update bullets and collect walls to remove
-        walls_to_remove = []
-        for bullet in self.bullets[:]:
-            result = bullet.update(walls)
-            should_remove_bullet = result[0] if isinstance(result, tuple) else result
-            wall_to_remove = result[1] if isinstance(result, tuple) and len(result) > 1 else None
-            
-            if wall_to_remove and wall_to_remove not in walls_to_remove:
-                walls_to_remove.append(wall_to_remove)
-            
-            is_off = bullet.is_off_screen()
-            if should_remove_bullet or is_off:
-                logger.debug("Player bullet at %s removed. Collision: %s, Off-screen: %s", bullet.rect.topleft, should_remove_bullet, is_off)
-                self.bullets.remove(bullet)
-        
-        # Remove destroyed walls
-        for wall in walls_to_remove:
-            if wall in walls:
-                walls.remove(wall)
+    def place(self, x, y):
+        """
+        Move the player to a new position without interpolating from the old one.
+        """
+        self.rect.topleft = (x, y)
+        self.prev_pos = (x, y)
 
-    def render(self, surface):
+    def render(self, surface, alpha=1.0):
         """
-        Render the player and its bullets.
+        Render the player.
         :param surface: The surface to draw on.
+        :param alpha: Interpolation factor between the previous tick's
+            position (0.0) and the current one (1.0).
+        :return: The screen area that was drawn.
         """
-        pygame.draw.rect(surface, (0, 255, 0), self.rect)  # Green player
-        for bullet in self.bullets:
-            bullet.render(surface)
\ No newline at end of file
+        return pygame.draw.rect(surface, self.color, lerp_rect(self.prev_pos, self.rect, alpha))
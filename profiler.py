@@ -0,0 +1,132 @@
+"""
+profiler.py: Defines the FrameProfiler class, rolling per-phase frame timings with percentiles.
+"""
+
+import csv
+import json
+from collections import deque
+from pathlib import Path
+
+import pygame
+from training_game.settings import FPS, PROFILE_WINDOW
+
+# Order in which phases are reported
+PHASES = ('events', 'movement', 'projectiles', 'collisions', 'render', 'flip', 'frame')
+PERCENTILES = (50, 95, 99)
+OVERLAY_REFRESH = 30  # Frames between overlay rebuilds
+OVERLAY_FONT_SIZE = 14  # Monospace, so the columns line up
+OVERLAY_LINE_HEIGHT = 16
+OVERLAY_BACKGROUND = (0, 0, 0, 180)
+OVERLAY_COLOR = (0, 255, 0)
+OVERLAY_OVER_BUDGET_COLOR = (255, 80, 80)
+
+
+def percentile(sorted_values, p):
+    """
+    Return the p-th percentile (nearest rank) of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class FrameProfiler:
+    """
+    Keeps the last `window` durations of each frame phase and reports
+    mean, p50/p95/p99 and max in milliseconds. Update phases are recorded
+    once per simulation tick, the other phases once per frame; 'frame' is
+    the whole frame's work excluding the sleep in clock.tick().
+    """
+    def __init__(self, window=PROFILE_WINDOW, budget_ms=1000.0 / FPS):
+        """
+        :param window: Samples kept per phase.
+        :param budget_ms: Frame budget; frames above it are counted as over budget.
+        """
+        self.window = window
+        self.budget_ms = budget_ms
+        self.samples = {name: deque(maxlen=window) for name in PHASES}
+        self.frames = 0
+        self.over_budget = 0
+        self._overlay = None
+        self._overlay_frame = None
+        self._font = None
+
+    def add(self, phase, seconds):
+        """
+        Record one duration (in seconds, e.g. a perf_counter() difference).
+        """
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.window)
+        samples.append(seconds * 1000.0)
+        if phase == 'frame':
+            self.frames += 1
+            if seconds * 1000.0 > self.budget_ms:
+                self.over_budget += 1
+
+    def stats(self):
+        """
+        Return {phase: {'count', 'mean', 'p50', 'p95', 'p99', 'max'}} in
+        milliseconds over the current window, for phases with samples.
+        """
+        result = {}
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            values = sorted(samples)
+            row = {'count': len(values), 'mean': sum(values) / len(values)}
+            for p in PERCENTILES:
+                row[f'p{p}'] = percentile(values, p)
+            row['max'] = values[-1]
+            result[name] = row
+        return result
+
+    def summary(self):
+        """
+        Return the stats plus frame totals, as exported by export().
+        """
+        return {'budget_ms': self.budget_ms, 'frames': self.frames,
+                'over_budget': self.over_budget, 'phases': self.stats()}
+
+    def export(self, path):
+        """
+        Write the summary to a .json file, or one row per phase to a .csv file.
+        :param path: Output path; the format follows its extension.
+        """
+        path = Path(path)
+        if path.suffix.lower() == '.json':
+            path.write_text(json.dumps(self.summary(), indent=2), encoding='utf-8')
+            return
+        columns = ['phase', 'count', 'mean'] + [f'p{p}' for p in PERCENTILES] + ['max']
+        with path.open('w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for name, row in self.stats().items():
+                writer.writerow([name] + [round(row[c], 4) if c != 'count' else row[c] for c in columns[1:]])
+
+    def overlay(self):
+        """
+        Return a Surface with the current stats, rebuilt every
+        OVERLAY_REFRESH frames so showing it does not re-rasterize text per frame.
+        """
+        if self._overlay is not None and self.frames - self._overlay_frame < OVERLAY_REFRESH:
+            return self._overlay
+        if self._font is None:
+            self._font = pygame.font.SysFont('monospace', OVERLAY_FONT_SIZE)
+        font = self._font
+        stats = self.stats()
+        lines = [(f"{'phase':<12}{'p50':>7}{'p95':>7}{'p99':>7}  ms", OVERLAY_COLOR)]
+        for name, row in stats.items():
+            color = OVERLAY_OVER_BUDGET_COLOR if name == 'frame' and row['p95'] > self.budget_ms else OVERLAY_COLOR
+            lines.append((f"{name:<12}{row['p50']:>7.2f}{row['p95']:>7.2f}{row['p99']:>7.2f}", color))
+        lines.append((f"over budget: {self.over_budget}/{self.frames}", OVERLAY_COLOR))
+        rendered = [font.render(text, True, color) for text, color in lines]
+        width = max(r.get_width() for r in rendered) + 8
+        surface = pygame.Surface((width, OVERLAY_LINE_HEIGHT * len(rendered) + 8), pygame.SRCALPHA)
+        surface.fill(OVERLAY_BACKGROUND)
+        for i, r in enumerate(rendered):
+            surface.blit(r, (4, 4 + i * OVERLAY_LINE_HEIGHT))
+        self._overlay = surface
+        self._overlay_frame = self.frames
+        return surface
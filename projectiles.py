@@ -0,0 +1,247 @@
+"""
+projectiles.py: Defines the ProjectileSystem, which stores and updates every bullet in the game.
+"""
+
+import logging
+from array import array
+
+import pygame
+from training_game.settings import BULLET_SPEED, SCREEN_WIDTH, SCREEN_HEIGHT
+from training_game.utils import swept_entry_time
+from training_game import logger
+
+# Bullet owners
+OWNER_PLAYER = 0
+OWNER_ENEMY = 1
+
+BULLET_SIZE = 5  # Bullets are 5x5
+BULLET_COLORS = {
+    OWNER_PLAYER: (255, 255, 0),  # Yellow player bullets
+    OWNER_ENEMY: (255, 0, 0),     # Red enemy bullets
+}
+
+
+class ProjectileSystem:
+    """
+    Holds all live bullets as parallel arrays (structure of arrays) instead of
+    one object per shot. A bullet is a slot index into these arrays.
+
+    The arrays only grow: slots freed by compact() are overwritten by later
+    spawns, so steady firing allocates nothing. Updates are plain Python
+    loops over the slots, not vector math: a step costs about what it did
+    with Bullet objects, and the gain is memory (about 20 bytes per bullet
+    against 137 for a Bullet and its Rect) and no per-shot allocation.
+
+    Each tick a bullet travels the segment from (px, py) to (x, y), and all
+    collision tests are swept along it, so bullets cannot tunnel through
+    walls or tanks however far they move per tick.
+    """
+    def __init__(self):
+        """
+        Initialize an empty projectile system.
+        """
+        self.x = array('i')
+        self.y = array('i')
+        self.px = array('i')  # Position at the start of the current tick
+        self.py = array('i')
+        self.dx = array('b')
+        self.dy = array('b')
+        self.owner = array('b')
+        self.alive = bytearray()
+        self.count = 0  # Slots in use; arrays may hold more (free) slots
+        # (slot, wall) pairs found by update(); applied by apply_wall_hits()
+        self.wall_hits = []
+
+    @property
+    def capacity(self):
+        """
+        Number of allocated slots, in use or free.
+        """
+        return len(self.alive)
+
+    def spawn(self, x, y, direction, owner):
+        """
+        Add a bullet.
+        :param x: Initial x-coordinate of the bullet.
+        :param y: Initial y-coordinate of the bullet.
+        :param direction: Direction of the bullet (tuple dx, dy).
+        :param owner: OWNER_PLAYER or OWNER_ENEMY.
+        :return: Slot index of the new bullet.
+        """
+        index = self.count
+        if index < len(self.alive):
+            # Reuse a free slot
+            self.x[index] = x
+            self.y[index] = y
+            self.px[index] = x
+            self.py[index] = y
+            self.dx[index] = direction[0]
+            self.dy[index] = direction[1]
+            self.owner[index] = owner
+            self.alive[index] = 1
+        else:
+            self.x.append(x)
+            self.y.append(y)
+            self.px.append(x)
+            self.py.append(y)
+            self.dx.append(direction[0])
+            self.dy.append(direction[1])
+            self.owner.append(owner)
+            self.alive.append(1)
+        self.count = index + 1
+        return index
+
+    def kill(self, index):
+        """
+        Mark a bullet as dead. Its slot is reclaimed by the next compact().
+        """
+        self.alive[index] = 0
+
+    def rect(self, index):
+        """
+        Return the pygame.Rect of a bullet slot.
+        """
+        return pygame.Rect(self.x[index], self.y[index], BULLET_SIZE, BULLET_SIZE)
+
+    def swept_rect(self, index):
+        """
+        Return the pygame.Rect covering a bullet's whole path this tick.
+        """
+        x0, y0, x1, y1 = self.px[index], self.py[index], self.x[index], self.y[index]
+        return pygame.Rect(min(x0, x1), min(y0, y1), abs(x1 - x0) + BULLET_SIZE, abs(y1 - y0) + BULLET_SIZE)
+
+    def hit_time(self, index, target):
+        """
+        Return when a bullet's path this tick first overlaps a target rect.
+        :return: Fraction of the path in [0, 1), or None if it misses.
+        """
+        x0, y0 = self.px[index], self.py[index]
+        return swept_entry_time((x0, y0, BULLET_SIZE, BULLET_SIZE),
+                                self.x[index] - x0, self.y[index] - y0, target)
+
+    def hit_time_between(self, a, b):
+        """
+        Return when two bullets' paths this tick first overlap, using their
+        relative motion, or None if they pass without touching.
+        """
+        ax, ay, bx, by = self.px[a], self.py[a], self.px[b], self.py[b]
+        dx = (self.x[a] - ax) - (self.x[b] - bx)
+        dy = (self.y[a] - ay) - (self.y[b] - by)
+        return swept_entry_time((ax, ay, BULLET_SIZE, BULLET_SIZE), dx, dy,
+                                (bx, by, BULLET_SIZE, BULLET_SIZE))
+
+    def count_owned(self, owner):
+        """
+        Return the number of live bullets fired by the given owner.
+        """
+        owners = self.owner
+        alive = self.alive
+        return sum(1 for i in range(self.count) if alive[i] and owners[i] == owner)
+
+    def update(self, walls):
+        """
+        Advance every bullet, one loop iteration per slot. A bullet that
+        leaves the screen is killed. A bullet whose path hits a wall is
+        stopped at the point of contact and queued in wall_hits; the wall
+        takes damage in apply_wall_hits(), after tanks nearer along the path
+        had a chance to absorb the shot.
+        :param walls: TileGrid of the level walls.
+        """
+        xs, ys, pxs, pys, dxs, dys, alive = self.x, self.y, self.px, self.py, self.dx, self.dy, self.alive
+        size = BULLET_SIZE
+        sweep = walls.sweep
+        hits = self.wall_hits
+        hits.clear()
+        for i in range(self.count):
+            if not alive[i]:
+                continue
+            x0 = xs[i]
+            y0 = ys[i]
+            pxs[i] = x0
+            pys[i] = y0
+            step_x = dxs[i] * BULLET_SPEED
+            step_y = dys[i] * BULLET_SPEED
+
+            wall, t = sweep((x0, y0, size, size), step_x, step_y)
+            if wall is not None:
+                # Stop at the point of contact
+                xs[i] = x0 + int(step_x * t)
+                ys[i] = y0 + int(step_y * t)
+                hits.append((i, wall))
+                continue
+
+            x = x0 + step_x
+            y = y0 + step_y
+            xs[i] = x
+            ys[i] = y
+            if x + size < 0 or x > SCREEN_WIDTH or y + size < 0 or y > SCREEN_HEIGHT:
+                alive[i] = 0
+
+    def apply_wall_hits(self, walls):
+        """
+        Kill bullets queued in wall_hits that are still alive and damage the
+        walls they hit.
+        :param walls: TileGrid of the level walls.
+        """
+        alive = self.alive
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for i, wall in self.wall_hits:
+            if not alive[i]:
+                continue  # Absorbed by a tank before reaching the wall
+            alive[i] = 0
+            if wall.destructible:
+                if debug:
+                    logger.debug("Bullet hit destructible wall at %s. Wall health: %s", wall.rect.topleft, wall.health)
+                if walls.damage(wall) and logger.isEnabledFor(logging.INFO):
+                    logger.info("Wall at %s destroyed.", wall.rect.topleft)
+            elif debug:
+                logger.debug("Bullet hit indestructible wall at %s.", wall.rect.topleft)
+        self.wall_hits.clear()
+
+    def compact(self):
+        """
+        Drop dead bullets by moving live slots down, in one loop over the
+        slots. The freed slots at the end stay allocated for reuse.
+        """
+        xs, ys, pxs, pys = self.x, self.y, self.px, self.py
+        dxs, dys, owners, alive = self.dx, self.dy, self.owner, self.alive
+        write = 0
+        for read in range(self.count):
+            if alive[read]:
+                if write != read:
+                    xs[write] = xs[read]
+                    ys[write] = ys[read]
+                    pxs[write] = pxs[read]
+                    pys[write] = pys[read]
+                    dxs[write] = dxs[read]
+                    dys[write] = dys[read]
+                    owners[write] = owners[read]
+                    alive[write] = 1
+                write += 1
+        self.count = write
+
+    def clear(self):
+        """
+        Remove all bullets, keeping the slots allocated.
+        """
+        self.count = 0
+        self.wall_hits.clear()
+
+    def render(self, surface, alpha=1.0):
+        """
+        Render every live bullet.
+        :param surface: The surface to draw on.
+        :param alpha: Interpolation factor between each bullet's position at
+            the start of the tick (0.0) and its current one (1.0).
+        :return: List of the screen areas that were drawn.
+        """
+        xs, ys, owners, alive = self.x, self.y, self.owner, self.alive
+        size = BULLET_SIZE
+        draw = pygame.draw.rect
+        if alpha >= 1.0:
+            return [draw(surface, BULLET_COLORS[owners[i]], (xs[i], ys[i], size, size))
+                    for i in range(self.count) if alive[i]]
+        pxs, pys = self.px, self.py
+        return [draw(surface, BULLET_COLORS[owners[i]],
+                     (round(pxs[i] + (xs[i] - pxs[i]) * alpha), round(pys[i] + (ys[i] - pys[i]) * alpha), size, size))
+                for i in range(self.count) if alive[i]]
@@ -0,0 +1,462 @@
+"""
+replay.py: Records the per-tick input of a game and replays it headless at full speed.
+
+A game is fully determined by its RNG seed, start level and, for every
+tick, the held keys and the key presses handled before it. InputRecorder
+captures exactly that, plus a full-state keyframe (see snapshot.py) every
+REPLAY_KEYFRAME_INTERVAL ticks. Replays are fed back through
+Game.apply_input() and Game.update() with no display, so a recorded session
+can be reproduced bit for bit or used as a repeatable performance workload.
+
+ReplayFile reads a saved replay through mmap. Seeking to a tick restores
+the keyframe at or before it and simulates only the ticks in between, so
+jumping around an hour-long session costs at most one keyframe interval
+of simulation. Playing from the start needs no keyframe: a new game with
+the recorded seed and level is fed the input, so a recording still plays
+on a build whose snapshot layout changed. Only recordings of a game that
+was restored from a snapshot (for example after --resume) start from
+their first keyframe.
+
+Binary layout (little endian): header (magic, format version, seed, start
+level, sim rate, tick count, keyframe interval, run count, key press count,
+keyframe count, flags); one (key mask, length) record per run of identical held
+keys; one (tick, key, character) record per key press; the keyframe
+snapshots; and an index with one (tick, offset, size, run, position in
+run, key presses before it) record per keyframe. Ticks count from the
+start of the recording.
+"""
+
+import mmap
+import struct
+import time
+from array import array
+from pathlib import Path
+
+import pygame
+from training_game import snapshot
+from training_game.input_source import KeyState
+from training_game.settings import SIM_RATE, REPLAY_KEYFRAME_INTERVAL
+
+_MAGIC = b"IBRP"
+_VERSION = 3
+_HEADER = struct.Struct("<4sHqHHIIIIIH")
+# Header flag: the recording starts from keyframe 0, not from a new game
+FROM_SNAPSHOT = 1
+_RUN = struct.Struct("<HI")
+_KEY = struct.Struct("<IiI")
+_INDEX = struct.Struct("<IQIIII")
+
+# Held keys the game reads, one bit each in the recorded key mask
+RECORDED_KEYS = (
+    pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT,
+    pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d,
+    pygame.K_SPACE, pygame.K_n, pygame.K_RETURN,
+)
+# Set when some other key is held: the game only checks that any key is down
+OTHER_KEY_BIT = 1 << len(RECORDED_KEYS)
+# Stands in for "some other key" in a replayed KeyState
+OTHER_KEY = -1
+
+
+def encode_keys(keys):
+    """
+    Pack a key state (pygame.key.get_pressed() or KeyState) into a key mask.
+    """
+    mask = 0
+    for bit, key in enumerate(RECORDED_KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    if not mask and any(keys):
+        mask = OTHER_KEY_BIT
+    return mask
+
+
+_decoded = {}
+
+
+def decode_keys(mask):
+    """
+    Return the KeyState for a key mask. States are shared between calls.
+    """
+    state = _decoded.get(mask)
+    if state is None:
+        pressed = [key for bit, key in enumerate(RECORDED_KEYS) if mask & (1 << bit)]
+        if mask & OTHER_KEY_BIT:
+            pressed.append(OTHER_KEY)
+        state = _decoded[mask] = KeyState(pressed)
+    return state
+
+
+def _new_game(seed, level, sim_rate):
+    from training_game.game import Game
+    game = Game(headless=True, sim_rate=sim_rate or SIM_RATE, seed=seed)
+    # Replaying a session must not add its score to the Hall of Fame again
+    game.save_scores = False
+    if level:
+        game.current_level_index = level
+        game.start_level(level)
+    return game
+
+
+def _feed(game, masks, keys, next_key, tick, stop, times=None, hashes=None):
+    """
+    Run ticks [tick, stop) of a recording on a game that is at `tick`.
+    :param masks: Iterator over the key masks from `tick` on.
+    :param keys: Key presses (tick, key, character); keys[next_key] is the first not handled yet.
+    :param times: If given, an array('d') the duration of each tick is appended to.
+    :param hashes: If given, an array('Q') each tick's game.state_hash is appended to.
+    :return: Tuple (recording tick the game stopped at, next key press), to continue from.
+    """
+    apply_input, update, handle_key = game.apply_input, game.update, game.handle_key
+    key_count = len(keys)
+    clock = time.perf_counter
+    while tick < stop and game.running:
+        mask = next(masks, None)
+        if mask is None:
+            break
+        began = clock() if times is not None else 0.0
+        while next_key < key_count and keys[next_key][0] <= tick:
+            handle_key(keys[next_key][1], keys[next_key][2])
+            next_key += 1
+        apply_input(decode_keys(mask))
+        update()
+        if times is not None:
+            times.append(clock() - began)
+        if hashes is not None:
+            hashes.append(game.state_hash)
+        tick += 1
+    return tick, next_key
+
+
+class Replay:
+    """
+    A recording held in memory: seed, start level, the held keys of every
+    tick as run-length encoded (mask, length) runs, the key presses as
+    (tick, key, character) with tick = ticks run before the press, and
+    keyframes as (tick, snapshot bytes, key presses before it).
+    from_snapshot is set when the recorded game had been restored from a
+    snapshot, so playback has to start from keyframe 0.
+    """
+    def __init__(self, seed, level=0, sim_rate=0, runs=(), keys=(), keyframes=(),
+                 keyframe_interval=REPLAY_KEYFRAME_INTERVAL, from_snapshot=False):
+        self.seed = seed
+        self.level = level
+        self.sim_rate = sim_rate
+        self.runs = list(runs)
+        self.keys = list(keys)
+        self.keyframes = list(keyframes)
+        self.keyframe_interval = keyframe_interval
+        self.from_snapshot = from_snapshot
+
+    @property
+    def ticks(self):
+        return sum(length for _, length in self.runs)
+
+    def masks(self):
+        """
+        Yield the key mask of every tick in order.
+        """
+        for mask, length in self.runs:
+            for _ in range(length):
+                yield mask
+
+    def to_bytes(self):
+        runs, keys, keyframes = self.runs, self.keys, self.keyframes
+        parts = [_HEADER.pack(_MAGIC, _VERSION, self.seed, self.level, self.sim_rate, self.ticks,
+                              self.keyframe_interval, len(runs), len(keys), len(keyframes),
+                              FROM_SNAPSHOT if self.from_snapshot else 0)]
+        parts.extend(_RUN.pack(*run) for run in runs)
+        parts.extend(_KEY.pack(tick, key, ord(char) if char else 0) for tick, key, char in keys)
+        offset = _HEADER.size + len(runs) * _RUN.size + len(keys) * _KEY.size
+        parts.extend(data for _, data, _ in keyframes)
+
+        # Index: where each keyframe's tick falls in the run list
+        index = []
+        run, run_start = 0, 0
+        for tick, data, key_index in keyframes:
+            while run < len(runs) and run_start + runs[run][1] <= tick:
+                run_start += runs[run][1]
+                run += 1
+            index.append(_INDEX.pack(tick, offset, len(data), run, tick - run_start, key_index))
+            offset += len(data)
+        parts.extend(index)
+        return b"".join(parts)
+
+    def save(self, path):
+        Path(path).write_bytes(self.to_bytes())
+
+    def new_game(self):
+        """
+        Return a headless Game in the state the recording started from.
+        """
+        return _new_game(self.seed, self.level, self.sim_rate)
+
+    def play(self, game=None, ticks=None):
+        """
+        Run the recording from the start as fast as possible.
+        :param game: Game from new_game() to play into (a new one by default).
+        :param ticks: Stop after this many ticks (default: the whole recording).
+        :return: The Game in its state after the last tick.
+        """
+        if game is None:
+            game = self.new_game()
+        next_key = 0
+        if self.from_snapshot:
+            game.restore(self.keyframes[0][1])
+            next_key = self.keyframes[0][2]
+        _feed(game, self.masks(), self.keys, next_key, 0, self.ticks if ticks is None else ticks)
+        return game
+
+
+class ReplayFile:
+    """
+    A saved replay read through mmap. Only the header, key presses and
+    keyframe ticks are parsed on open; input runs and keyframes are read
+    from the mapping when a seek or playback reaches them.
+
+        with ReplayFile('session.ibr') as replay:
+            game = replay.seek(90000)       # state after 90000 ticks
+            times = replay.tick_times(90000, 90600)
+    """
+    def __init__(self, path):
+        """
+        :raises ValueError: If the file is not a replay of this version.
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Replay is empty")
+        try:
+            self._parse()
+        except ValueError:
+            self.close()
+            raise
+
+    def _parse(self):
+        data = self._map
+        if len(data) < _HEADER.size:
+            raise ValueError("Replay is truncated")
+        (magic, version, self.seed, self.level, self.sim_rate, self.ticks, self.keyframe_interval,
+         self.run_count, key_count, self.keyframe_count, flags) = _HEADER.unpack_from(data)
+        self.from_snapshot = bool(flags & FROM_SNAPSHOT)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a replay of this version")
+        self._runs_offset = _HEADER.size
+        keys_offset = self._runs_offset + self.run_count * _RUN.size
+        self._index_offset = len(data) - self.keyframe_count * _INDEX.size
+        if self._index_offset < keys_offset + key_count * _KEY.size:
+            raise ValueError("Replay is truncated")
+        self.keys = []
+        for i in range(key_count):
+            tick, key, code = _KEY.unpack_from(data, keys_offset + i * _KEY.size)
+            self.keys.append((tick, key, chr(code) if code else ''))
+        self._keyframe_ticks = array('I', (_INDEX.unpack_from(data, self._index_offset + i * _INDEX.size)[0]
+                                           for i in range(self.keyframe_count)))
+        if self.from_snapshot and (not self.keyframe_count or self._keyframe_ticks[0] != 0):
+            raise ValueError("Replay of a restored game has no starting keyframe")
+        if self.keyframe_count:
+            # Keyframes written by a build with another snapshot layout cannot be restored
+            _, offset, size, _, _, _ = _INDEX.unpack_from(data, self._index_offset)
+            try:
+                snapshot.check(data[offset:offset + size])
+            except ValueError as e:
+                if self.from_snapshot:
+                    raise ValueError(f"Replay keyframes are unusable: {e}") from None
+                # Seeking then simulates from the start instead
+                self.keyframe_count = 0
+                self._keyframe_ticks = array('I')
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def masks(self, run=0, position=0):
+        """
+        Yield the key mask of every tick from run `run`, `position` ticks into it.
+        """
+        data, offset, unpack = self._map, self._runs_offset, _RUN.unpack_from
+        for i in range(run, self.run_count):
+            mask, length = unpack(data, offset + i * _RUN.size)
+            for _ in range(length - position):
+                yield mask
+            position = 0
+
+    def keyframe_before(self, tick):
+        """
+        Return the number of the last keyframe at or before tick, or None.
+        Keyframes are evenly spaced, so this is a division.
+        """
+        ticks = self._keyframe_ticks
+        if not ticks or tick < ticks[0]:
+            return None
+        i = min(len(ticks) - 1, (tick - ticks[0]) // max(1, self.keyframe_interval))
+        while i > 0 and ticks[i] > tick:
+            i -= 1
+        return i
+
+    def new_game(self):
+        """
+        Return a headless Game in the state the recording started from.
+        """
+        return _new_game(self.seed, self.level, self.sim_rate)
+
+    def _jump(self, tick, game):
+        """
+        Put game at the keyframe at or before tick (or the start of the recording).
+        :return: Tuple (game, tick, masks iterator, next key press).
+        """
+        frame = self.keyframe_before(tick)
+        # Without a restored start, tick 0 is a new game: keyframes only shorten seeks
+        if frame is not None and not self.from_snapshot and self._keyframe_ticks[frame] == 0:
+            frame = None
+        if frame is None:
+            if game is None or game.tick:
+                game = self.new_game()
+            return game, 0, self.masks(), 0
+        if game is None:
+            game = self.new_game()
+        frame_tick, offset, size, run, position, next_key = _INDEX.unpack_from(
+            self._map, self._index_offset + frame * _INDEX.size)
+        game.restore(self._map[offset:offset + size])
+        return game, frame_tick, self.masks(run, position), next_key
+
+    def seek(self, tick, game=None):
+        """
+        Return a game in the state after `tick` ticks of the recording:
+        restore the nearest keyframe at or before it, then simulate the rest.
+        :param game: Game to restore into (a new one by default).
+        """
+        tick = min(tick, self.ticks)
+        game, at, masks, next_key = self._jump(tick, game)
+        _feed(game, masks, self.keys, next_key, at, tick)
+        return game
+
+    def play(self, game=None, ticks=None):
+        """
+        Run the recording from the start as fast as possible.
+        :param game: Game from new_game() to play into (a new one by default).
+        :param ticks: Stop after this many ticks (default: the whole recording).
+        :return: The Game in its state after the last tick.
+        """
+        game, at, masks, next_key = self._jump(0, game)
+        _feed(game, masks, self.keys, next_key, at, self.ticks if ticks is None else ticks)
+        return game
+
+    def tick_times(self, start, stop):
+        """
+        Seek to `start` and time every tick up to `stop`, to find where a
+        frame-time spike begins without playing the session from the start.
+        :return: array('d') of per-tick update times in seconds; item i is tick start + i.
+        """
+        start = min(start, self.ticks)
+        game, at, masks, next_key = self._jump(start, None)
+        # Catch up to start untimed, then time the rest of the same input stream
+        at, next_key = _feed(game, masks, self.keys, next_key, at, start)
+        times = array('d')
+        _feed(game, masks, self.keys, next_key, at, stop, times)
+        return times
+
+
+    def hashes(self, start=0, stop=None):
+        """
+        Return the state hash after every tick from `start` to `stop` (see
+        state_hash.py). Comparing them between builds or machines shows the
+        first tick at which a run diverges.
+        :return: array('Q'); item i is the hash after tick start + i + 1.
+        """
+        start = min(start, self.ticks)
+        stop = self.ticks if stop is None else min(stop, self.ticks)
+        game, at, masks, next_key = self._jump(start, None)
+        game.enable_state_hash()
+        at, next_key = _feed(game, masks, self.keys, next_key, at, start)
+        hashes = array('Q')
+        _feed(game, masks, self.keys, next_key, at, stop, hashes=hashes)
+        return hashes
+
+
+def first_difference(a, b):
+    """
+    Return the index of the first differing item of two hash arrays, or
+    None if they agree (over the length of the shorter one).
+    """
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return i
+    return None
+
+
+class InputRecorder:
+    """
+    Records a game's input while it runs. Attach it before the first tick:
+
+        recorder = InputRecorder(game)
+        game.run()
+        recorder.replay().save('session.ibr')
+    """
+    def __init__(self, game, level=None, keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        """
+        :param game: Game to record; recording starts now.
+        :param level: Level index the game starts on (default: its current level).
+        :param keyframe_interval: Ticks between full-state keyframes (0 = none).
+        """
+        self.game = game
+        self.seed = game.seed
+        self.level = game.current_level_index if level is None else level
+        self.sim_rate = game.sim_rate
+        self.keyframe_interval = keyframe_interval
+        self.start_tick = game.tick
+        self.from_snapshot = game.restored
+        self.ticks = 0
+        self.runs = []
+        self.keys = []
+        self.keyframes = []
+        self._mask = None
+        self._length = 0
+        game.recorder = self
+
+    def record_input(self, keys):
+        # Keyframes are taken before the tick's input, after its key presses;
+        # a restored game always needs one to start from
+        if (self.ticks == 0 and self.from_snapshot
+                or self.keyframe_interval and self.ticks % self.keyframe_interval == 0):
+            self.keyframes.append((self.ticks, self.game.snapshot(), len(self.keys)))
+        self.ticks += 1
+        mask = encode_keys(keys)
+        if mask == self._mask:
+            self._length += 1
+        else:
+            if self._length:
+                self.runs.append((self._mask, self._length))
+            self._mask = mask
+            self._length = 1
+
+    def record_key(self, tick, key, unicode=''):
+        self.keys.append((tick - self.start_tick, key, unicode[:1]))
+
+    def replay(self):
+        """
+        Return the Replay recorded so far.
+        """
+        runs = list(self.runs)
+        if self._length:
+            runs.append((self._mask, self._length))
+        return Replay(self.seed, self.level, self.sim_rate, runs, self.keys, self.keyframes,
+                      self.keyframe_interval, self.from_snapshot)
+
+
+def benchmark(replay):
+    """
+    Play a replay from the start and return (ticks run, seconds, final game).
+    """
+    game = replay.new_game()
+    start = time.perf_counter()
+    game = replay.play(game)
+    return game.tick, time.perf_counter() - start, game
@@ -0,0 +1,121 @@
+"""
+score_writer.py: Defines the ScoreWriter class, which saves Hall of Fame entries on a background thread.
+"""
+
+import queue
+import threading
+
+from training_game import hall_of_fame
+from training_game import logger
+
+BATCH_WINDOW = 0.05  # Seconds to wait for more submissions before writing a batch
+
+_STOP = object()
+
+
+class ScoreWriter:
+    """
+    Queue of score submissions written to the Hall of Fame by a daemon
+    thread, so a slow disk never stalls a frame.
+
+    Submissions that arrive close together are written as one batch (one
+    file rewrite or one transaction), and identical (name, score) pairs in a
+    batch are coalesced, so a double-pressed Enter saves one entry.
+    Callbacks run on the writer thread; they should only set state that the
+    game loop picks up.
+    """
+    def __init__(self, backend=None, on_saved=None, batch_window=BATCH_WINDOW):
+        """
+        :param backend: Hall of Fame backend (defaults to hall_of_fame.get_backend()).
+        :param on_saved: Called with the list of Entry objects after each batch is written.
+        :param batch_window: Seconds to wait for more submissions before writing.
+        """
+        self.backend = backend
+        self.on_saved = on_saved
+        self.batch_window = batch_window
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        # Started by the first submit(), so games that never save cost no thread
+        self._thread = None
+
+    def submit(self, name, score, callback=None):
+        """
+        Queue a score for saving and return immediately.
+        :param callback: Optional callable invoked with the saved Entry.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+            self._thread.start()
+        self._queue.put((hall_of_fame.make_entry(name, score), callback))
+
+    def flush(self):
+        """
+        Block until every submission queued so far has been written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Write everything still queued and stop the thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            # Gather whatever else arrives within the batch window
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.batch_window)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _write(self, batch):
+        entries = []
+        seen = set()
+        for entry, _ in batch:
+            key = (entry.name, entry.score)
+            if key not in seen:
+                seen.add(key)
+                entries.append(entry)
+        try:
+            backend = self.backend or hall_of_fame.get_backend()
+            backend.add_many(entries)
+        except Exception:
+            self.failed += len(entries)
+            logger.exception("Failed to save %d high score(s).", len(entries))
+            return
+        self.written += len(entries)
+        logger.info("Saved %d high score(s).", len(entries))
+        # A failing callback must not kill the thread, or flush() would wait forever
+        for entry, callback in batch:
+            if callback is not None:
+                try:
+                    callback(entry)
+                except Exception:
+                    logger.exception("Score callback failed.")
+        if self.on_saved is not None:
+            try:
+                self.on_saved(entries)
+            except Exception:
+                logger.exception("Score on_saved callback failed.")
@@ -0,0 +1,401 @@
+"""
+server.py: Defines the GameServer class, an authoritative asyncio server for networked co-op.
+
+The server runs the only Game, headless, at the fixed simulation rate.
+Each client gets a TCP connection for the handshake and, if a UDP
+handshake on the same port succeeds, exchanges input and snapshots as
+datagrams; otherwise everything goes over the TCP stream. Lost input is
+harmless (the server keeps the last held keys) and lost snapshots only
+mean a client's acknowledged baseline is older, so UDP needs no
+retransmission.
+
+Every NET_SNAPSHOT_INTERVAL ticks the state is quantized once (see
+net_protocol.py) and delta-coded per client against the newest snapshot
+that client acknowledged; clients that acknowledged the same tick share
+one encoding.
+"""
+
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+
+from training_game.game import Game
+from training_game import logger
+from training_game import net_protocol as proto
+from training_game.replay import decode_keys
+from training_game.settings import (
+    NET_PORT,
+    NET_SNAPSHOT_INTERVAL,
+    NET_POSITION_QUANTUM,
+    NET_SNAPSHOT_HISTORY,
+    MAX_PLAYERS,
+    MAX_CATCHUP_TICKS,
+    LEVEL_TRANSITION_TIME,
+    PLAYER_LIVES,
+    RANDOM_SEED,
+)
+
+
+class ClientConnection:
+    """
+    Server-side state of one connected client.
+    """
+    def __init__(self, slot, token, writer):
+        self.slot = slot
+        self.token = token
+        self.writer = writer
+        self.udp_addr = None
+        # Held keys from the newest input received
+        self.mask = 0
+        self.sequence = -1
+        # Newest snapshot tick the client has, and its send time echoed for RTT
+        self.ack = proto.NO_BASELINE
+        self.client_time = None
+        self.input_time = 0.0
+        # Frames sent, by tick, that the client may acknowledge
+        self.history = OrderedDict()
+        self.connected_at = time.perf_counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots_sent = 0
+        self.full_snapshots = 0
+        self.inputs_received = 0
+        # Seconds spent encoding and sending this client's snapshots
+        self.send_time = 0.0
+
+    @property
+    def transport(self):
+        return 'udp' if self.udp_addr else 'tcp'
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.on_datagram(data, addr)
+
+
+class GameServer:
+    """
+    Runs a headless Game for up to MAX_PLAYERS networked players.
+
+    When every tank is out of lives the level restarts with full lives (name
+    entry needs a local keyboard), and a finished campaign starts over.
+    """
+    def __init__(self, host='127.0.0.1', port=NET_PORT, level=0, seed=RANDOM_SEED,
+                 snapshot_interval=NET_SNAPSHOT_INTERVAL, quantum=NET_POSITION_QUANTUM, udp=True):
+        """
+        :param host: Address to listen on.
+        :param port: TCP port; the UDP endpoint uses the same number. 0 picks a free port.
+        :param level: Level index to start on.
+        :param seed: Seed of the game's RNG.
+        :param snapshot_interval: Simulation ticks between snapshots.
+        :param quantum: Pixels per network position unit.
+        :param udp: Offer UDP to clients; False streams everything over TCP.
+        """
+        self.host = host
+        self.port = port
+        self.udp_port = 0
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.quantum = quantum
+        self.udp = udp
+        self.game = Game(headless=True, seed=seed)
+        self.game.save_scores = False
+        self.game.current_level_index = level
+        self.game.start_level(level)
+        self.clients = {}           # slot -> ClientConnection
+        self._tokens = {}           # token -> ClientConnection
+        self._udp_clients = {}      # address -> ClientConnection
+        self._tcp_server = None
+        self._udp_transport = None
+        self._ticker = None
+        self._restart_timer = 0.0
+        self.running = False
+        self.ticks = 0
+        # Seconds spent simulating, and capturing frames
+        self.sim_time = 0.0
+        self.capture_time = 0.0
+        # Sum over ticks of the number of connected clients, for per-client averages
+        self.client_ticks = 0
+        self.cpu_start = 0.0
+
+    async def start(self):
+        """
+        Open the TCP and UDP endpoints and start the simulation.
+        """
+        loop = asyncio.get_running_loop()
+        self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        self.port = self._tcp_server.sockets[0].getsockname()[1]
+        if self.udp:
+            try:
+                self._udp_transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _DatagramProtocol(self), local_addr=(self.host, self.port))
+                self.udp_port = self._udp_transport.get_extra_info('sockname')[1]
+            except OSError as e:
+                logger.warning('No UDP endpoint on port %s, clients will use TCP: %s', self.port, e)
+        self.running = True
+        self.cpu_start = time.process_time()
+        self._ticker = asyncio.create_task(self._run_ticks())
+        logger.info('Server listening on %s:%s (UDP %s)', self.host, self.port, self.udp_port or 'off')
+
+    async def serve(self, ticks=None):
+        """
+        Run until stopped, or for a number of ticks.
+        """
+        if not self.running:
+            await self.start()
+        try:
+            while self.running and (ticks is None or self.ticks < ticks):
+                await asyncio.sleep(0.05)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """
+        Close every connection and endpoint.
+        """
+        self.running = False
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        for client in list(self.clients.values()):
+            client.writer.close()
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+
+    # Connections
+
+    async def _handle_tcp(self, reader, writer):
+        client = None
+        try:
+            data = await proto.read_message(reader)
+            if proto.message_type(data) != proto.MSG_HELLO or len(data) < proto.HELLO.size:
+                return
+            _, version, flags = proto.HELLO.unpack_from(data)
+            if version != proto.PROTOCOL_VERSION:
+                proto.write_message(writer, bytes((proto.MSG_REJECT,)) + b"Protocol version mismatch")
+                return
+            client = self._join(writer)
+            if client is None:
+                proto.write_message(writer, bytes((proto.MSG_REJECT,)) + b"Game is full")
+                return
+            walls = self.game.walls
+            udp_port = self.udp_port if flags & proto.HELLO_WANTS_UDP else 0
+            client.bytes_sent += proto.write_message(writer, proto.WELCOME.pack(
+                proto.MSG_WELCOME, proto.PROTOCOL_VERSION, client.slot, client.token, udp_port,
+                self.game.sim_rate, self.snapshot_interval, self.quantum, walls.cols, walls.rows, walls.tile_size))
+            while self.running:
+                data = await proto.read_message(reader)
+                client.bytes_received += len(data) + proto.FRAMING.size
+                kind = proto.message_type(data)
+                if kind == proto.MSG_INPUT:
+                    self._on_input(client, data)
+                elif kind == proto.MSG_USE_TCP and client.udp_addr:
+                    self._udp_clients.pop(client.udp_addr, None)
+                    client.udp_addr = None
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if client is not None:
+                self._leave(client)
+            writer.close()
+
+    def _join(self, writer):
+        """
+        Give a new connection the first free player slot, or None if the game is full.
+        """
+        free = [slot for slot in range(MAX_PLAYERS) if slot not in self.clients]
+        if not free:
+            return None
+        slot = free[0]
+        while len(self.game.players) <= slot:
+            self.game.add_player()
+        # Tokens authenticate UDP input, so they must not be guessable
+        token = secrets.randbits(64)
+        while token in self._tokens:
+            token = secrets.randbits(64)
+        client = ClientConnection(slot, token, writer)
+        self.clients[slot] = client
+        self._tokens[token] = client
+        logger.info('Player %s joined', slot + 1)
+        return client
+
+    def _leave(self, client):
+        self.clients.pop(client.slot, None)
+        self._tokens.pop(client.token, None)
+        if client.udp_addr:
+            self._udp_clients.pop(client.udp_addr, None)
+        logger.info('Player %s left', client.slot + 1)
+
+    def on_datagram(self, data, addr):
+        """
+        Handle one UDP datagram: the UDP handshake or a client's input.
+        """
+        kind = proto.message_type(data)
+        if kind == proto.MSG_UDP_HELLO and len(data) >= proto.UDP_HELLO.size:
+            _, token = proto.UDP_HELLO.unpack_from(data)
+            client = self._tokens.get(token)
+            if client is None:
+                return
+            if client.udp_addr and client.udp_addr != addr:
+                self._udp_clients.pop(client.udp_addr, None)
+            client.udp_addr = addr
+            self._udp_clients[addr] = client
+            client.bytes_received += len(data)
+            reply = proto.UDP_HELLO.pack(proto.MSG_UDP_HELLO, token)
+            self._udp_transport.sendto(reply, addr)
+            client.bytes_sent += len(reply)
+        elif kind == proto.MSG_INPUT:
+            client = self._udp_clients.get(addr)
+            if client is not None:
+                client.bytes_received += len(data)
+                self._on_input(client, data)
+
+    def _on_input(self, client, data):
+        if len(data) < proto.INPUT.size:
+            return
+        _, token, sequence, ack, mask, sent = proto.INPUT.unpack_from(data)
+        # Datagrams can arrive out of order; only newer input counts
+        if token != client.token or sequence <= client.sequence:
+            return
+        client.sequence = sequence
+        client.mask = mask
+        client.inputs_received += 1
+        if ack != proto.NO_BASELINE and (client.ack == proto.NO_BASELINE or ack > client.ack):
+            client.ack = ack
+        client.client_time = sent
+        client.input_time = time.perf_counter()
+
+    # Simulation
+
+    async def _run_ticks(self):
+        """
+        Tick the game at sim_rate, catching up at most MAX_CATCHUP_TICKS at a time.
+        """
+        loop = asyncio.get_running_loop()
+        tick_time = 1.0 / self.game.sim_rate
+        next_tick = loop.time()
+        while self.running:
+            ticks = 0
+            while loop.time() >= next_tick and ticks < MAX_CATCHUP_TICKS:
+                self._tick()
+                next_tick += tick_time
+                ticks += 1
+            if loop.time() >= next_tick:
+                # Too far behind: drop the time instead of spiralling
+                next_tick = loop.time() + tick_time
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    def _tick(self):
+        game = self.game
+        clock = time.perf_counter
+        start = clock()
+        for slot, client in self.clients.items():
+            game.apply_input(decode_keys(client.mask), slot)
+        game.update()
+        self._keep_playing()
+        self.sim_time += clock() - start
+        self.ticks += 1
+        self.client_ticks += len(self.clients)
+        if self.clients and game.tick % self.snapshot_interval == 0:
+            self._send_snapshots()
+
+    def _keep_playing(self):
+        game = self.game
+        if game.state == 'ENTER_NAME':
+            for player in game.players:
+                player.lives = PLAYER_LIVES
+            game.start_level(game.current_level_index)
+        elif game.state == 'CAMPAIGN_COMPLETE':
+            self._restart_timer += 1.0 / game.sim_rate
+            if self._restart_timer >= LEVEL_TRANSITION_TIME:
+                self._restart_timer = 0.0
+                for player in game.players:
+                    player.lives = PLAYER_LIVES
+                game.score = 0
+                game.current_level_index = 0
+                game.start_level(0)
+
+    def _send_snapshots(self):
+        clock = time.perf_counter
+        start = clock()
+        tick = self.game.tick
+        frame = proto.capture_frame(self.game, self.quantum)
+        self.capture_time += clock() - start
+        encoded = {}
+        for client in list(self.clients.values()):
+            begin = clock()
+            history = client.history
+            baseline = client.ack if client.ack in history else proto.NO_BASELINE
+            payload = encoded.get(baseline)
+            if payload is None:
+                payload = encoded[baseline] = proto.encode_delta(
+                    frame, history[baseline] if baseline != proto.NO_BASELINE else None)
+            echo = client.client_time + (begin - client.input_time) if client.client_time is not None else 0.0
+            message = proto.SNAPSHOT.pack(proto.MSG_SNAPSHOT, tick, baseline, echo) + payload
+            self._send(client, message)
+            history[tick] = frame
+            # Frames older than the acknowledged one can no longer be a baseline
+            while len(history) > NET_SNAPSHOT_HISTORY or (
+                    client.ack != proto.NO_BASELINE and next(iter(history)) < client.ack):
+                history.popitem(last=False)
+            client.snapshots_sent += 1
+            if baseline == proto.NO_BASELINE:
+                client.full_snapshots += 1
+            client.send_time += clock() - begin
+
+    def _send(self, client, message):
+        if client.udp_addr and len(message) <= proto.MAX_DATAGRAM:
+            self._udp_transport.sendto(message, client.udp_addr)
+            client.bytes_sent += len(message)
+        else:
+            client.bytes_sent += proto.write_message(client.writer, message)
+
+    # Metrics
+
+    def metrics(self):
+        """
+        Return traffic and CPU figures since start().
+
+        Per-client figures are averaged over the ticks each client was
+        connected: bytes per tick each way, and milliseconds per tick spent
+        encoding and sending its snapshots. The shared cost (simulation and
+        capturing frames) is also reported divided by the connected clients.
+        """
+        ticks = max(1, self.ticks)
+        client_ticks = max(1, self.client_ticks)
+        cpu = time.process_time() - self.cpu_start
+        clients = []
+        for client in self.clients.values():
+            connected = max(1, round((time.perf_counter() - client.connected_at) * self.game.sim_rate))
+            clients.append({
+                'slot': client.slot,
+                'transport': client.transport,
+                'down_bytes_per_tick': client.bytes_sent / connected,
+                'up_bytes_per_tick': client.bytes_received / connected,
+                'bytes_per_snapshot': client.bytes_sent / max(1, client.snapshots_sent),
+                'snapshots': client.snapshots_sent,
+                'full_snapshots': client.full_snapshots,
+                'inputs': client.inputs_received,
+                'send_ms_per_tick': client.send_time * 1000 / connected,
+            })
+        return {
+            'ticks': self.ticks,
+            'clients': clients,
+            'sim_ms_per_tick': self.sim_time * 1000 / ticks,
+            'capture_ms_per_snapshot': self.capture_time * 1000 / max(1, self.ticks // self.snapshot_interval),
+            'shared_ms_per_client_tick': (self.sim_time + self.capture_time) * 1000 / client_ticks,
+            'process_cpu_ms_per_tick': cpu * 1000 / ticks,
+        }
+
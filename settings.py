@@ -9,6 +9,9 @@ SCREEN_HEIGHT = 600
 # Tile size
 TILE_SIZE = 40
 
+# Broadphase cell size for moving entities (tanks and bullets)
+SPATIAL_HASH_CELL = TILE_SIZE * 2
+
 # Colors
 COLOR_BLACK = (0, 0, 0)
 COLOR_WHITE = (255, 255, 255)
@@ -26,12 +29,49 @@ ENEMY_SPEED = 2
 LEVELS = ["level1", "level2", "level3"]
 LEVEL_TRANSITION_TIME = 2.0  # seconds
 ENEMY_BASE_SPEED = ENEMY_SPEED
+ENEMY_WANDER_TICKS = 30  # Random wandering after an enemy gets stuck, before it resumes hunting
+MAX_ALIVE_ENEMIES = 24  # Default cap on enemies alive at once; the rest wait in the spawn queue
+WAVE_INTERVAL = 8.0  # Default seconds between enemy waves
+SPAWNS_PER_TICK = 2  # Most enemies released in one tick, so a wave never lands in a single frame
+SPAWN_POINTS = 6  # Enemy spawn points picked automatically when a level defines no 'E' tiles
+
+# Rendering: above this many changed areas per frame a full flip is cheaper
+MAX_DIRTY_RECTS = 256
 
 # Game settings
-FPS = 60
+FPS = 60  # Render frame cap
+SIM_RATE = 60  # Simulation ticks per second; speeds and cooldowns are per tick
+MAX_CATCHUP_TICKS = 5  # Most ticks run in one frame before dropping time
+PROFILE_WINDOW = 600  # Frame timing samples kept per phase for percentiles (about 10 s)
+PROFILE_OVERLAY_POS = (SCREEN_WIDTH - 250, 10)  # Top-left of the F3 frame timing overlay
 ENEMY_COUNT = 5
 PLAYER_LIVES = 3
+MAX_PLAYERS = 2  # Co-op tanks per game (see Game.add_player and server.py)
+PLAYER_COLORS = ((0, 255, 0), (0, 160, 255))  # Tank colour per player slot
 POINTS_PER_ENEMY = 100
 
+# Hall of Fame storage: "json" (top scores only) or "sqlite" (full history)
+HALL_OF_FAME_BACKEND = "json"
+HALL_OF_FAME_PATH = None  # None = the backend's default file next to the package
+
+# Logging (see logging_setup.py): records per second and burst allowed per
+# call site, and the fraction of DEBUG records kept (one in LOG_SAMPLE_EVERY)
+LOG_RATE_LIMIT = 20
+LOG_RATE_BURST = 50
+LOG_SAMPLE_EVERY = 10
+
+# Checkpoint written on advancing to a level (see Game.save_checkpoint); None = checkpoint.ibs next to the package
+CHECKPOINT_PATH = None
+
 # Random seed for determinism
-RANDOM_SEED = 42
\ No newline at end of file
+RANDOM_SEED = 42
+# Ticks between full-state keyframes in replay files (see replay.py); seeking
+# re-simulates at most this many ticks
+REPLAY_KEYFRAME_INTERVAL = 300
+
+# Networked co-op (see server.py / client.py)
+NET_PORT = 47800  # TCP port; the UDP endpoint listens on the same number
+NET_SNAPSHOT_INTERVAL = 2  # Simulation ticks between state snapshots sent to each client
+NET_POSITION_QUANTUM = 2  # Pixels per unit of position sent over the network
+NET_SNAPSHOT_HISTORY = 32  # Sent snapshots kept per client as delta baselines
+NET_UDP_TIMEOUT = 1.0  # Seconds a client waits for the UDP handshake before falling back to TCP
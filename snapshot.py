@@ -0,0 +1,217 @@
+"""
+snapshot.py: Packs the complete simulation state of a Game into bytes and restores it.
+
+A snapshot holds everything update() reads: game state and timers, every
+player tank, the spawner's progress, every enemy and bullet slot, the pending
+random rolls, the RNG state and the health of every wall tile. Restoring
+it and running the same input afterwards gives the same game as the
+original run. Rendering state (wall layer, dirty rects, HUD) is rebuilt,
+not stored.
+
+Binary layout (little endian): header, player records, spawner record, the
+name being entered, the remaining wave sizes, the 625-word RNG state, the
+enemy arrays, the pending direction and cooldown rolls, the bullet arrays
+and the tile kinds and health of the level grid.
+"""
+
+import struct
+import sys
+from array import array
+
+from training_game.enemy import DIRECTIONS
+from training_game.flow_field import FlowField
+from training_game.settings import LEVELS
+
+_MAGIC = b"IBSS"
+_VERSION = 2
+# magic, version, tick, level, state, level transition timer, score, name length,
+# enemy count, direction rolls, cooldown rolls, bullet count, wave count, tile count, player count
+_HEADER = struct.Struct("<4sHqHBdqHIIIIHIB")
+# x, y, previous x, previous y, lives, score, shoot cooldown, facing x, facing y
+_PLAYER = struct.Struct("<iiiiiqibb")
+# pending, spawned, wave, wave timer, next point
+_SPAWNER = struct.Struct("<IIIiI")
+# RNG internal state version, gauss_next present, gauss_next
+_RNG = struct.Struct("<BBd")
+_RNG_WORDS = 625
+
+# Game.state values, stored by position
+STATES = ('RUN', 'PAUSE', 'VICTORY', 'ENTER_NAME', 'SHOW_HIGHSCORES', 'CAMPAIGN_COMPLETE')
+_STATE_CODES = {name: code for code, name in enumerate(STATES)}
+_DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+# Arrays are stored little endian whatever the machine
+_SWAP = sys.byteorder != 'little'
+
+
+def _bullet_arrays(proj):
+    return (proj.x, proj.y, proj.px, proj.py, proj.dx, proj.dy, proj.owner, proj.alive)
+
+
+def _pack(arr, count):
+    """
+    Return the first `count` items of an array (or bytearray) as little endian bytes.
+    """
+    if isinstance(arr, bytearray):
+        return bytes(arr[:count])
+    part = arr[:count]
+    if _SWAP:
+        part.byteswap()
+    return part.tobytes()
+
+
+def _unpack(arr, view, offset, count):
+    """
+    Replace the first `count` items of arr (growing it if needed) from view[offset:].
+    :return: Offset just past the data read.
+    """
+    if isinstance(arr, bytearray):
+        arr[:count] = view[offset:offset + count]
+        return offset + count
+    end = offset + count * arr.itemsize
+    values = array(arr.typecode)
+    values.frombytes(view[offset:end])
+    if _SWAP:
+        values.byteswap()
+    arr[:count] = values
+    return end
+
+
+def check(data):
+    """
+    Check that data starts with a snapshot header of this version.
+    :raises ValueError: If it does not.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Snapshot is truncated")
+    magic, version = struct.unpack_from("<4sH", data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Snapshot format {version} is not the current format {_VERSION}")
+
+
+def capture(game):
+    """
+    Return the simulation state of a game as bytes.
+    """
+    fleet = game.enemies
+    proj = game.projectiles
+    spawner = game.spawner
+    walls = game.walls
+    name = game.name_buffer.encode('utf-8')
+    waves = array('I', spawner.waves)
+    rng_version, rng_words, gauss = game.rng.getstate()
+    direction_rolls = bytes(map(_DIRECTION_CODES.__getitem__, fleet._direction_rolls))
+    cooldown_rolls = array('H', fleet._cooldown_rolls)
+    cells = len(walls.kinds)
+
+    parts = [
+        _HEADER.pack(_MAGIC, _VERSION, game.tick, game.current_level_index, _STATE_CODES[game.state],
+                     game.level_transition_timer, game.score, len(name), fleet.count,
+                     len(direction_rolls), len(cooldown_rolls), proj.count, len(waves), cells,
+                     len(game.players)),
+    ]
+    parts.extend(_PLAYER.pack(player.rect.x, player.rect.y, player.prev_pos[0], player.prev_pos[1], player.lives,
+                              player.score, player.shoot_cooldown, player.facing[0], player.facing[1])
+                 for player in game.players)
+    parts += [
+        _SPAWNER.pack(spawner.pending, spawner.spawned, spawner.wave, spawner._wave_timer, spawner._next_point),
+        name,
+        _pack(waves, len(waves)),
+        _RNG.pack(rng_version, gauss is not None, gauss or 0.0),
+        _pack(array('I', rng_words), _RNG_WORDS),
+    ]
+    count = fleet.count
+    parts.extend(_pack(arr, count) for arr in fleet._arrays())
+    parts.append(direction_rolls)
+    parts.append(_pack(cooldown_rolls, len(cooldown_rolls)))
+    count = proj.count
+    parts.extend(_pack(arr, count) for arr in _bullet_arrays(proj))
+    parts.append(bytes(walls.kinds))
+    parts.append(bytes(walls.health))
+    return b"".join(parts)
+
+
+def restore(game, data):
+    """
+    Put a game into the state captured in data. The level is reloaded only
+    if the snapshot is on a different level; otherwise only wall tiles that
+    differ are changed.
+    :param data: bytes-like object from capture() (a memoryview into an mmap works).
+    :raises ValueError: If data is not a snapshot of this version.
+    """
+    view = memoryview(data)
+    check(view)
+    (_, _, tick, level_index, state, transition_timer, score, name_length, enemy_count,
+     direction_count, cooldown_count, bullet_count, wave_count, cells, player_count) = _HEADER.unpack_from(view)
+
+    # The walls belong to the last level loaded; past the end of the campaign that is the last one
+    loaded = min(level_index, len(LEVELS) - 1)
+    if loaded != min(game.current_level_index, len(LEVELS) - 1) or len(game.walls.kinds) != cells:
+        game.start_level(loaded)
+    game.tick = tick
+    game.current_level_index = level_index
+    game.state = STATES[state]
+    game.level_transition_timer = transition_timer
+    game.score = score
+
+    # Co-op partners joined or left since the snapshot
+    while len(game.players) < player_count:
+        game.add_player()
+    del game.players[max(1, player_count):]
+    offset = _HEADER.size
+    for player in game.players:
+        x, y, prev_x, prev_y, lives, player_score, cooldown, fx, fy = _PLAYER.unpack_from(view, offset)
+        offset += _PLAYER.size
+        player.rect.topleft = (x, y)
+        player.prev_pos = (prev_x, prev_y)
+        player.lives = lives
+        player.score = player_score
+        player.shoot_cooldown = cooldown
+        player.facing = (fx, fy)
+
+    spawner = game.spawner
+    spawner.pending, spawner.spawned, spawner.wave, spawner._wave_timer, spawner._next_point = \
+        _SPAWNER.unpack_from(view, offset)
+    offset += _SPAWNER.size
+    game.name_buffer = bytes(view[offset:offset + name_length]).decode('utf-8')
+    offset += name_length
+    waves = array('I')
+    offset = _unpack(waves, view, offset, wave_count)
+    spawner.waves.clear()
+    spawner.waves.extend(waves)
+
+    rng_version, has_gauss, gauss = _RNG.unpack_from(view, offset)
+    offset += _RNG.size
+    words = array('I')
+    offset = _unpack(words, view, offset, _RNG_WORDS)
+    game.rng.setstate((rng_version, tuple(words), gauss if has_gauss else None))
+
+    fleet = game.enemies
+    for arr in fleet._arrays():
+        offset = _unpack(arr, view, offset, enemy_count)
+    fleet.count = enemy_count
+    fleet._direction_rolls = list(map(DIRECTIONS.__getitem__, view[offset:offset + direction_count]))
+    offset += direction_count
+    rolls = array('H')
+    offset = _unpack(rolls, view, offset, cooldown_count)
+    fleet._cooldown_rolls = rolls.tolist()
+
+    proj = game.projectiles
+    for arr in _bullet_arrays(proj):
+        offset = _unpack(arr, view, offset, bullet_count)
+    proj.count = bullet_count
+    proj.wall_hits = []
+
+    kinds = view[offset:offset + cells]
+    health = view[offset + cells:offset + 2 * cells]
+    if len(health) != cells:
+        raise ValueError("Snapshot is truncated")
+    walls = game.walls
+    if walls.kinds != kinds or walls.health != health:
+        for index in range(cells):
+            if walls.kinds[index] != kinds[index] or walls.health[index] != health[index]:
+                walls.set_cell(index, kinds[index], health[index])
+        # The flow field only tracks walls being destroyed; rebuild it for walls that came back
+        game.flow_field.detach()
+        game.flow_field = FlowField(walls)
+    game.full_redraw = True
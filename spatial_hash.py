@@ -0,0 +1,74 @@
+"""
+spatial_hash.py: Defines the SpatialHash class, a uniform-grid broadphase for moving entities.
+"""
+
+from training_game.settings import SPATIAL_HASH_CELL
+
+
+class SpatialHash:
+    """
+    Buckets entity rects into square cells so overlap queries only test
+    entities in nearby cells. The hash is rebuilt every frame.
+    """
+    def __init__(self, cell_size=SPATIAL_HASH_CELL):
+        """
+        Initialize an empty hash.
+        :param cell_size: Size of a hash cell in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        """
+        Remove all entries. Called once per frame before re-inserting.
+        """
+        self.cells.clear()
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (rect[0] // size, rect[1] // size,
+                (rect[0] + rect[2] - 1) // size, (rect[1] + rect[3] - 1) // size)
+
+    def insert(self, item, rect, tag):
+        """
+        Add an entity to every cell its rect overlaps.
+        :param item: The entity (any hashable object, e.g. a bullet slot index).
+        :param rect: pygame.Rect (or x, y, w, h tuple) of the entity.
+        :param tag: Category used to filter queries (e.g. 'enemy').
+        """
+        entry = (item, rect, tag)
+        cells = self.cells
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [entry]
+                else:
+                    bucket.append(entry)
+
+    def query(self, rect, tag=None):
+        """
+        Return the entities whose rect overlaps the given rect.
+        :param rect: pygame.Rect to test.
+        :param tag: If given, only entities with this tag are returned.
+        :return: List of matching entities, each reported once.
+        """
+        cells = self.cells
+        found = []
+        seen = set()
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    continue
+                for entry in bucket:
+                    if tag is not None and entry[2] != tag:
+                        continue
+                    # An entry spanning several cells is the same tuple in each bucket
+                    if id(entry) in seen or not rect.colliderect(entry[1]):
+                        continue
+                    seen.add(id(entry))
+                    found.append(entry[0])
+        return found
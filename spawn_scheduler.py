@@ -0,0 +1,98 @@
+"""
+spawn_scheduler.py: Defines the SpawnScheduler class, which releases a level's enemies in timed waves.
+"""
+
+from collections import deque
+
+import pygame
+from training_game.enemy import ENEMY_SIZE
+from training_game import logger
+
+
+class SpawnScheduler:
+    """
+    Releases enemies into an EnemyFleet in waves from a fixed set of spawn
+    points instead of placing the whole level at once.
+
+    A wave is queued when the previous one's timer runs out, or at once
+    when the field has been cleared. Queued enemies enter the fleet at most
+    `per_tick` per tick, only while fewer than `max_alive` are alive, and
+    only on a spawn point nothing is standing on, so neither the level
+    start nor a large wave lands in one frame.
+    """
+    def __init__(self, points, total, waves=1, wave_interval=0, max_alive=0, per_tick=1, speed=None):
+        """
+        :param points: List of (x, y) pixel positions enemies may spawn at.
+        :param total: Total number of enemies in the level.
+        :param waves: Number of waves the total is split into.
+        :param wave_interval: Ticks between waves.
+        :param max_alive: Most enemies alive at once (0 = no cap).
+        :param per_tick: Most enemies released in one tick.
+        :param speed: Speed of the spawned enemies (None = fleet default).
+        """
+        self.points = list(points)
+        self.total = total
+        # Wave sizes, as even as possible; earlier waves take the remainder
+        waves = max(1, min(waves, total))
+        self.waves = deque(total // waves + (1 if i < total % waves else 0) for i in range(waves) if total)
+        self.wave_interval = wave_interval
+        self.max_alive = max_alive
+        self.per_tick = per_tick
+        self.speed = speed
+        self.pending = 0           # Enemies of released waves still waiting for a free spawn point
+        self.spawned = 0
+        self.wave = 0              # Number of waves released so far
+        self._wave_timer = 0       # Ticks until the next wave is queued
+        self._next_point = 0       # Spawn point tried first, rotated so points take turns
+
+    @property
+    def exhausted(self):
+        """
+        True once every enemy of the level has been spawned.
+        """
+        return not self.waves and not self.pending
+
+    @property
+    def remaining(self):
+        """
+        Number of enemies not spawned yet.
+        """
+        return self.total - self.spawned
+
+    def _free_point(self, fleet, blockers):
+        points = self.points
+        for k in range(len(points)):
+            i = (self._next_point + k) % len(points)
+            rect = pygame.Rect(points[i][0], points[i][1], ENEMY_SIZE, ENEMY_SIZE)
+            if rect.collidelist(blockers) == -1 and not fleet.overlaps(rect):
+                self._next_point = (i + 1) % len(points)
+                return points[i]
+        return None
+
+    def update(self, fleet, blockers=()):
+        """
+        Advance the wave timer and release queued enemies into the fleet.
+        :param fleet: EnemyFleet to spawn into.
+        :param blockers: Rects (e.g. the player) spawn points must be clear of.
+        :return: Number of enemies spawned this tick.
+        """
+        if self.waves:
+            self._wave_timer -= 1
+            if self._wave_timer <= 0 or (not self.pending and not fleet):
+                self.pending += self.waves.popleft()
+                self.wave += 1
+                self._wave_timer = self.wave_interval
+                logger.info("Wave %d released (%d enemies queued).", self.wave, self.pending)
+
+        released = 0
+        if not self.points:
+            return released
+        while self.pending and released < self.per_tick and (not self.max_alive or len(fleet) < self.max_alive):
+            point = self._free_point(fleet, blockers)
+            if point is None:
+                break
+            fleet.spawn(point[0], point[1], speed=self.speed)
+            self.pending -= 1
+            self.spawned += 1
+            released += 1
+        return released
@@ -0,0 +1,161 @@
+"""
+state_hash.py: Defines the StateHash class, a cheap 64-bit fingerprint of the simulation state.
+
+Two runs that hash the same every tick played out the same way, so
+comparing per-tick hashes between code versions or machines catches
+nondeterminism (for example from an optimization) at the tick it starts.
+"""
+
+import hashlib
+import struct
+
+from training_game.snapshot import STATES
+
+MASK = (1 << 64) - 1
+_TILE_SALT = 0x9E3779B97F4A7C15
+_COORD = 0xFFFFF  # Coordinates are folded into 20 bits each
+_ENTITY_MULTIPLIER = 0xBF58476D1CE4E5B9
+_STATE_MULTIPLIER = 0x94D049BB133111EB
+_DOUBLE = struct.Struct("<d")
+
+# Entity tags, so a bullet and a tank at the same spot hash differently
+_TAG_PLAYER = 1
+_TAG_ENEMY = 2
+_TAG_BULLET = 3
+
+
+def mix64(value):
+    """
+    Scramble a 64-bit integer (splitmix64 finalizer), so nearby inputs give unrelated outputs.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def _float_bits(value):
+    """
+    Return the IEEE 754 bits of a float as an integer.
+    """
+    return int.from_bytes(_DOUBLE.pack(value), 'little')
+
+
+def rng_key(rng):
+    """
+    Return a 64-bit digest of a random.Random's state: its 625 Mersenne
+    Twister words, packed little-endian, and the cached gauss value.
+    """
+    _, words, gauss = rng.getstate()
+    data = struct.pack(f"<{len(words)}I", *words)
+    if gauss is not None:
+        data += _DOUBLE.pack(gauss)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def tile_key(index, kind, health):
+    """
+    Return the Zobrist key of one cell state. Empty cells contribute nothing.
+    """
+    if not kind:
+        return 0
+    return mix64(_TILE_SALT ^ (index << 16) ^ (kind << 8) ^ health)
+
+
+class StateHash:
+    """
+    Rolling hash of a Game's state.
+
+    The wall part is Zobrist-style: the XOR of one key per (cell, kind,
+    health), kept up to date from TileGrid change notifications, so a
+    damaged, destroyed or restored wall costs one XOR out and one XOR in.
+    Tanks and bullets move every tick, so their part is recomputed once per
+    tick as a sum (mod 2**64) of per-entity keys; a sum does not depend on
+    slot order, so compacting the arrays leaves it unchanged.
+    """
+    def __init__(self, walls):
+        """
+        :param walls: TileGrid of the current level.
+        """
+        self.walls = None
+        self.tiles = 0
+        self._kinds = bytearray()
+        self._health = bytearray()
+        self.attach(walls)
+
+    def attach(self, walls):
+        """
+        Hash a new level grid from scratch and follow its changes.
+        """
+        self.detach()
+        self.walls = walls
+        self._kinds = bytearray(walls.kinds)
+        self._health = bytearray(walls.health)
+        tiles = 0
+        for index, kind in enumerate(self._kinds):
+            if kind:
+                tiles ^= tile_key(index, kind, self._health[index])
+        self.tiles = tiles
+        walls.listeners.append(self.on_cell_changed)
+
+    def detach(self):
+        """
+        Stop listening to the grid (called when the level is replaced).
+        """
+        if self.walls is not None and self.on_cell_changed in self.walls.listeners:
+            self.walls.listeners.remove(self.on_cell_changed)
+
+    def on_cell_changed(self, index):
+        """
+        TileGrid listener: swap the cell's old key for its new one.
+        """
+        kind, health = self.walls.kinds[index], self.walls.health[index]
+        self.tiles ^= tile_key(index, self._kinds[index], self._health[index]) ^ tile_key(index, kind, health)
+        self._kinds[index] = kind
+        self._health[index] = health
+
+    def digest(self, game):
+        """
+        Return the 64-bit hash of the game's current state.
+        """
+        h = mix64(self.tiles ^ (game.current_level_index << 56) ^ (game.tick & 0xFFFFFFFFFFFF))
+        for slot, player in enumerate(game.players):
+            rect = player.rect
+            fx, fy = player.facing
+            h ^= mix64((_TAG_PLAYER << 56) ^ (slot << 60) ^ ((rect.x & _COORD) << 20) ^ (rect.y & _COORD)
+                       ^ (((fx & 3) << 2 | (fy & 3)) << 36) ^ (player.lives << 40) ^ (player.shoot_cooldown << 48))
+        h ^= mix64(game.player.score ^ (STATES.index(game.state) << 56))
+        # The score carried into the next level and the tick the level advances on
+        h ^= mix64(mix64(game.score) ^ _float_bits(game.level_transition_timer))
+        # Hidden state that decides future ticks: the RNG (hashed from its
+        # words, so the value is the same on every build and machine), the
+        # rolls the fleet drew ahead from it, and the spawner's wave progress
+        fleet = game.enemies
+        h ^= mix64(rng_key(game.rng) ^ (len(fleet._direction_rolls) << 48)
+                   ^ (len(fleet._cooldown_rolls) << 56))
+        spawner = game.spawner
+        h ^= mix64((spawner.pending & 0xFFFF) ^ ((spawner.spawned & 0xFFFF) << 16) ^ ((spawner.wave & 0xFF) << 32)
+                   ^ ((spawner._wave_timer & 0xFFFF) << 40) ^ ((spawner._next_point & 0xFF) << 56))
+
+        # Entity keys are mixed with one multiply and xor-shift each (cheaper
+        # than mix64); the final mix64 spreads the sum
+        total = 0
+        count = fleet.count
+        tag = _TAG_ENEMY << 56
+        for x, y, dx, dy, stuck, wander, cooldown, alive in zip(
+                fleet.x[:count], fleet.y[:count], fleet.dir_x[:count], fleet.dir_y[:count],
+                fleet.stuck[:count], fleet.wander[:count], fleet.cooldown[:count], fleet.alive[:count]):
+            if alive:
+                steering = ((dx & 3) << 2 | (dy & 3) | (stuck & 0xFFFF) << 4 | (wander & 0xFFFF) << 20) * _STATE_MULTIPLIER
+                v = ((tag ^ ((x & _COORD) << 20) ^ (y & _COORD) ^ (cooldown << 40) ^ steering) * _ENTITY_MULTIPLIER) & MASK
+                total += v ^ (v >> 29)
+        proj = game.projectiles
+        count = proj.count
+        tag = _TAG_BULLET << 56
+        for x, y, dx, dy, owner, alive in zip(proj.x[:count], proj.y[:count], proj.dx[:count],
+                                              proj.dy[:count], proj.owner[:count], proj.alive[:count]):
+            if alive:
+                v = ((tag ^ ((x & _COORD) << 20) ^ (y & _COORD)
+                      ^ (((dx & 3) << 2 | (dy & 3) | owner << 4) << 40)) * _ENTITY_MULTIPLIER) & MASK
+                total += v ^ (v >> 29)
+        return mix64(h ^ (total & MASK))
@@ -0,0 +1,100 @@
+"""
+Round-trip checks of the delta-coded network frames.
+"""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import random
+from array import array
+
+import pytest
+from training_game import net_protocol as proto
+from training_game.game_clean import Game
+
+
+def _random_frame(rng, base=None):
+    """
+    Return a frame of random sections. With a base, most values move a
+    little either way (negative deltas included), some jump anywhere, and
+    sections sometimes grow, shrink, empty out or stay the same.
+    """
+    frame = []
+    for section, typecode in enumerate(proto.SECTION_TYPES):
+        top = (1 << (8 * array(typecode).itemsize)) - 1
+        old = base[section] if base is not None else array(typecode)
+        roll = rng.random()
+        if base is not None and roll < 0.2:
+            frame.append(array(typecode, old))
+            continue
+        if roll < 0.3:
+            count = 0
+        else:
+            count = max(0, len(old) + rng.randint(-3, 3)) if old else rng.randint(1, 40)
+        values = array(typecode)
+        for i in range(count):
+            if i < len(old) and rng.random() < 0.8:
+                values.append(min(top, max(0, old[i] + rng.randint(-5, 5))))
+            else:
+                values.append(rng.randint(0, top))
+        frame.append(values)
+    return tuple(frame)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_delta_round_trip_on_random_frames(seed):
+    rng = random.Random(seed)
+    base = None
+    for _ in range(50):
+        frame = _random_frame(rng, base)
+        data = proto.encode_delta(frame, base)
+        assert proto.decode_delta(data, 0, base) == frame
+        # A frame without a baseline is also a delta against zeros
+        assert proto.decode_delta(proto.encode_delta(frame), 0, None) == frame
+        base = frame
+
+
+def test_delta_round_trip_at_the_value_limits():
+    base = (array('H', [0, 0xFFFF, 5]), array('H'), array('H', [1, 2, 3]), array('B', [0, 255] * 100))
+    frame = (array('H', [0xFFFF, 0, 5]), array('H', [7]), array('H'), array('B', [255, 0] * 100))
+    assert proto.decode_delta(proto.encode_delta(frame, base), 0, base) == frame
+    assert proto.decode_delta(proto.encode_delta(base, frame), 0, frame) == base
+
+
+def test_unchanged_frame_costs_one_byte_per_section():
+    rng = random.Random(1)
+    frame = _random_frame(rng)
+    data = proto.encode_delta(frame, frame)
+    assert len(data) <= 2 * len(frame)
+    assert proto.decode_delta(data, 0, frame) == frame
+
+
+def test_decode_rejects_truncated_and_mismatched_data():
+    rng = random.Random(2)
+    base = _random_frame(rng)
+    frame = _random_frame(rng, base)
+    data = proto.encode_delta(frame, base)
+    with pytest.raises(ValueError):
+        proto.decode_delta(data[:len(data) // 2], 0, base)
+    shorter = tuple(values[:-1] if len(values) else values for values in base)
+    unchanged = proto.encode_delta(base, base)
+    if shorter != base:
+        with pytest.raises(ValueError):
+            proto.decode_delta(unchanged, 0, shorter)
+
+
+def test_captured_game_frames_round_trip():
+    game = Game(headless=True, seed=3)
+    game.add_player()
+    base = None
+    for _ in range(120):
+        game.step(1)
+        frame = proto.capture_frame(game)
+        decoded = proto.decode_delta(proto.encode_delta(frame, base), 0, base)
+        assert decoded == frame
+        state = proto.NetState(game.tick, decoded)
+        assert len(state.players) == 2
+        assert state.score == game.player.score
+        base = frame
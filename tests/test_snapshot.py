@@ -0,0 +1,130 @@
+"""
+Round-trip checks of the snapshot (save state) and replay file formats.
+"""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import random
+
+import pygame
+import pytest
+from training_game import snapshot
+from training_game.game_clean import Game
+from training_game.input_source import KeyState, ScriptedInput
+from training_game.replay import InputRecorder, Replay, ReplayFile
+
+SEED = 7
+MOVES = [pygame.K_UP, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN]
+
+
+def _script(ticks, seed=SEED):
+    rng = random.Random(seed)
+    frames = []
+    keys = set()
+    for tick in range(ticks):
+        if tick % 20 == 0:
+            keys = {rng.choice(MOVES), pygame.K_SPACE} if rng.random() < 0.7 else {rng.choice(MOVES)}
+        frames.append(KeyState(keys))
+    return frames
+
+
+def _game(frames=()):
+    game = Game(headless=True, input_source=ScriptedInput(frames), seed=SEED)
+    game.save_scores = False
+    game.enable_state_hash()
+    return game
+
+
+def test_restore_gives_the_same_state_hash():
+    frames = _script(900)
+    game = _game(frames)
+    game.step(600)
+    data = game.snapshot()
+
+    copy = _game(frames[600:])
+    copy.restore(data)
+    assert copy.hasher.digest(copy) == game.state_hash
+    assert copy.snapshot() == data
+
+    # Both go on identically from there
+    game.step(300)
+    copy.step(300)
+    assert copy.state_hash == game.state_hash
+
+
+def test_restore_into_a_game_on_another_level():
+    game = _game(_script(300))
+    game.step(300)
+    data = game.snapshot()
+
+    other = _game()
+    other.start_level(2)
+    other.restore(data)
+    assert other.current_level_index == game.current_level_index
+    assert other.hasher.digest(other) == game.state_hash
+
+
+def test_check_rejects_other_versions_and_truncated_data():
+    data = bytearray(_game().snapshot())
+    snapshot.check(data)
+    with pytest.raises(ValueError):
+        snapshot.check(data[:10])
+    wrong = bytearray(data)
+    wrong[4] ^= 0xFF  # Version field follows the magic
+    with pytest.raises(ValueError):
+        snapshot.check(wrong)
+    with pytest.raises(ValueError):
+        _game().restore(bytes(wrong))
+
+
+def _record(ticks, keyframe_interval):
+    game = _game(_script(ticks))
+    recorder = InputRecorder(game, keyframe_interval=keyframe_interval)
+    game.step(ticks // 2)
+    game.handle_key(pygame.K_p)  # Pause and resume: key presses are recorded too
+    game.step(10)
+    game.handle_key(pygame.K_p)
+    game.step(ticks - ticks // 2 - 10)
+    return game, recorder.replay()
+
+
+def test_replay_round_trip(tmp_path):
+    game, replay = _record(1200, keyframe_interval=300)
+    path = tmp_path / "session.ibr"
+    replay.save(path)
+
+    assert replay.play().snapshot() == game.snapshot()
+    with ReplayFile(path) as saved:
+        assert saved.ticks == replay.ticks
+        assert saved.play().snapshot() == game.snapshot()
+        # Seeking through a keyframe ends where playing from the start does
+        for tick in (0, 299, 300, 301, 750, 1200):
+            assert saved.seek(tick).snapshot() == saved.play(ticks=tick).snapshot()
+
+
+def test_replay_from_a_restored_state(tmp_path):
+    start = _game(_script(400))
+    start.step(400)
+
+    game = _game(_script(600, seed=SEED + 1))
+    game.restore(start.snapshot())
+    recorder = InputRecorder(game, keyframe_interval=0)
+    game.step(600)
+    path = tmp_path / "resumed.ibr"
+    recorder.replay().save(path)
+
+    with ReplayFile(path) as saved:
+        assert saved.from_snapshot
+        assert saved.play().snapshot() == game.snapshot()
+
+
+def test_replay_file_rejects_other_versions(tmp_path):
+    data = bytearray(Replay(SEED).to_bytes())
+    data[4] ^= 0xFF
+    path = tmp_path / "old.ibr"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        ReplayFile(path)
@@ -111,6 +111,18 @@ def clear_rows(grid, locked):
         locked.update(new_locked)
     return cleared
 
+# Czcionka tworzona raz; napis z wynikiem renderowany tylko po zmianie wyniku
+SCORE_FONT = pygame.font.SysFont(None, 36)
+_score_cache = {}
+
+def score_surface(score):
+    text = _score_cache.get(score)
+    if text is None:
+        _score_cache.clear()
+        text = SCORE_FONT.render(f"Score: {score}", True, WHITE)
+        _score_cache[score] = text
+    return text
+
 def draw_window(surface, grid, score):
     surface.fill(BLACK)
     for y in range(ROWS):
@@ -118,8 +130,7 @@ def draw_window(surface, grid, score):
             pygame.draw.rect(surface, grid[y][x],
                              (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 0)
     draw_grid_lines(surface)
-    score_text = pygame.font.SysFont(None, 36).render(f"Score: {score}", True, WHITE)
-    surface.blit(score_text, (10, 10))
+    surface.blit(score_surface(score), (10, 10))
     pygame.display.update()
 
 # Główna funkcja gry
@@ -121,6 +121,20 @@ def draw_grid(surface):
         pygame.draw.line(surface, GRAY, (x * BLOCK_SIZE, 0), (x * BLOCK_SIZE, HEIGHT))
 
 
+# Czcionka tworzona raz; napis z wynikiem renderowany tylko po zmianie wyniku
+SCORE_FONT = pygame.font.SysFont(None, 32)
+_score_cache = {}
+
+
+def score_surface(score):
+    text = _score_cache.get(score)
+    if text is None:
+        _score_cache.clear()
+        text = SCORE_FONT.render(f"Score: {score}", True, WHITE)
+        _score_cache[score] = text
+    return text
+
+
 def draw_window(surface, grid, score):
     surface.fill(BLACK)
     for y in range(ROWS):
@@ -128,9 +142,7 @@ def draw_window(surface, grid, score):
             pygame.draw.rect(surface, grid[y][x],
                              (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
     draw_grid(surface)
-    font = pygame.font.SysFont(None, 32)
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    surface.blit(score_text, (10, 10))
+    surface.blit(score_surface(score), (10, 10))
     pygame.display.update()
 
 
@@ -0,0 +1,213 @@
+"""
+tile_grid.py: Defines the TileGrid class, a tile-indexed store of the level walls.
+"""
+
+import pygame
+from training_game.settings import TILE_SIZE
+from training_game.utils import swept_entry_time
+from training_game.wall import Wall
+
+# Cell types stored in TileGrid.kinds
+EMPTY = 0
+SOLID = 1
+DESTRUCTIBLE = 2
+
+
+class TileGrid:
+    """
+    Stores the walls of a level in flat arrays indexed by tile coordinates.
+
+    Collision queries only visit the tiles a rect overlaps, so their cost does
+    not depend on how many walls the map has. Destroying a wall clears its cell
+    instead of removing it from a list.
+    """
+    def __init__(self, cols, rows, tile_size=TILE_SIZE):
+        """
+        Initialize an empty grid.
+        :param cols: Number of tile columns.
+        :param rows: Number of tile rows.
+        :param tile_size: Size of a tile in pixels.
+        """
+        self.cols = cols
+        self.rows = rows
+        self.tile_size = tile_size
+        self.kinds = bytearray(cols * rows)   # EMPTY, SOLID or DESTRUCTIBLE per cell
+        self.health = bytearray(cols * rows)  # Remaining health per cell
+        self.walls = [None] * (cols * rows)   # Wall object per cell (for rendering)
+        self.count = 0
+        # Callables invoked with the cell index whenever a cell's health or type changes
+        self.listeners = []
+
+    def clone(self):
+        """
+        Return an independent copy of the grid with fresh Wall objects, so a
+        cached prototype can be reused across level restarts. Listeners are
+        not copied.
+        """
+        grid = TileGrid(self.cols, self.rows, self.tile_size)
+        grid.kinds[:] = self.kinds
+        grid.health[:] = self.health
+        grid.walls = [None if w is None else Wall(w.rect.copy(), w.destructible, w.health) for w in self.walls]
+        grid.count = self.count
+        return grid
+
+    def index_of(self, col, row):
+        """
+        Return the flat cell index for the given tile coordinates.
+        """
+        return row * self.cols + col
+
+    def tile_at(self, x, y):
+        """
+        Return the (col, row) tile containing the pixel (x, y).
+        """
+        return x // self.tile_size, y // self.tile_size
+
+    def add(self, wall):
+        """
+        Place a wall in the cell at its rect's top-left corner.
+        :param wall: Wall object aligned to the tile grid.
+        """
+        col, row = self.tile_at(wall.rect.x, wall.rect.y)
+        index = self.index_of(col, row)
+        if self.walls[index] is None:
+            self.count += 1
+        self.walls[index] = wall
+        self.kinds[index] = DESTRUCTIBLE if wall.destructible else SOLID
+        self.health[index] = max(0, min(255, wall.health))
+
+    def remove(self, wall):
+        """
+        Clear the cell occupied by the given wall.
+        :param wall: Wall object to remove.
+        """
+        col, row = self.tile_at(wall.rect.x, wall.rect.y)
+        index = self.index_of(col, row)
+        if self.walls[index] is wall:
+            self.walls[index] = None
+            self.kinds[index] = EMPTY
+            self.health[index] = 0
+            self.count -= 1
+            self._notify(index)
+
+    def damage(self, wall):
+        """
+        Apply one point of damage to a wall and update its cell.
+        :param wall: Wall object that was hit.
+        :return: True if the wall was destroyed, False otherwise.
+        """
+        destroyed = wall.take_damage()
+        if destroyed:
+            self.remove(wall)
+        else:
+            col, row = self.tile_at(wall.rect.x, wall.rect.y)
+            index = self.index_of(col, row)
+            self.health[index] = max(0, wall.health)
+            self._notify(index)
+        return destroyed
+
+    def set_cell(self, index, kind, health):
+        """
+        Put a cell into the given state, creating or dropping its Wall as
+        needed, and notify listeners. Used to restore saved game states.
+        :param index: Flat cell index.
+        :param kind: EMPTY, SOLID or DESTRUCTIBLE.
+        :param health: Remaining health of the wall.
+        """
+        wall = self.walls[index]
+        if kind == EMPTY:
+            if wall is not None:
+                self.remove(wall)
+            return
+        if wall is None:
+            x, y, w, h = self.cell_rect(index)
+            wall = self.walls[index] = Wall(pygame.Rect(x, y, w, h))
+            self.count += 1
+        wall.destructible = kind == DESTRUCTIBLE
+        wall.health = health
+        self.kinds[index] = kind
+        self.health[index] = health
+        self._notify(index)
+
+    def _notify(self, index):
+        for listener in self.listeners:
+            listener(index)
+
+    def cell_rect(self, index):
+        """
+        Return the pixel rect (x, y, w, h) of a cell.
+        """
+        size = self.tile_size
+        return ((index % self.cols) * size, (index // self.cols) * size, size, size)
+
+    def span(self, rect):
+        """
+        Return the inclusive tile range (col0, row0, col1, row1) overlapped by rect,
+        clipped to the grid. The range is empty when col0 > col1 or row0 > row1.
+        """
+        size = self.tile_size
+        col0 = max(0, rect[0] // size)
+        row0 = max(0, rect[1] // size)
+        col1 = min(self.cols - 1, (rect[0] + rect[2] - 1) // size)
+        row1 = min(self.rows - 1, (rect[1] + rect[3] - 1) // size)
+        return col0, row0, col1, row1
+
+    def collide(self, rect):
+        """
+        Return the first wall overlapping rect, or None.
+        :param rect: pygame.Rect (or x, y, w, h tuple) to test.
+        """
+        col0, row0, col1, row1 = self.span(rect)
+        kinds = self.kinds
+        cols = self.cols
+        for row in range(row0, row1 + 1):
+            base = row * cols
+            for col in range(col0, col1 + 1):
+                if kinds[base + col]:
+                    return self.walls[base + col]
+        return None
+
+    def sweep(self, rect, dx, dy):
+        """
+        Find the first wall hit by a rect moving by (dx, dy), so fast movers
+        cannot tunnel through a tile between two positions.
+        :param rect: (x, y, w, h) of the mover at the start of the move.
+        :param dx: Horizontal displacement.
+        :param dy: Vertical displacement.
+        :return: Tuple (wall, t) where t in [0, 1) is the fraction of the move
+            at first contact, or (None, 1.0) if the path is clear.
+        """
+        x, y, w, h = rect[0], rect[1], rect[2], rect[3]
+        col0, row0, col1, row1 = self.span((min(x, x + dx), min(y, y + dy), w + abs(dx), h + abs(dy)))
+        kinds = self.kinds
+        cols = self.cols
+        size = self.tile_size
+        best_wall = None
+        best_t = 1.0
+        for row in range(row0, row1 + 1):
+            base = row * cols
+            for col in range(col0, col1 + 1):
+                if not kinds[base + col]:
+                    continue
+                t = swept_entry_time(rect, dx, dy, (col * size, row * size, size, size))
+                if t is not None and t < best_t:
+                    best_t = t
+                    best_wall = self.walls[base + col]
+        return best_wall, best_t
+
+    def is_blocked(self, col, row):
+        """
+        Return True if the tile holds a wall. Tiles outside the grid are open.
+        """
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.kinds[row * self.cols + col] != EMPTY
+        return False
+
+    def __iter__(self):
+        """
+        Iterate over the walls that are still standing.
+        """
+        return (wall for wall in self.walls if wall is not None)
+
+    def __len__(self):
+        return self.count
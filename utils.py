@@ -2,12 +2,17 @@
 utils.py: Contains utility functions for the game.
 """
 
+from collections import OrderedDict
+
 import pygame
 
 # Simple cache for pygame.Font objects keyed by size to avoid creating a
 # new Font instance every frame (expensive).
 _FONT_CACHE = {}
 
+# Most rendered text surfaces kept by the text cache
+TEXT_CACHE_SIZE = 256
+
 def clamp(value, min_value, max_value):
     """
     Clamp a value between a minimum and maximum.
@@ -18,6 +23,120 @@ def clamp(value, min_value, max_value):
     """
     return max(min_value, min(value, max_value))
 
+def lerp_rect(prev_pos, rect, alpha):
+    """
+    Return rect placed between its previous top-left and its current one.
+    :param prev_pos: (x, y) at the previous simulation tick.
+    :param rect: pygame.Rect at the current tick.
+    :param alpha: 0.0 gives the previous position, 1.0 the current one.
+    :return: Tuple (x, y, w, h) for drawing.
+    """
+    if alpha >= 1.0:
+        return rect
+    px, py = prev_pos
+    return (round(px + (rect.x - px) * alpha), round(py + (rect.y - py) * alpha), rect.width, rect.height)
+
+def swept_entry_time(rect, dx, dy, target):
+    """
+    Return when a moving rect first overlaps a static target rect.
+    :param rect: (x, y, w, h) of the moving rect at the start of the move.
+    :param dx: Horizontal displacement over the move.
+    :param dy: Vertical displacement over the move.
+    :param target: (x, y, w, h) of the static rect.
+    :return: Fraction of the move in [0, 1) at first overlap, or None if the
+        rects never overlap during the move. Touching edges do not count,
+        matching pygame.Rect.colliderect.
+    """
+    x, y, w, h = rect[0], rect[1], rect[2], rect[3]
+    tx, ty, tw, th = target[0], target[1], target[2], target[3]
+    if dx > 0:
+        entry_x, exit_x = (tx - x - w) / dx, (tx + tw - x) / dx
+    elif dx < 0:
+        entry_x, exit_x = (tx + tw - x) / dx, (tx - x - w) / dx
+    elif x + w <= tx or x >= tx + tw:
+        return None
+    else:
+        entry_x, exit_x = float('-inf'), float('inf')
+    if dy > 0:
+        entry_y, exit_y = (ty - y - h) / dy, (ty + th - y) / dy
+    elif dy < 0:
+        entry_y, exit_y = (ty + th - y) / dy, (ty - y - h) / dy
+    elif y + h <= ty or y >= ty + th:
+        return None
+    else:
+        entry_y, exit_y = float('-inf'), float('inf')
+    entry = max(entry_x, entry_y)
+    exit_ = min(exit_x, exit_y)
+    if entry >= exit_ or entry >= 1 or exit_ <= 0:
+        return None
+    return max(entry, 0.0)
+
+def get_font(font_size):
+    """
+    Return the default pygame Font at the given size, creating it once.
+    """
+    font = _FONT_CACHE.get(font_size)
+    if font is None:
+        font = pygame.font.Font(None, font_size)
+        _FONT_CACHE[font_size] = font
+    return font
+
+class TextCache:
+    """
+    Bounded LRU cache of rendered text surfaces keyed by
+    (text, font size, color, antialias). Static labels and values that
+    rarely change are rasterized once instead of every frame.
+    """
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        """
+        :param max_size: Most surfaces kept; the least recently used is dropped first.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def get(self, text, font_size=24, color=(255, 255, 255), antialias=True):
+        """
+        Return the rendered surface for the text, rendering it on a miss.
+        The surface is shared: callers must not draw on it.
+        """
+        key = (text, font_size, tuple(color), antialias)
+        surfaces = self._surfaces
+        text_surface = surfaces.get(key)
+        if text_surface is not None:
+            self.hits += 1
+            surfaces.move_to_end(key)
+            return text_surface
+        self.misses += 1
+        text_surface = get_font(font_size).render(text, antialias, color)
+        surfaces[key] = text_surface
+        if len(surfaces) > self.max_size:
+            surfaces.popitem(last=False)
+        return text_surface
+
+    def clear(self):
+        """
+        Drop all surfaces and reset the counters.
+        """
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Return a dict with the cache's size, hits, misses and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {'size': len(self._surfaces), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._surfaces)
+
+# Shared by render_text and the HUD
+TEXT_CACHE = TextCache()
+
 def render_text(surface, text, position, font_size=24, color=(255, 255, 255)):
     """
     Render text on the given surface.
@@ -26,12 +145,7 @@ def render_text(surface, text, position, font_size=24, color=(255, 255, 255)):
     :param position: Tuple (x, y) for the text position.
     :param font_size: Font size of the text.
     :param color: Color of the text.
+    :return: The screen area covered by the text.
     """
-    # Reuse font instances where possible to improve performance
-    font = _FONT_CACHE.get(font_size)
-    if font is None:
-        font = pygame.font.Font(None, font_size)
-        _FONT_CACHE[font_size] = font
-
-    text_surface = font.render(text, True, color)
-    surface.blit(text_surface, position)
\ No newline at end of file
+    # Rendered surfaces are reused from the LRU text cache
+    return surface.blit(TEXT_CACHE.get(text, font_size, color), position)
\ No newline at end of file
@@ -2,6 +2,8 @@
 wall.py: Defines the Wall class for static, indestructible blocks.
 """
 
+import logging
+
 import pygame
 from training_game import logger
 
@@ -9,6 +11,8 @@ class Wall:
     """
     Represents a wall block, which can be destructible or indestructible.
     """
+    __slots__ = ('rect', 'destructible', 'health')
+
     def __init__(self, rect, destructible=False, health=1):
         """
         Initialize the wall with a pygame.Rect object.
@@ -27,9 +31,11 @@ class Wall:
         """
         if self.destructible:
             self.health -= 1
-            logger.debug("Wall at %s took damage. Remaining health: %s", self.rect.topleft, self.health)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Wall at %s took damage. Remaining health: %s", self.rect.topleft, self.health)
             if self.health <= 0:
-                logger.info("Wall at %s destroyed.", self.rect.topleft)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Wall at %s destroyed.", self.rect.topleft)
                 return True
         return False
 
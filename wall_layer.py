@@ -0,0 +1,54 @@
+"""
+wall_layer.py: Defines the WallLayer class, a cached off-screen render of the level walls.
+"""
+
+import pygame
+from training_game.settings import SCREEN_WIDTH, SCREEN_HEIGHT, COLOR_BLACK
+
+
+class WallLayer:
+    """
+    Pre-renders all walls of a level into an off-screen Surface once. When a
+    wall is damaged or destroyed only its tile is re-drawn, and the tile is
+    reported as dirty so the game can push just that area to the display.
+    """
+    def __init__(self, walls, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        """
+        Render the walls and subscribe to cell changes.
+        :param walls: TileGrid of the level walls.
+        :param size: Size of the layer surface in pixels.
+        """
+        self.walls = walls
+        self.surface = pygame.Surface(size)
+        self.dirty = []
+        self.surface.fill(COLOR_BLACK)
+        for wall in walls:
+            wall.render(self.surface)
+        walls.listeners.append(self.redraw_tile)
+
+    def redraw_tile(self, index):
+        """
+        Re-draw a single tile after its wall changed.
+        :param index: Flat cell index in the TileGrid.
+        """
+        rect = pygame.Rect(self.walls.cell_rect(index))
+        self.surface.fill(COLOR_BLACK, rect)
+        wall = self.walls.walls[index]
+        if wall is not None:
+            wall.render(self.surface)
+        self.dirty.append(rect)
+
+    def take_dirty(self):
+        """
+        Return the tiles re-drawn since the last call and reset the list.
+        """
+        dirty = self.dirty
+        self.dirty = []
+        return dirty
+
+    def detach(self):
+        """
+        Stop listening to the grid (called when the level is replaced).
+        """
+        if self.redraw_tile in self.walls.listeners:
+            self.walls.listeners.remove(self.redraw_tile)